@@ -0,0 +1,88 @@
+from typing import Optional
+import cv2
+import numpy as np
+import PixelFormat
+
+class ActivityIndex:
+    """ Activity score of the frames of a CircularBuffer, one per buffer slot like the ProxyStore. A frame is scored when it's written,
+        by differencing a small grayscale sample of it with the sample of the previous frame: the score is the fraction of sample pixels
+        whose brightness changed by more than `pixel_threshold`, 0 for a static scene and 1 when the whole picture changed.
+        The sample is taken from the proxy of the frame when there is one, so scoring a frame costs a few tens of microseconds.
+        Attributes:
+            -sample_width, sample_height (int): Size of the grayscale samples.
+            -pixel_threshold (int): Brightness change, out of 255, counted as activity. Above the sensor noise of a static scene.
+            -scores (np.ndarray): Score of every slot.
+            -sequence_numbers (np.ndarray): Sequence number of the frame each score belongs to, -1 for empty slots.
+    """
+    def __init__(self, capacity: int, width: int, height: int, pixel_format: str = PixelFormat.BGR, sample_width: int = 64,
+                 pixel_threshold: int = 12):
+        """Allocate the scores of a buffer of the given capacity holding frames of the given size."""
+        if not isinstance(sample_width, int) or sample_width <= 0:
+            raise ValueError("Sample width must be a positive integer.")
+
+        self.width = int(width)
+        self.height = int(height)
+        self.pixel_format = pixel_format
+        self.sample_width = min(sample_width, self.width)
+        self.sample_height = max(1, round(self.sample_width * self.height / self.width))
+        self.pixel_threshold = pixel_threshold
+        self.scores = np.zeros(capacity, dtype=np.float32)
+        self.sequence_numbers = np.full(capacity, -1, dtype=np.int64)
+        self.previous_sample = None
+        self.sample = np.empty((self.sample_height, self.sample_width), dtype=np.uint8)
+        self.difference = np.empty_like(self.sample)
+
+    def make_sample(self, frame: np.ndarray, dst: np.ndarray) -> np.ndarray:
+        """Downscale the brightness of a stored frame (or of its proxy) to the sample size, writing into `dst`."""
+        frame_width, frame_height = PixelFormat.frame_size(frame, self.pixel_format)
+        image = frame[:frame_height] if self.pixel_format == PixelFormat.I420 else frame
+        # A full frame is decimated to 4x4 pixels per sample pixel before it's averaged down, only that small image is converted
+        if frame_width > 4 * self.sample_width:
+            image = cv2.resize(image, (4 * self.sample_width, 4 * self.sample_height), interpolation=cv2.INTER_NEAREST)
+        luma = image if self.pixel_format == PixelFormat.I420 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        return PixelFormat.resize_plane(luma, (self.sample_width, self.sample_height), dst=dst)
+
+    def measure(self, frame: np.ndarray) -> float:
+        """Score a frame against the previous measured one, the first frame scores 0. Pass the proxy of the frame when there is one.
+
+            Arguments:
+            -frame (np.ndarray): Frame, or its proxy, in the buffer pixel format.
+        """
+        sample = self.make_sample(frame, self.sample)
+        if self.previous_sample is None:
+            score = 0.0
+            self.previous_sample = np.empty_like(sample)
+        else:
+            cv2.absdiff(sample, self.previous_sample, dst=self.difference)
+            cv2.threshold(self.difference, self.pixel_threshold, 255, cv2.THRESH_BINARY, dst=self.difference)
+            score = cv2.countNonZero(self.difference) / self.difference.size
+        self.sample, self.previous_sample = self.previous_sample, sample
+        return score
+
+    def reset(self):
+        """Forget the previous frame, e.g. after a gap in the capture. The next measured frame scores 0."""
+        self.previous_sample = None
+
+    def store(self, position: int, score: float, sequence_number: int):
+        """Store the score of the frame written in the given buffer slot."""
+        self.scores[position] = score
+        self.sequence_numbers[position] = sequence_number
+
+    def get(self, position: int, sequence_number: Optional[int]) -> Optional[float]:
+        """Return the score of a buffer slot, None if it wasn't measured on the frame with the given sequence number (the frame now in the slot)."""
+        if sequence_number is None or not 0 <= position < len(self.scores) or self.sequence_numbers[position] != sequence_number:
+            return None
+        return float(self.scores[position])
+
+    def slot_scores(self, buffer_sequence_numbers: np.ndarray) -> np.ndarray:
+        """Return the score of every slot, NaN for the slots whose frame wasn't measured.
+
+            Arguments:
+            -buffer_sequence_numbers (np.ndarray): Sequence number of the frame in every slot of the buffer.
+        """
+        return np.where(self.sequence_numbers == buffer_sequence_numbers, self.scores, np.nan)
+
+    def clear(self):
+        """Invalidate every score."""
+        self.sequence_numbers.fill(-1)
+        self.previous_sample = None
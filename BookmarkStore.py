@@ -0,0 +1,181 @@
+from PySide6.QtCore import QObject, Signal
+from typing import Optional
+import bisect
+import json
+import os
+import time
+from BufferSnapshot import BufferSnapshot
+
+class Bookmark:
+    """ An incident flagged by the operator: a time range of every camera.
+        Attributes:
+            -bookmark_id (int): Bookmark number, increasing in creation order.
+            -start_time, end_time (float): Monotonic capture times of the first and last frame of the range.
+            -label (str): Description of the incident.
+            -created_at (float): Wall clock time the bookmark was made.
+            -clips (list): Exported clip files of the cameras, added as the exports finish.
+            -snapshots (dict): BufferSnapshot pinning the frames of every camera index, empty once released and for bookmarks loaded from
+                an earlier session.
+    """
+    def __init__(self, bookmark_id: int, start_time: float, end_time: float, label: str = "", created_at: float = None,
+                 clips: list = None):
+        self.bookmark_id = bookmark_id
+        self.start_time = start_time
+        self.end_time = end_time
+        self.label = label
+        self.created_at = time.time() if created_at is None else created_at
+        self.clips = clips if clips is not None else []
+        self.snapshots = {}
+
+    def contains(self, timestamp: float) -> bool:
+        return self.start_time <= timestamp <= self.end_time
+
+    def pinned_bytes(self) -> int:
+        """Return the memory the pinned frames take once the buffer has overwritten them."""
+        return sum(snapshot.nbytes() for snapshot in self.snapshots.values())
+
+    def release(self):
+        """Unpin the frames, the bookmark is only kept on disk."""
+        for snapshot in self.snapshots.values():
+            snapshot.release()
+        self.snapshots = {}
+
+class BookmarkStore(QObject):
+    """ Index of the bookmarks, sorted by start time so the bookmark at, after or before a time is found by binary search.
+        Every bookmark pins its frames with a BufferSnapshot of each camera, so they can still be reviewed once the ring has moved past
+        them: the buffer copies a pinned frame out before overwriting it. Pinned frames are limited to `max_pinned_bytes`, the oldest
+        bookmarks are released first and are then only available as their exported clips.
+        The index is saved to path/bookmarks.json with wall clock times, which are converted to the monotonic capture clock on load.
+    """
+    bookmarks_changed = Signal()
+
+    def __init__(self, path: str = "bookmarks", max_pinned_bytes: int = 2 * 1024 ** 3, parent=None):
+        """Load the bookmarks saved in the given folder.
+
+            Arguments:
+            -path (str): Folder of the bookmark index.
+            -max_pinned_bytes (int): Memory the pinned frames of all bookmarks may take.
+        """
+        super().__init__(parent)
+        self.path = path
+        self.max_pinned_bytes = max_pinned_bytes
+        # Wall clock time minus monotonic time, to save capture times in a form that survives a restart
+        self.clock_offset = time.time() - time.monotonic()
+
+        self.bookmarks = []
+        self.start_times = []
+        self.next_id = 0
+        self.load()
+
+    def add(self, start_time: float, end_time: float, snapshots: dict[int, BufferSnapshot] = None, label: str = "") -> Bookmark:
+        """Bookmark a time range and pin the given snapshots of its frames, keyed by camera index."""
+        bookmark = Bookmark(self.next_id, start_time, end_time, label)
+        bookmark.snapshots = {index: snapshot for index, snapshot in (snapshots or {}).items() if snapshot is not None}
+        self.next_id += 1
+        index = bisect.bisect_right(self.start_times, start_time)
+        self.bookmarks.insert(index, bookmark)
+        self.start_times.insert(index, start_time)
+
+        self.limit_pinned_frames(keep=bookmark)
+        self.save()
+        self.bookmarks_changed.emit()
+        return bookmark
+
+    def remove(self, bookmark_id: int):
+        """Delete a bookmark and unpin its frames. Its exported clips are left on disk."""
+        bookmark = self.get(bookmark_id)
+        if bookmark is None:
+            return
+        bookmark.release()
+        index = self.bookmarks.index(bookmark)
+        del self.bookmarks[index]
+        del self.start_times[index]
+        self.save()
+        self.bookmarks_changed.emit()
+
+    def get(self, bookmark_id: int) -> Optional[Bookmark]:
+        return next((bookmark for bookmark in self.bookmarks if bookmark.bookmark_id == bookmark_id), None)
+
+    def add_clip(self, bookmark_id: int, filename: str):
+        """Record an exported clip of a bookmark."""
+        bookmark = self.get(bookmark_id)
+        if bookmark is not None:
+            bookmark.clips.append(filename)
+            self.save()
+
+    def find(self, timestamp: float) -> Optional[Bookmark]:
+        """Return the latest starting bookmark containing the given time, None if there isn't one."""
+        index = bisect.bisect_right(self.start_times, timestamp) - 1
+        return self.bookmarks[index] if index >= 0 and self.bookmarks[index].contains(timestamp) else None
+
+    def next_bookmark(self, timestamp: float) -> Optional[Bookmark]:
+        """Return the first bookmark starting after the given time."""
+        index = bisect.bisect_right(self.start_times, timestamp)
+        return self.bookmarks[index] if index < len(self.bookmarks) else None
+
+    def previous_bookmark(self, timestamp: float) -> Optional[Bookmark]:
+        """Return the last bookmark starting before the given time."""
+        index = bisect.bisect_left(self.start_times, timestamp) - 1
+        return self.bookmarks[index] if index >= 0 else None
+
+    def overlapping(self, start_time: float, end_time: float) -> list[Bookmark]:
+        """Return the bookmarks overlapping a time range, e.g. the buffered one."""
+        index = bisect.bisect_right(self.start_times, end_time)
+        return [bookmark for bookmark in self.bookmarks[:index] if bookmark.end_time >= start_time]
+
+    def limit_pinned_frames(self, keep: Bookmark = None):
+        """Release the oldest pinned bookmarks until the pinned frames fit in `max_pinned_bytes`."""
+        pinned = sorted((bookmark for bookmark in self.bookmarks if bookmark.snapshots), key=lambda bookmark: bookmark.bookmark_id)
+        pinned_bytes = sum(bookmark.pinned_bytes() for bookmark in pinned)
+        for bookmark in pinned:
+            if pinned_bytes <= self.max_pinned_bytes:
+                break
+            if bookmark is keep:
+                continue
+            pinned_bytes -= bookmark.pinned_bytes()
+            bookmark.release()
+
+    def save(self):
+        """Save the bookmarks index. The file is replaced atomically so a crash never leaves a partial index."""
+        index = {"next_id": self.next_id,
+                 "bookmarks": [{"id": bookmark.bookmark_id, "label": bookmark.label, "created_at": bookmark.created_at,
+                                "start_time": bookmark.start_time + self.clock_offset, "end_time": bookmark.end_time + self.clock_offset,
+                                "clips": bookmark.clips}
+                               for bookmark in self.bookmarks]}
+        index_path = os.path.join(self.path, "bookmarks.json")
+        try:
+            os.makedirs(self.path, exist_ok=True)
+            with open(index_path + ".tmp", "w") as index_file:
+                json.dump(index, index_file, indent=1)
+            os.replace(index_path + ".tmp", index_path)
+        except OSError as err:
+            print(f"Error writing bookmarks index {index_path}: {err}")
+
+    def load(self):
+        """Load the bookmarks index saved by an earlier session, if there is one."""
+        index_path = os.path.join(self.path, "bookmarks.json")
+        if not os.path.exists(index_path):
+            return
+        try:
+            with open(index_path) as index_file:
+                index = json.load(index_file)
+        except (OSError, ValueError) as err:
+            print(f"Error reading bookmarks index {index_path}: {err}")
+            return
+
+        for entry in index.get("bookmarks", []):
+            bookmark = Bookmark(entry["id"], entry["start_time"] - self.clock_offset, entry["end_time"] - self.clock_offset,
+                                entry.get("label", ""), entry.get("created_at"),
+                                entry.get("clips", []))
+            index_position = bisect.bisect_right(self.start_times, bookmark.start_time)
+            self.bookmarks.insert(index_position, bookmark)
+            self.start_times.insert(index_position, bookmark.start_time)
+        self.next_id = max([index.get("next_id", 0)] + [bookmark.bookmark_id + 1 for bookmark in self.bookmarks])
+
+    def close(self):
+        """Unpin the frames of every bookmark."""
+        for bookmark in self.bookmarks:
+            bookmark.release()
+
+    def __len__(self) -> int:
+        return len(self.bookmarks)
@@ -0,0 +1,75 @@
+from typing import Callable
+import threading
+import numpy as np
+
+class BufferSnapshot:
+    """ Pinned, chronologically ordered range of frames of a CircularBuffer. Frames are referenced without copying them; when the buffer
+        is about to overwrite a slot in place while the snapshot still pins it, that single frame is copied out first.
+        A snapshot pins its frames until it's released, use it as a context manager or call release when done. copy_frames copies
+        frames out under the snapshot lock; indexing returns the view itself, which only stays valid until the buffer overwrites its slot.
+        Attributes:
+            -first_sequence (int): Sequence number of the first frame.
+            -capture_times (np.ndarray): Capture time of every frame, in order.
+            -frames (list): The pinned frames (or encoded frames), in order.
+    """
+    def __init__(self, buffer, first_sequence: int, frames: list, capture_times: np.ndarray, decode: Callable = None):
+        self.buffer = buffer
+        self.first_sequence = first_sequence
+        self.frames = frames
+        self.capture_times = capture_times
+        self.decode = decode
+        self.lock = threading.Lock()
+        self.is_released = False
+
+    @property
+    def last_sequence(self) -> int:
+        """Sequence number of the last frame."""
+        return self.first_sequence + len(self.frames) - 1
+
+    def contains(self, sequence_number: int) -> bool:
+        """Check if the frame with the given sequence number is pinned by the snapshot."""
+        return not self.is_released and self.first_sequence <= sequence_number <= self.last_sequence
+
+    def detach(self, sequence_number: int):
+        """Replace the view of a frame with a copy, called by the buffer before it overwrites the frame slot."""
+        with self.lock:
+            index = sequence_number - self.first_sequence
+            if self.frames[index].base is not None:
+                self.frames[index] = np.array(self.frames[index])
+
+    def release(self):
+        """Unpin the frames, the buffer is free to overwrite them again."""
+        if not self.is_released:
+            self.buffer.release_snapshot(self)
+            self.is_released = True
+
+    def copy_frames(self, start: int, stop: int, out: np.ndarray):
+        """Copy the frames from index start to stop (excluded) into `out`, decoding them if needed."""
+        for index in range(start, stop):
+            with self.lock:
+                frame = self.frames[index]
+                np.copyto(out[index - start], frame if self.decode is None else self.decode(frame))
+
+    def __getitem__(self, index: int) -> np.ndarray:
+        """Return the frame at the given index. It's only protected from being overwritten while the snapshot is held."""
+        with self.lock:
+            frame = self.frames[index]
+            return frame if self.decode is None else self.decode(frame)
+
+    def nbytes(self) -> int:
+        """Return the memory the pinned frames take once the buffer has overwritten them. Encoded frames are counted encoded."""
+        with self.lock:
+            return sum(frame.nbytes if isinstance(frame, np.ndarray) else frame.result().nbytes for frame in self.frames)
+
+    def __len__(self) -> int:
+        return len(self.frames)
+
+    # No iteration: a view handed to a consumer isn't covered by detach once the buffer overwrites its slot. Read the frames with
+    # copy_frames for stable copies, or index them while the snapshot is held.
+    __iter__ = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
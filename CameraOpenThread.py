@@ -0,0 +1,30 @@
+from PySide6.QtCore import QThread, Signal
+from typing import Callable
+from FrameSource import open_frame_sources
+
+class CameraOpenThread(QThread):
+    ''' Opens the frame sources of every camera in parallel (see open_frame_sources) away from the GUI thread, which stays responsive
+        and shows the progress while the camera drivers negotiate their format.
+    '''
+    camera_opened = Signal(int, float)
+    sources_opened = Signal(list)
+    open_failed = Signal(str)
+
+    def __init__(self, open_source: Callable, count: int, parent=None):
+        '''
+            Arguments:
+            -open_source (Callable): Opens the source of a camera index, see open_frame_sources.
+            -count (int): Number of cameras.
+            -parent: Parent QObject.
+        '''
+        super().__init__(parent)
+        self.open_source = open_source
+        self.count = count
+
+    def run(self):
+        try:
+            sources = open_frame_sources(self.open_source, self.count, on_opened=self.camera_opened.emit)
+        except Exception as err:
+            self.open_failed.emit(f"{type(err).__name__}: {err}")
+            return
+        self.sources_opened.emit(sources)
@@ -0,0 +1,128 @@
+""" Camera capture running in its own process, writing the frames in a SharedMemoryCircularBuffer mapped by the GUI process.
+    The process is driven over a Pipe: it grabs and writes one frame per "tick" command, so the cameras stay synchronized by the GUI
+    timer while decoding runs in parallel outside the GUI process GIL. Only NumPy, OpenCV and the buffer modules are imported here.
+"""
+from multiprocessing.connection import Connection
+import multiprocessing
+import multiprocessing.resource_tracker
+import os
+import time
+from FrameSource import create_frame_source
+from SharedMemoryCircularBuffer import SharedMemoryCircularBuffer
+import PixelFormat
+
+def run_capture_process(connection: Connection, source: str, capture_index: int, pixel_format: str, source_options: dict):
+    """Entry point of the capture process. Protocol, GUI -> capture process:
+        ("attach", name, capacity, frame_shape, dtype): map the shared ring, answered with ("ready",)
+        ("tick", is_playback): grab a frame and, unless in playback, decode it in the head slot and commit it. Answered with
+            ("written", ret, capture_time, write_time)
+        ("stop",): release the source and exit
+    The process answers ("opened", width, height, fps) once the frame source is open, or ("error", message) when anything fails.
+    """
+    frame_source = None
+    buffer = None
+    try:
+        frame_source = create_frame_source(source, capture_index, **source_options)
+        if not frame_source.isOpened():
+            raise IOError(f"Couldn't open frame source '{source}' {capture_index}")
+        connection.send(("opened", frame_source.width, frame_source.height, frame_source.fps))
+
+        capture_frame_bgr = None
+        while True:
+            command = connection.recv()
+            if command[0] == "stop":
+                break
+
+            elif command[0] == "attach":
+                _, name, capacity, frame_shape, dtype = command
+                buffer = SharedMemoryCircularBuffer(capacity, frame_shape, name=name, dtype=dtype)
+                connection.send(("ready",))
+
+            elif command[0] == "tick":
+                is_playback = command[1]
+                ret = frame_source.grab()
+                capture_time = time.monotonic()
+                if ret and not is_playback:
+                    if pixel_format == PixelFormat.BGR:
+                        ret, _ = frame_source.retrieve(buffer.write_slot())
+                    else:
+                        ret, capture_frame_bgr = frame_source.retrieve(capture_frame_bgr)
+                        if ret:
+                            PixelFormat.from_bgr(capture_frame_bgr, pixel_format, dst=buffer.write_slot())
+                    if ret:
+                        buffer.commit_frame(timestamp=capture_time)
+                connection.send(("written", ret, capture_time, time.monotonic()))
+
+    except Exception as err:
+        connection.send(("error", f"{type(err).__name__}: {err}"))
+    finally:
+        if frame_source is not None:
+            frame_source.release()
+        if buffer is not None:
+            buffer.close()
+        connection.close()
+
+class CaptureProcess:
+    """ Handle of a capture process, seen by VideoCaptureThread as its frame source: it exposes the size, frame rate, isOpened and
+        release of the FrameSource opened in the process.
+    """
+    def __init__(self, source: str, capture_index: int, pixel_format: str = PixelFormat.BGR, **source_options):
+        """Start the capture process and wait for its frame source to open.
+
+            Arguments:
+            -source (str): "camera", "synthetic" or a video file path, see create_frame_source.
+            -capture_index (int): Index of the camera.
+            -pixel_format (str): Pixel format of the ring frames.
+            -source_options: Other arguments of create_frame_source, e.g. width, height or realtime.
+        """
+        # The process must share the resource tracker of the GUI process, which creates the ring: a tracker of its own would remove the
+        # ring it attached to when it exits
+        if os.name == "posix":
+            multiprocessing.resource_tracker.ensure_running()
+        self.connection, child_connection = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=run_capture_process, args=(child_connection, source, capture_index, pixel_format,
+                                                                                      source_options),
+                                               name=f"CaptureProcess{capture_index}", daemon=True)
+        self.process.start()
+        child_connection.close()
+        _, self.width, self.height, self.fps = self.request(None, "opened")
+        self.is_opened = True
+
+    def request(self, command: tuple, reply: str) -> tuple:
+        """Send a command to the capture process (None to only wait) and return its answer, raising an IOError if it failed."""
+        try:
+            if command is not None:
+                self.connection.send(command)
+            answer = self.connection.recv()
+        except (EOFError, OSError) as err:
+            raise IOError(f"Capture process {self.process.name} exited") from err
+        if answer[0] != reply:
+            raise IOError(f"Capture process {self.process.name} failed: {answer[1] if answer[0] == 'error' else answer}")
+        return answer
+
+    def attach(self, buffer: SharedMemoryCircularBuffer):
+        """Make the capture process write in the given shared ring."""
+        self.request(("attach", buffer.name, buffer.capacity, buffer.frame_shape, buffer.dtype.str), "ready")
+
+    def tick(self, is_playback: bool) -> tuple[bool, float, float]:
+        """Capture one frame, writing it in the ring unless in playback. Returns whether a frame was grabbed, its capture time and the
+            time it was committed in the ring, both on the monotonic clock shared by the processes.
+        """
+        _, ret, capture_time, write_time = self.request(("tick", is_playback), "written")
+        return ret, capture_time, write_time
+
+    def isOpened(self) -> bool:
+        return self.is_opened and self.process.is_alive()
+
+    def release(self):
+        """Stop the capture process."""
+        if self.is_opened:
+            self.is_opened = False
+            try:
+                self.connection.send(("stop",))
+            except (BrokenPipeError, OSError):
+                pass
+            self.process.join(timeout=5)
+            if self.process.is_alive():
+                self.process.terminate()
+            self.connection.close()
@@ -0,0 +1,465 @@
+from PySide6.QtCore import QObject, QTimer, QCoreApplication, Signal, Slot
+from typing import Optional
+import cv2
+import os
+import time
+
+from VideoCaptureThread import VideoCaptureThread
+from ProcessCaptureThread import ProcessCaptureThread
+from ExportScheduler import ExportScheduler
+from SegmentRecorderThread import SegmentRecorderThread
+from FrameSource import FrameSource, create_frame_source, open_frame_sources
+from CaptureProcess import CaptureProcess
+from PipelineStats import dump_stats
+from PlaybackEngine import PlaybackEngine
+from BookmarkStore import BookmarkStore, Bookmark
+from StartupReport import StartupReport
+
+class CaptureService(QObject):
+    ''' The capture, buffer, playback, bookmark and export engine without any widget. The VideoPlayer drives it from its window and the
+        headless service from the local API of ControlServer.
+        It needs a QCoreApplication event loop: the cameras are ticked by a QTimer and the export and recorder signals are delivered
+        on it, so every method must be called from the thread running the loop, see ControlServer.
+        Capture times are on the monotonic clock of the capture threads, status() also gives the wall clock time of the buffered range.
+    '''
+    # Export or clip id and its state, whenever it's queued, progresses, finishes or fails
+    export_updated = Signal(str, dict)
+    # Stats of every camera, after they are dumped to the metrics file
+    stats_updated = Signal(list)
+
+    def __init__(self, number_of_cameras: int = 2, buffer_size: int = 250, buffer_storage: str = "preallocated", pixel_format: str = "bgr",
+                 capture_backend: str = "thread", frame_source: str = "camera", encoding: str = "DIVX", output_path: str = "output",
+                 recording: bool = False, bookmark_path: str = "bookmarks", launch_time: float = None, buffer_path: str = "buffer",
+                 capture_mode: str = "grab", static_quality: int = None, startup_stage: str = "capture", parent=None):
+        '''Create the engine, the cameras are opened by start(), or by open_source and start_capture.
+
+            Arguments:
+            -number_of_cameras (int): Number of cameras captured.
+            -buffer_size (int): The CircularBuffer size in frames.
+            -buffer_storage (str): Buffer storage of the "thread" capture backend, see VideoCaptureThread.
+            -pixel_format (str): Pixel format of the buffered frames, "bgr" or "i420".
+            -capture_backend (str): "thread" captures in the service process, "process" in a capture process per camera.
+            -frame_source (str): "camera", "synthetic" or a video file path, see create_frame_source.
+            -encoding (str): FourCC of the exported clips.
+            -output_path (str): Folder of the exported clips and of the metrics file.
+            -recording (bool): Record every camera to segment files, clips are then cut from the recording.
+            -bookmark_path (str): Folder of the bookmark index.
+            -launch_time (float): Monotonic time the application was launched, the start of the first startup report. By default the
+                report starts when it's created.
+            -buffer_path (str): Folder of the ring files of the "memmap" buffer storage.
+            -capture_mode (str): "grab" or "read", see VideoCaptureThread.
+            -static_quality (int): JPEG quality of static frames with the "encoded" buffer storage, see VideoCaptureThread.
+            -startup_stage (str): First frame the startup report waits for, "capture" or "display" with a window, see StartupReport.
+        '''
+        super().__init__(parent)
+        self.number_of_cameras = number_of_cameras
+        self.buffer_size = buffer_size
+        self.buffer_storage = buffer_storage
+        self.pixel_format = pixel_format
+        self.capture_backend = capture_backend
+        self.frame_source = frame_source
+        self.encoding = encoding
+        self.output_path = output_path
+        self.buffer_path = buffer_path
+        self.capture_mode = capture_mode
+        self.static_quality = static_quality
+        self.startup_stage = startup_stage
+        self.recording = recording
+        self.recording_path = os.path.join(output_path, "recording")
+        self.segment_seconds = 2.0
+        self.retention_seconds = 600.0
+        self.bookmark_seconds = 10.0
+        self.export_priority = 0
+        self.clip_index = 0
+        self.capture_threads = []
+        self.recorder_threads = []
+        # Export job or recorded clip ids, mapped to their bookmark, and the last outcome of every export
+        self.bookmark_exports = {}
+        self.exports = {}
+        # Capture times of the first camera of the last exported ranges, shown on the timeline while they're buffered
+        self.exported_times = []
+        self.max_exported_ranges = 20
+        self.launch_time = launch_time
+        self.startup_report = StartupReport(launch_time)
+        try:
+            os.makedirs(self.output_path, exist_ok=True)
+        except OSError as err:
+            print(f"Error creating folder {self.output_path} : {err}")
+
+        self.export_scheduler = ExportScheduler(parent=self)
+        self.export_scheduler.job_progress.connect(self.export_progress)
+        self.export_scheduler.job_finished.connect(self.export_finished)
+        self.export_scheduler.job_failed.connect(self.export_failed)
+        self.playback_engine = PlaybackEngine(parent=self)
+        self.bookmarks = BookmarkStore(bookmark_path, parent=self)
+
+        # Timer used to sync capture threads
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.update_threads)
+
+        # Timer used to dump the metrics file
+        self.stats_interval = 1000
+        self.stats_timer = QTimer(self)
+        self.stats_timer.timeout.connect(self.update_stats)
+
+    @property
+    def is_running(self) -> bool:
+        return bool(self.capture_threads)
+
+    def check_running(self):
+        if not self.is_running:
+            raise RuntimeError("The capture is not running")
+
+    def start(self) -> dict:
+        '''Open the cameras, all at once, and start capturing. Returns the status.'''
+        self.request_start()
+        frame_sources = open_frame_sources(self.open_source, self.number_of_cameras, on_opened=self.startup_report.camera_opened)
+        self.start_capture(frame_sources)
+        return self.status()
+
+    def request_start(self):
+        '''Check the capture is stopped and time the start, before the cameras are opened.'''
+        if self.is_running:
+            raise RuntimeError("The capture is already running")
+        # Only the first start counts from the launch, a restart is timed from here
+        if self.launch_time is None:
+            self.startup_report = StartupReport()
+        self.launch_time = None
+        self.startup_report.mark("start_requested")
+
+    def open_source(self, capture_index: int) -> FrameSource:
+        '''Open the frame source of a camera, its capture process with the "process" backend. Used with open_frame_sources.'''
+        if self.capture_backend == "process":
+            return CaptureProcess(self.frame_source, capture_index, self.pixel_format)
+        return create_frame_source(self.frame_source, capture_index)
+
+    def start_capture(self, frame_sources: list):
+        '''Create the capture threads of the opened cameras and start them, see create_threads and start_threads.'''
+        self.create_threads(frame_sources)
+        self.start_threads()
+
+    def create_threads(self, frame_sources: list):
+        '''Create the capture and recorder threads of the opened cameras without starting them, so their frames can be connected first.
+            The sources are released if a thread can't be created.
+
+            Arguments:
+            -frame_sources (list): Opened FrameSource (CaptureProcess with the "process" backend) of every camera.
+        '''
+        self.startup_report.mark("cameras_opened")
+        try:
+            for thread_index in range(self.number_of_cameras):
+                if self.capture_backend == "process":
+                    c_thread = ProcessCaptureThread(buffer_size=self.buffer_size, capture_index=thread_index, source=self.frame_source,
+                                                    pixel_format=self.pixel_format, frame_source=frame_sources[thread_index], parent=self)
+                else:
+                    c_thread = VideoCaptureThread(buffer_size=self.buffer_size, capture_index=thread_index, buffer_storage=self.buffer_storage,
+                                                  buffer_path=self.buffer_path, pixel_format=self.pixel_format, capture_mode=self.capture_mode,
+                                                  frame_source=frame_sources[thread_index], static_quality=self.static_quality, parent=self)
+                if self.recording:
+                    rec_thread = SegmentRecorderThread(capture_index=thread_index, width=c_thread.width, height=c_thread.height, fps=c_thread.fps,
+                                                       pixel_format=self.pixel_format, path=self.recording_path,
+                                                       segment_seconds=self.segment_seconds, retention_seconds=self.retention_seconds,
+                                                       queue_size=min(25, self.buffer_size // 2), parent=self)
+                    rec_thread.clip_finished.connect(self.clip_finished)
+                    rec_thread.clip_failed.connect(self.clip_failed)
+                    c_thread.attach_recorder(rec_thread)
+                    self.recorder_threads.append(rec_thread)
+                self.capture_threads.append(c_thread)
+        except Exception:
+            # A camera that failed to start leaves the service stopped
+            for frame_source in frame_sources[len(self.capture_threads):]:
+                frame_source.release()
+            for rec_thread in self.recorder_threads:
+                rec_thread.stop()
+            for c_thread in self.capture_threads:
+                c_thread.stop()
+            self.capture_threads = []
+            self.recorder_threads = []
+            raise
+
+    def start_threads(self):
+        '''Start the threads made by create_threads and the timers ticking them.'''
+        self.playback_engine.capture_threads = self.capture_threads
+        for rec_thread in self.recorder_threads:
+            rec_thread.start()
+        for c_thread in self.capture_threads:
+            c_thread.start()
+        self.timer.start(self.capture_threads[0].frame_interval)
+        self.stats_timer.start(self.stats_interval)
+        self.startup_report.mark("capture_started")
+
+    def stop(self) -> dict:
+        '''Stop the cameras and the recording, queued exports keep running. Returns the status.'''
+        self.check_running()
+        self.timer.stop()
+        self.stats_timer.stop()
+        self.playback_engine.stop()
+        self.playback_engine.capture_threads = []
+        for rec_thread in self.recorder_threads:
+            rec_thread.stop()
+        for c_thread in self.capture_threads:
+            c_thread.stop()
+        self.capture_threads = []
+        self.recorder_threads = []
+        return self.status()
+
+    @Slot()
+    def update_threads(self):
+        self.playback_engine.update()
+        for thread in self.capture_threads:
+            thread.synchronize_threads()
+
+    @Slot()
+    def update_stats(self):
+        '''Dump the pipeline metrics of every camera to the metrics file, and the startup report once every camera got its first frame'''
+        stats = [thread.stats for thread in self.capture_threads]
+        if self.startup_report.update(stats, stage=self.startup_stage):
+            print(self.startup_report.summary())
+            try:
+                self.startup_report.save(os.path.join(self.output_path, "startup.jsonl"))
+            except OSError as err:
+                print(f"Error writing startup report: {err}")
+        try:
+            dump_stats(stats, os.path.join(self.output_path, "metrics.json"))
+        except OSError as err:
+            print(f"Error writing metrics file: {err}")
+        self.stats_updated.emit(stats)
+
+    def playback(self, rate: float = None) -> dict:
+        '''Stop writing the buffers and play them from their oldest frame, at the given rate or the current one. Returns the status.'''
+        self.check_running()
+        for thread in self.capture_threads:
+            thread.set_review_snapshot(None)
+            thread.set_buffer_playback(True)
+        self.playback_engine.start(None if rate is None else float(rate))
+        return self.status()
+
+    def realtime(self) -> dict:
+        '''Stop the playback and go back to writing and showing the live frames. Returns the status.'''
+        self.check_running()
+        self.playback_engine.stop()
+        for thread in self.capture_threads:
+            thread.set_buffer_playback(False)
+        return self.status()
+
+    def seek(self, timestamp: float = None, seconds_ago: float = None) -> dict:
+        '''Play from the given capture time, starting the playback if needed. Returns the status.
+
+            Arguments:
+            -timestamp (float): Monotonic capture time.
+            -seconds_ago (float): Time before the newest buffered frame of the first camera, instead of `timestamp`.
+        '''
+        self.check_running()
+        if seconds_ago is not None:
+            time_range = self.capture_threads[0].get_time_range()
+            if time_range is None:
+                raise RuntimeError("The buffer is empty")
+            timestamp = time_range[1] - float(seconds_ago)
+        if timestamp is None:
+            raise ValueError("Seek needs a timestamp or seconds_ago")
+        if not self.playback_engine.is_active:
+            self.playback()
+        self.playback_engine.seek(float(timestamp))
+        return self.status()
+
+    def pause(self) -> dict:
+        self.check_running()
+        self.playback_engine.pause()
+        return self.status()
+
+    def resume(self) -> dict:
+        self.check_running()
+        self.playback_engine.resume()
+        return self.status()
+
+    def set_rate(self, rate: float) -> dict:
+        self.check_running()
+        self.playback_engine.set_rate(float(rate))
+        return self.status()
+
+    def step(self, frames: int = 1) -> dict:
+        '''Pause the playback and step the given number of frames. Returns the status.'''
+        self.check_running()
+        if not self.playback_engine.is_active:
+            self.playback()
+        self.playback_engine.step(int(frames))
+        return self.status()
+
+    def current_time(self) -> Optional[float]:
+        '''Return the playback media time, or the capture time of the newest frame of the first camera. None if nothing is buffered.'''
+        if self.playback_engine.is_active:
+            return self.playback_engine.media_time()
+        time_range = self.capture_threads[0].get_time_range() if self.capture_threads else None
+        return None if time_range is None else time_range[1]
+
+    def add_bookmark(self, label: str = "", seconds: float = None) -> dict:
+        '''Bookmark the last `seconds` of every camera, or that long around the playback time, see create_bookmark. Returns the bookmark.'''
+        self.check_running()
+        bookmark = self.create_bookmark(label, None if seconds is None else float(seconds))
+        if bookmark is None:
+            raise RuntimeError("The buffer is empty")
+        return self.bookmark_status(bookmark)
+
+    def create_bookmark(self, label: str = "", seconds: float = None) -> Optional[Bookmark]:
+        '''Flag an incident: bookmark the last `seconds` (by default `bookmark_seconds`) of every camera, or that long around the playback
+            time. The frames are pinned in the buffers so they can be reviewed after the ring overwrites them, and exported so the bookmark
+            survives a restart. Returns None if nothing is buffered.
+        '''
+        current_time = self.current_time()
+        if current_time is None:
+            return None
+        seconds = self.bookmark_seconds if seconds is None else seconds
+        if self.playback_engine.is_active:
+            start_time, end_time = current_time - seconds / 2, current_time + seconds / 2
+        else:
+            start_time, end_time = current_time - seconds, current_time
+        time_range = self.capture_threads[0].get_time_range()
+        start_time, end_time = max(start_time, time_range[0]), min(end_time, time_range[1])
+
+        snapshots = {index: thread.export_range(start_time, end_time, "time") for index, thread in enumerate(self.capture_threads)}
+        bookmark = self.bookmarks.add(start_time, end_time, snapshots, label)
+        for export_id in self.export_clip(start_time, end_time, "time")["exports"]:
+            self.bookmark_exports[export_id] = bookmark.bookmark_id
+        return bookmark
+
+    def remove_bookmark(self, bookmark_id: int) -> dict:
+        if self.bookmarks.get(int(bookmark_id)) is None:
+            raise KeyError(f"No bookmark {bookmark_id}")
+        self.bookmarks.remove(int(bookmark_id))
+        return {"bookmarks": len(self.bookmarks)}
+
+    def list_bookmarks(self) -> dict:
+        return {"bookmarks": [self.bookmark_status(bookmark) for bookmark in self.bookmarks.bookmarks]}
+
+    def bookmark_status(self, bookmark) -> dict:
+        return {"id": bookmark.bookmark_id, "label": bookmark.label, "start_time": bookmark.start_time, "end_time": bookmark.end_time,
+                "created_at": bookmark.created_at, "clips": list(bookmark.clips), "pinned": bool(bookmark.snapshots)}
+
+    def export_clip(self, start: float = None, end: float = None, unit: str = "sequence", seconds: float = None, priority: int = None) -> dict:
+        '''Queue the export of a range of every camera to a clip, in chronological order. The frames are pinned in the buffer until the
+            ExportScheduler has handed them to its encoder processes, so the capture doesn't need to stop. When recording, the clips are cut
+            from the recorded segments instead, without re-encoding, and time ranges can reach back past the buffer up to the recording
+            retention. Returns the export ids, "export-<job id>" or "clip-<clip id>".
+
+            Arguments:
+            -start, end: First and last frame of the range, None for the whole buffer.
+            -unit (str): "slot", "sequence" or "time", see VideoCaptureThread.export_range.
+            -seconds (float): Export the last `seconds` of the buffer instead of a range.
+            -priority (int): Export priority, lower values are encoded first. By default `export_priority`.
+        '''
+        self.check_running()
+        if seconds is not None:
+            time_range = self.capture_threads[0].get_time_range()
+            if time_range is None:
+                raise RuntimeError("The buffer is empty")
+            start, end, unit = time_range[1] - float(seconds), time_range[1], "time"
+        # Query string arguments arrive as text
+        number = float if unit == "time" else int
+        start = None if start is None else number(start)
+        end = None if end is None else number(end)
+
+        export_ids = []
+        for index, thread in enumerate(self.capture_threads):
+            filename = os.path.join(self.output_path, f"capture_{index}_clip_{self.clip_index}.avi")
+            if self.recorder_threads:
+                time_range = (start, end) if unit == "time" else thread.resolve_time_range(start, end, unit)
+                if time_range is None:
+                    continue
+                export_id = f"clip-{self.recorder_threads[index].request_clip(*time_range, filename)}"
+                if index == 0 and None not in time_range:
+                    self.record_exported_range(*time_range)
+            else:
+                snapshot = thread.export_range(start, end, unit)
+                if snapshot is None:
+                    continue
+                job_id = self.export_scheduler.submit(snapshot=snapshot,
+                                                      filename=filename,
+                                                      fourcc=cv2.VideoWriter_fourcc(*self.encoding),
+                                                      fps=thread.fps,
+                                                      width=int(thread.width),
+                                                      height=int(thread.height),
+                                                      pixel_format=thread.pixel_format,
+                                                      priority=self.export_priority if priority is None else int(priority),
+                                                      stats=thread.stats)
+                export_id = f"export-{job_id}"
+                if index == 0:
+                    self.record_exported_range(snapshot.capture_times[0], snapshot.capture_times[-1])
+            self.clip_index += 1
+            self.exports[export_id] = {"state": "queued", "filename": filename, "progress": 0.0}
+            export_ids.append(export_id)
+            self.export_updated.emit(export_id, self.exports[export_id])
+        return {"exports": export_ids}
+
+    def record_exported_range(self, start_time: float, end_time: float):
+        '''Keep the capture time range of an export of the first camera, see exported_times.'''
+        self.exported_times.append((float(start_time), float(end_time)))
+        del self.exported_times[:-self.max_exported_ranges]
+
+    @Slot(int, float)
+    def export_progress(self, job_id: int, progress: float):
+        export = self.exports.get(f"export-{job_id}")
+        if export is not None:
+            export["progress"] = progress
+            self.export_updated.emit(f"export-{job_id}", export)
+
+    @Slot(int, str)
+    def export_finished(self, job_id: int, filename: str):
+        self.record_export_finished(f"export-{job_id}", filename)
+
+    @Slot(int, str)
+    def export_failed(self, job_id: int, message: str):
+        self.record_export_failed(f"export-{job_id}", message)
+
+    @Slot(int, str)
+    def clip_finished(self, clip_id: int, filename: str):
+        self.record_export_finished(f"clip-{clip_id}", filename)
+
+    @Slot(int, str)
+    def clip_failed(self, clip_id: int, message: str):
+        self.record_export_failed(f"clip-{clip_id}", message)
+
+    def record_export_finished(self, export_id: str, filename: str):
+        self.exports[export_id] = {"state": "finished", "filename": filename, "progress": 1.0}
+        if export_id in self.bookmark_exports:
+            self.bookmarks.add_clip(self.bookmark_exports.pop(export_id), filename)
+        self.export_updated.emit(export_id, self.exports[export_id])
+
+    def record_export_failed(self, export_id: str, message: str):
+        print(f"Export {export_id} failed: {message}")
+        self.exports[export_id] = {"state": "failed", "error": message, "filename": self.exports.get(export_id, {}).get("filename"),
+                                   "progress": self.exports.get(export_id, {}).get("progress", 0.0)}
+        self.bookmark_exports.pop(export_id, None)
+        self.export_updated.emit(export_id, self.exports[export_id])
+
+    def status(self) -> dict:
+        '''Return the state of the capture, the playback and the exports.'''
+        clock_offset = time.time() - time.monotonic()
+        cameras = []
+        for index, thread in enumerate(self.capture_threads):
+            time_range = thread.get_time_range()
+            cameras.append({"index": index, "width": int(thread.width), "height": int(thread.height), "fps": thread.fps,
+                            "frames": len(thread.buffer), "capacity": thread.buffer.capacity,
+                            "time_range": time_range,
+                            "wall_time_range": None if time_range is None else [t + clock_offset for t in time_range]})
+        return {"running": self.is_running, "time": time.monotonic(),
+                "playback": {"active": self.playback_engine.is_active, "playing": self.playback_engine.is_playing,
+                             "rate": self.playback_engine.rate,
+                             "media_time": self.playback_engine.media_time() if self.playback_engine.is_active else None},
+                "cameras": cameras, "bookmarks": len(self.bookmarks),
+                "exports": {"pending": self.export_scheduler.pending_jobs(),
+                            "recent": dict(list(self.exports.items())[-20:])}}
+
+    def metrics(self) -> dict:
+        '''Return the pipeline metrics of every camera.'''
+        return {"time": time.time(), "cameras": [thread.stats.snapshot() for thread in self.capture_threads],
+                "startup": self.startup_report.snapshot()}
+
+    def close(self):
+        '''Let the queued exports finish, stop the cameras and unpin the bookmarks.'''
+        # The exports copy their frames out of the buffers, which the "process" backend unmaps when its cameras stop
+        self.export_scheduler.shutdown(wait=True)
+        # Deliver the finished export signals, bookmarks record their clips
+        QCoreApplication.processEvents()
+        if self.is_running:
+            self.stop()
+        self.bookmarks.close()
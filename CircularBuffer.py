@@ -1,7 +1,10 @@
 from collections import deque
-from typing import Optional, Any
+from typing import Optional, Any, Callable
 import logging
+import threading
+import time
 import numpy as np
+from BufferSnapshot import BufferSnapshot
 
 # Configure logging
 logging.basicConfig(level=logging.WARNING)
@@ -11,25 +14,98 @@ class CircularBuffer:
         Attributes:
             -capacity (int): The maximum capacity of the buffer.
             -buffer (deque): The deque data structure used for storing frames.
+            -size (int): The number of frames currently stored.
             -head (int): The index representing the current write position.
             -tail (int): The index representing the current read position.
+            -timestamps (np.ndarray): Monotonic capture time in seconds of the frame in each slot.
+            -sequence_numbers (np.ndarray): Global sequence number of the frame in each slot, -1 for empty slots.
+            -next_sequence (int): Sequence number given to the next written frame.
+            -snapshots (list): Snapshots pinning frames that would be overwritten in place.
     """
+    # Storages that write new frames into the memory of the old ones set this, so pinned snapshot frames are copied out before a write
+    overwrites_in_place = False
+    # Storages with a fixed layout, e.g. a ring file or a shared segment mapped by another process, clear this
+    is_resizable = True
+
     def __init__(self, capacity: int):
         """Initialize the circular buffer with the given capacity."""
         if not isinstance(capacity, int) or capacity <= 0:
             raise ValueError("Capacity must be a positive integer.")
         
         self.capacity = capacity
-        self.buffer = deque(maxlen=capacity)
+        self.buffer = self._allocate_frames(capacity)
+        self.size = 0
         self.head = 0
         self.tail = 0
+        self.timestamps = np.zeros(capacity, dtype=np.float64)
+        self.sequence_numbers = np.full(capacity, -1, dtype=np.int64)
+        self.next_sequence = 0
+        self.snapshots = []
+        # Reentrant so subclasses can pin a snapshot atomically with their own checks
+        self.snapshots_lock = threading.RLock()
+
+    def _allocate_frames(self, capacity: int) -> Any:
+        """Create the frame storage. Subclasses override this and the other frame hooks to change how frames are stored."""
+        return deque(maxlen=capacity)
 
-    def write_frame(self, frame: np.ndarray):
-        """Write a frame to the buffer at head position and step forward. If the buffer is full the oldest frame is replaced"""
-        if len(self.buffer) < self.capacity:
+    def _store_frame(self, position: int, frame: np.ndarray):
+        """Store a frame in the given slot."""
+        if position == len(self.buffer):
             self.buffer.append(frame)
         else:
-            self.buffer[self.head] = frame
+            self.buffer[position] = frame
+
+    def _load_frame(self, position: int) -> np.ndarray:
+        """Return the frame stored in the given slot."""
+        return self.buffer[position]
+
+    def _clear_frames(self):
+        """Remove every stored frame."""
+        self.buffer.clear()
+
+    def _resize_frames(self, new_capacity: int, positions: np.ndarray):
+        """Resize the frame storage keeping the frames of the given slots, oldest first, in slots 0 to len(positions) - 1."""
+        self.buffer = deque((self.buffer[position] for position in positions), maxlen=new_capacity)
+
+    def _frames(self) -> Any:
+        """Return the stored frames in slot order."""
+        return self.buffer.copy()
+
+    def _pin_frame(self, position: int) -> Any:
+        """Return the frame in the given slot as it's referenced by a snapshot."""
+        return self._load_frame(position)
+
+    def _pinned_decoder(self) -> Optional[Callable]:
+        """Return the function snapshots apply to pinned frames when they are read, None if they are frames already."""
+        return None
+
+    def _release_slot(self, position: int):
+        """Copy the frame in the given slot out of the snapshots pinning it, before the slot is overwritten in place."""
+        if not self.snapshots:
+            return
+        with self.snapshots_lock:
+            sequence_number = int(self.sequence_numbers[position])
+            for snapshot in self.snapshots:
+                if snapshot.contains(sequence_number):
+                    snapshot.detach(sequence_number)
+
+    def write_frame(self, frame: np.ndarray, timestamp: Optional[float] = None):
+        """Write a frame to the buffer at head position and step forward. If the buffer is full the oldest frame is replaced
+
+            Arguments:
+            -timestamp(float): Monotonic capture time of the frame in seconds, the current time.monotonic() if None
+        """
+        self._release_slot(self.head)
+        self._store_frame(self.head, frame)
+        self._advance_head(timestamp)
+
+    def _advance_head(self, timestamp: Optional[float] = None):
+        """Record the capture time and sequence number of the frame stored at head position and step the head forward."""
+        self.timestamps[self.head] = time.monotonic() if timestamp is None else timestamp
+        self.sequence_numbers[self.head] = self.next_sequence
+        self.next_sequence += 1
+        if self.size < self.capacity:
+            self.size += 1
         self.head = (self.head + 1) % self.capacity
          
     def read_frame(self, playback:bool = False) -> Optional[np.ndarray]:
@@ -39,10 +115,8 @@ class CircularBuffer:
             -playback(bool): Flag used when it is necessary to read the buffer without writing on it
         """
         if not self.is_empty():
-            try:
-                frame = self.buffer[self.tail]
-            except:
-                frame = self.buffer[-1]
+            position = self.tail if self.tail < self.size else self.size - 1
+            frame = self._load_frame(position)
             if playback:
                 upper_limit = self.capacity if self.is_full() else self.head
                 self.tail = (self.tail + 1) % upper_limit
@@ -58,10 +132,10 @@ class CircularBuffer:
         if not self.is_empty():
         
             if 0 <= position < upper_position:
-                return self.buffer[position]
+                return self._load_frame(position)
             else:
                 logging.warning("Invalid peek position. Frame at head position is returned instead")        
-                return self.buffer[-1]
+                return self._load_frame(self.size - 1)
         else:
             return None
 
@@ -81,25 +155,163 @@ class CircularBuffer:
             
     def clear(self):
         """Clear the buffer, removing all elements."""
-        self.buffer.clear()
+        self._clear_frames()
+        self.size = 0
         self.head = 0
         self.tail = 0
+        self.timestamps.fill(0)
+        self.sequence_numbers.fill(-1)
     
     def resize(self, new_capacity: int):
         """Resize the buffer to a new capacity."""
         if not isinstance(new_capacity, int) or new_capacity <= 0:
             raise ValueError("New capacity must be a positive integer.")
+        if not self.is_resizable:
+            raise RuntimeError(f"{type(self).__name__} has a fixed capacity, create a new buffer with the capacity needed instead.")
         
-        self.buffer = deque(self.buffer, maxlen=new_capacity)
+        # The newest frames are kept and laid out from slot 0 in chronological order, as if they had been written to the new buffer
+        kept = min(self.size, new_capacity)
+        positions = (self.oldest_position() + np.arange(self.size - kept, self.size)) % self.capacity
+        self._resize_frames(new_capacity, positions)
+        timestamps = np.zeros(new_capacity, dtype=np.float64)
+        sequence_numbers = np.full(new_capacity, -1, dtype=np.int64)
+        timestamps[:kept] = self.timestamps[positions]
+        sequence_numbers[:kept] = self.sequence_numbers[positions]
+        self.timestamps = timestamps
+        self.sequence_numbers = sequence_numbers
+        self.size = kept
+        self.head = kept % new_capacity
         self.capacity = new_capacity
 
+    def oldest_position(self) -> int:
+        """Get the slot of the oldest frame in the buffer."""
+        return self.head if self.is_full() else 0
+
+    def position_timestamp(self, position: int) -> Optional[float]:
+        """Get the capture time of the frame in the given slot. Returns None if the slot is empty or out of range"""
+        if 0 <= position < self.size:
+            return float(self.timestamps[position])
+        return None
+
+    def position_sequence(self, position: int) -> Optional[int]:
+        """Get the sequence number of the frame in the given slot. Returns None if the slot is empty or out of range"""
+        if 0 <= position < self.size:
+            return int(self.sequence_numbers[position])
+        return None
+
+    def find_time_position(self, timestamp: float) -> Optional[int]:
+        """Get the slot of the last frame captured at or before the given time, by binary search over the slots in chronological order.
+            The oldest slot is returned for earlier times. Returns None if the buffer is empty
+
+            Arguments:
+            -timestamp(float): Monotonic time in seconds, on the same clock used to write the frames
+        """
+        if self.is_empty():
+            return None
+
+        oldest = self.oldest_position()
+        low, high = 0, self.size
+        while low < high:
+            middle = (low + high) // 2
+            if self.timestamps[(oldest + middle) % self.capacity] <= timestamp:
+                low = middle + 1
+            else:
+                high = middle
+        return (oldest + max(low - 1, 0)) % self.capacity
+
+    def find_sequence_position(self, sequence_number: int) -> Optional[int]:
+        """Get the slot of the frame with the given sequence number. Returns None if the frame isn't in the buffer anymore"""
+        if self.is_empty():
+            return None
+
+        oldest = self.oldest_position()
+        offset = sequence_number - int(self.sequence_numbers[oldest])
+        if not 0 <= offset < self.size:
+            return None
+        position = (oldest + offset) % self.capacity
+        return position if self.sequence_numbers[position] == sequence_number else None
+
+    def newest_position(self) -> int:
+        """Get the slot of the newest frame in the buffer."""
+        return (self.head - 1) % self.capacity
+
+    def resolve_range(self, start: Optional[float] = None, end: Optional[float] = None, unit: str = "sequence") -> Optional[tuple[int, int]]:
+        """Convert an in/out range to the sequence numbers of its first and last frame, clipped to the frames in the buffer.
+            Returns None if the buffer is empty or the range doesn't overlap it
+
+            Arguments:
+            -start, end: First and last frame of the range, both included. None stands for the oldest and the newest frame
+            -unit(str): "slot" for buffer positions (the range wraps around when end comes before start), "sequence" for frame sequence
+                numbers or "time" for monotonic capture times
+        """
+        if self.is_empty():
+            return None
+
+        if unit == "slot":
+            if start is not None and not 0 <= start < self.size or end is not None and not 0 <= end < self.size:
+                return None
+            start = None if start is None else int(self.sequence_numbers[start])
+            end = None if end is None else int(self.sequence_numbers[end])
+        elif unit == "time":
+            start = None if start is None else self.sequence_numbers[self.find_time_position(start)]
+            end = None if end is None else self.sequence_numbers[self.find_time_position(end)]
+        elif unit != "sequence":
+            raise ValueError(f"Unknown range unit '{unit}'")
+
+        oldest_sequence = int(self.sequence_numbers[self.oldest_position()])
+        newest_sequence = int(self.sequence_numbers[self.newest_position()])
+        first_sequence = oldest_sequence if start is None else max(int(start), oldest_sequence)
+        last_sequence = newest_sequence if end is None else min(int(end), newest_sequence)
+        if first_sequence > last_sequence:
+            return None
+        return first_sequence, last_sequence
+
+    def snapshot(self, first_sequence: int, last_sequence: int) -> Optional[BufferSnapshot]:
+        """Pin the frames between two sequence numbers (both included) and return them in chronological order without copying them.
+            The frames are protected from being overwritten until the snapshot is released. Returns None if the range isn't in the buffer
+
+            Arguments:
+            -first_sequence(int), last_sequence(int): Range of sequence numbers, as returned by resolve_range
+        """
+        if self.is_empty():
+            return None
+
+        oldest = self.oldest_position()
+        oldest_sequence = int(self.sequence_numbers[oldest])
+        first_sequence = max(first_sequence, oldest_sequence)
+        last_sequence = min(last_sequence, int(self.sequence_numbers[self.newest_position()]))
+        if first_sequence > last_sequence:
+            return None
+
+        positions = (oldest + np.arange(first_sequence - oldest_sequence, last_sequence - oldest_sequence + 1)) % self.capacity
+        with self.snapshots_lock:
+            frames = [self._pin_frame(int(position)) for position in positions]
+            snapshot = BufferSnapshot(self, first_sequence, frames, self.timestamps[positions], self._pinned_decoder())
+            if self.overwrites_in_place:
+                self.snapshots.append(snapshot)
+        return snapshot
+
+    def release_snapshot(self, snapshot: BufferSnapshot):
+        """Unpin the frames of a snapshot. Called by BufferSnapshot.release"""
+        with self.snapshots_lock:
+            if snapshot in self.snapshots:
+                self.snapshots.remove(snapshot)
+
+    def flush(self):
+        """Persist the buffer content. Nothing to do for buffers that live in RAM."""
+        pass
+
+    def close(self):
+        """Release the resources the buffer holds besides its frames, e.g. worker threads. The buffer can't be written afterwards."""
+        pass
+
     def is_empty(self) -> bool:
         """Check if the buffer is empty."""
-        return not self.buffer
+        return self.size == 0
 
     def is_full(self) -> bool:
         """Check if the buffer is full."""
-        return len(self.buffer) == self.capacity
+        return self.size == self.capacity
 
     def tail_position(self) -> int:
         """Get the current read position within the buffer."""
@@ -109,14 +321,14 @@ class CircularBuffer:
         """Get the current write position within the buffer."""
         return self.head
 
-    def get_buffer(self) -> deque:
-        """Returns the buffer as a deque object. Returns None if the buffer is empty"""
+    def get_buffer(self) -> Optional[Any]:
+        """Returns the buffer content in slot order (a deque copy for this class). Returns None if the buffer is empty"""
         if not self.is_empty():
-            buffer = self.buffer.copy()
+            buffer = self._frames()
             return buffer
         else:
             return None
 
     def __len__(self) -> int:
         """Return the current size of the buffer."""
-        return len(self.buffer)
+        return self.size
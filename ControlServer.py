@@ -0,0 +1,214 @@
+from PySide6.QtCore import QObject, Signal, Slot, Qt, QTimer
+from typing import Callable, Optional
+from urllib.parse import urlsplit, parse_qsl
+import asyncio
+import json
+import os
+import threading
+
+class ServiceBridge(QObject):
+    ''' Runs calls coming from the asyncio thread on the thread of the CaptureService, through a queued signal, and hands the result back
+        to the awaiting coroutine.
+    '''
+    call_requested = Signal(object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.call_requested.connect(self.run_call, Qt.QueuedConnection)
+
+    @Slot(object)
+    def run_call(self, call: tuple):
+        function, arguments, loop, future = call
+        try:
+            result, error = function(**arguments), None
+        except Exception as err:
+            result, error = None, err
+        loop.call_soon_threadsafe(self.resolve, future, result, error)
+
+    @staticmethod
+    def resolve(future: asyncio.Future, result, error: Optional[Exception]):
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+class ControlServer:
+    ''' Local HTTP/1.1 JSON API of a CaptureService, served by an asyncio loop in its own thread so any number of operator consoles can
+        be connected at once. Each request only waits for its own call to run on the service thread, the capture threads never wait
+        for a request. Listens on a localhost port, or on a Unix socket when `socket_path` is given, e.g.:
+
+            curl -X POST localhost:8765/start
+            curl -X POST localhost:8765/seek -d '{"seconds_ago": 5}'
+            curl --unix-socket /tmp/var.sock localhost/status
+
+        Routes, POST bodies and GET query parameters are passed as keyword arguments of the CaptureService method:
+            GET /status, GET /metrics, GET /bookmarks
+            POST /start, /stop, /playback {rate}, /realtime, /seek {timestamp | seconds_ago}, /pause, /resume, /rate {rate},
+                /step {frames}, /bookmarks {label, seconds}, /bookmarks/remove {bookmark_id},
+                /export {start, end, unit | seconds, priority}, /shutdown
+        Answers are JSON, errors are {"error": message} with status 400 for bad arguments, 404 for unknown routes or ids and 409 when the
+        capture isn't in the right state.
+    '''
+    # Largest request body accepted, the API only takes small JSON objects
+    MAX_BODY_BYTES = 64 * 1024
+
+    def __init__(self, service, host: str = "127.0.0.1", port: int = 8765, socket_path: str = None, on_shutdown: Callable = None):
+        '''Create the server, start() begins listening.
+
+            Arguments:
+            -service (CaptureService): Engine the requests control, living in the thread running the Qt event loop.
+            -host (str), port (int): Address listened on. Keep it on localhost, the API has no authentication.
+            -socket_path (str): Unix socket listened on instead of the port.
+            -on_shutdown (Callable): Called on the service thread by POST /shutdown, e.g. to quit the application.
+        '''
+        self.service = service
+        self.host = host
+        self.port = port
+        self.socket_path = socket_path
+        self.on_shutdown = on_shutdown
+        self.bridge = ServiceBridge()
+        self.bridge.moveToThread(service.thread())
+        self.routes = {("GET", "/status"): service.status,
+                       ("GET", "/metrics"): service.metrics,
+                       ("GET", "/bookmarks"): service.list_bookmarks,
+                       ("POST", "/start"): service.start,
+                       ("POST", "/stop"): service.stop,
+                       ("POST", "/playback"): service.playback,
+                       ("POST", "/realtime"): service.realtime,
+                       ("POST", "/seek"): service.seek,
+                       ("POST", "/pause"): service.pause,
+                       ("POST", "/resume"): service.resume,
+                       ("POST", "/rate"): service.set_rate,
+                       ("POST", "/step"): service.step,
+                       ("POST", "/bookmarks"): service.add_bookmark,
+                       ("POST", "/bookmarks/remove"): service.remove_bookmark,
+                       ("POST", "/export"): service.export_clip,
+                       ("POST", "/shutdown"): self.shutdown}
+        self.loop = None
+        self.server = None
+        self.thread = None
+        self.is_listening = threading.Event()
+
+    def start(self):
+        '''Start the asyncio thread and wait until it listens.'''
+        self.thread = threading.Thread(target=self.run, name="ControlServer", daemon=True)
+        self.thread.start()
+        self.is_listening.wait()
+        if self.server is None:
+            raise OSError(f"Control server couldn't listen on {self.address()}")
+        print(f"Control server listening on {self.address()}")
+
+    def address(self) -> str:
+        return self.socket_path if self.socket_path else f"http://{self.host}:{self.port}"
+
+    def run(self):
+        '''Entry point of the asyncio thread.'''
+        self.loop = asyncio.new_event_loop()
+        try:
+            self.loop.run_until_complete(self.listen())
+        except OSError as err:
+            print(f"Error starting control server on {self.address()}: {err}")
+            self.is_listening.set()
+            return
+        self.is_listening.set()
+        self.loop.run_forever()
+        self.loop.run_until_complete(self.loop.shutdown_asyncgens())
+        self.loop.close()
+
+    async def listen(self):
+        if self.socket_path:
+            self.server = await asyncio.start_unix_server(self.handle_connection, path=self.socket_path)
+        else:
+            self.server = await asyncio.start_server(self.handle_connection, self.host, self.port)
+            # Port 0 picks a free port
+            self.port = self.server.sockets[0].getsockname()[1]
+
+    async def call(self, function: Callable, **arguments):
+        '''Run a service method on the service thread and return its result.'''
+        future = self.loop.create_future()
+        self.bridge.call_requested.emit((function, arguments, self.loop, future))
+        return await future
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        '''Serve the requests of a connection, keeping it open between requests unless the client closes it.'''
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, version = request_line.decode("latin-1").split()
+                headers = {}
+                while True:
+                    line = (await reader.readline()).decode("latin-1").strip()
+                    if not line:
+                        break
+                    name, _, value = line.partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", 0))
+                if length > self.MAX_BODY_BYTES:
+                    await self.respond(writer, 413, {"error": "Request body too large"}, keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                status, answer = await self.handle_request(method, target, body)
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                await self.respond(writer, status, answer, keep_alive)
+                if not keep_alive:
+                    break
+        except (ValueError, asyncio.IncompleteReadError):
+            await self.respond(writer, 400, {"error": "Malformed request"}, keep_alive=False)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def handle_request(self, method: str, target: str, body: bytes) -> tuple[int, dict]:
+        '''Route a request to the service and return the HTTP status and the JSON answer.'''
+        url = urlsplit(target)
+        function = self.routes.get((method, url.path.rstrip("/") or "/"))
+        if function is None:
+            return 404, {"error": f"No route {method} {url.path}"}
+        try:
+            arguments = dict(parse_qsl(url.query))
+            if body:
+                arguments.update(json.loads(body))
+        except (ValueError, TypeError):
+            return 400, {"error": "The body must be a JSON object"}
+
+        try:
+            return 200, await self.call(function, **arguments)
+        except (TypeError, ValueError) as err:
+            return 400, {"error": str(err)}
+        except KeyError as err:
+            return 404, {"error": str(err.args[0]) if err.args else "Not found"}
+        except RuntimeError as err:
+            return 409, {"error": str(err)}
+        except Exception as err:
+            print(f"Control request {method} {url.path} failed: {type(err).__name__}: {err}")
+            return 500, {"error": f"{type(err).__name__}: {err}"}
+
+    async def respond(self, writer: asyncio.StreamWriter, status: int, answer: dict, keep_alive: bool):
+        reasons = {200: "OK", 400: "Bad Request", 404: "Not Found", 409: "Conflict", 413: "Payload Too Large", 500: "Internal Server Error"}
+        payload = json.dumps(answer).encode()
+        writer.write(f"HTTP/1.1 {status} {reasons.get(status, 'Error')}\r\nContent-Type: application/json\r\n"
+                     f"Content-Length: {len(payload)}\r\nConnection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1")
+                     + payload)
+        await writer.drain()
+
+    def shutdown(self) -> dict:
+        '''Run by POST /shutdown on the service thread, the answer is sent before the application quits.'''
+        if self.on_shutdown is not None:
+            QTimer.singleShot(100, self.on_shutdown)
+        return {"shutdown": True}
+
+    def stop(self):
+        '''Stop listening and the asyncio thread. Requests still waiting for the service get no answer.'''
+        if self.loop is None or self.server is None:
+            return
+        self.loop.call_soon_threadsafe(self.server.close)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout=5)
+        if self.socket_path and os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
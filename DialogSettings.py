@@ -1,7 +1,8 @@
 import sys
-from PySide6.QtCore import QFile, Signal
+from PySide6.QtCore import Signal
 from PySide6.QtWidgets import QApplication, QDialog, QVBoxLayout, QLabel, QPushButton, QFileDialog
-from PySide6.QtUiTools import QUiLoader
+
+from ui_DialogSettings import Ui_DialogSettings
 
 class DialogSettings(QDialog):
     updateSettings = Signal(int, int, str, str)
@@ -13,16 +14,17 @@ class DialogSettings(QDialog):
         self.setFixedSize(300, 200)
         self.setModal(True)
 
-        ui_file_path = QFile("VAR_System_ui\DialogSettings.ui")
-        loader = QUiLoader()
-        self.dialog_window = loader.load(ui_file_path)
+        # Form compiled from VAR_System_ui/DialogSettings.ui by build_ui.py
+        self.dialog_window = QDialog()
+        self.ui = Ui_DialogSettings()
+        self.ui.setupUi(self.dialog_window)
 
         layout = QVBoxLayout()
         layout.addWidget(self.dialog_window)
         self.setLayout(layout)
         self.layout().setContentsMargins(0, 0, 0, 0)
 
-        self.dialog_window.output_path_button.clicked.connect(self.select_output_path)
+        self.ui.output_path_button.clicked.connect(self.select_output_path)
 
     def select_output_path(self):
         options = QFileDialog.Options()
@@ -33,15 +35,15 @@ class DialogSettings(QDialog):
 
         if folder_path:
             print(f'Selected Folder: {folder_path}')
-            self.dialog_window.output_path_edit.setText(folder_path + "\\")
+            self.ui.output_path_edit.setText(folder_path + "\\")
         else:
-            self.dialog_window.output_path_edit.setText("output\\")
+            self.ui.output_path_edit.setText("output\\")
 
     def closeEvent(self, event):
-        number_of_cameras = self.dialog_window.number_of_cameras_spinbox.value()
-        buffer_size = self.dialog_window.buffer_size_spinbox.value()
-        encoding = self.dialog_window.encoding_combobox.currentText()
-        output_path = self.dialog_window.output_path_edit.text()
+        number_of_cameras = self.ui.number_of_cameras_spinbox.value()
+        buffer_size = self.ui.buffer_size_spinbox.value()
+        encoding = self.ui.encoding_combobox.currentText()
+        output_path = self.ui.output_path_edit.text()
 
         self.updateSettings.emit(number_of_cameras, buffer_size, encoding, output_path)
 
@@ -0,0 +1,160 @@
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Iterator, Optional
+import threading
+import cv2
+import numpy as np
+from CircularBuffer import CircularBuffer
+
+class EncodedCircularBuffer(CircularBuffer):
+    """ CircularBuffer that stores frames JPEG encoded. Frames are encoded by a worker pool so the capture thread only hands them over,
+        and are decoded on demand through a bounded LRU cache. Reading away from the live head prefetches the frames around the read
+        position so playback and timeline scrubbing mostly hit the cache.
+        Attributes:
+            -quality (int): JPEG quality used to encode the frames.
+            -cache_size (int): Maximum number of decoded frames kept in the cache.
+            -prefetch_radius (int): Number of frames decoded ahead and behind the read position.
+            -buffer (list): The encoded frames, as futures of the encoding jobs.
+    """
+    def __init__(self, capacity: int, quality: int = 90, cache_size: int = 25, prefetch_radius: int = 8, workers: int = 2):
+        """Initialize the circular buffer with the given capacity and start the encoding pool."""
+        if not isinstance(cache_size, int) or cache_size <= 0:
+            raise ValueError("Cache size must be a positive integer.")
+
+        self.quality = quality
+        self.write_quality = quality
+        self.cache_size = cache_size
+        self.prefetch_radius = prefetch_radius
+        self.cache = OrderedDict()
+        self.pending_decodes = set()
+        self.cache_lock = threading.Lock()
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="EncodedCircularBuffer")
+        super().__init__(capacity)
+
+    def _allocate_frames(self, capacity: int) -> list:
+        """Create an empty slot list and the generation counters used to tell apart the frames written in the same slot."""
+        self.generations = [0] * capacity
+        return [None] * capacity
+
+    def write_frame(self, frame: np.ndarray, timestamp: Optional[float] = None, quality: Optional[int] = None):
+        """Write a frame at head position, see CircularBuffer.write_frame.
+
+            Arguments:
+            -quality (int): JPEG quality of this frame, e.g. lower for static frames to save memory. None uses `quality`.
+        """
+        self.write_quality = self.quality if quality is None else quality
+        super().write_frame(frame, timestamp)
+
+    def _encode(self, frame: np.ndarray, quality: int) -> np.ndarray:
+        """Encode a frame, run by the worker pool."""
+        ret, encoded = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        if not ret:
+            raise cv2.error("Couldn't encode frame")
+        return encoded
+
+    def _decode(self, encoded: Future) -> np.ndarray:
+        """Decode a frame, waiting for its encoding job if it's still running."""
+        return cv2.imdecode(encoded.result(), cv2.IMREAD_COLOR)
+
+    def _cache_insert(self, key: tuple, frame: np.ndarray):
+        """Insert a decoded frame evicting the least recently used ones. Frames of slots rewritten in the meantime are dropped."""
+        with self.cache_lock:
+            self.pending_decodes.discard(key)
+            position, generation = key
+            if self.generations[position] != generation:
+                return
+            self.cache[key] = frame
+            self.cache.move_to_end(key)
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+
+    def _cache_lookup(self, key: tuple) -> Optional[np.ndarray]:
+        """Return a decoded frame from the cache, None on a miss."""
+        with self.cache_lock:
+            frame = self.cache.get(key)
+            if frame is not None:
+                self.cache.move_to_end(key)
+            return frame
+
+    def _store_frame(self, position: int, frame: np.ndarray):
+        """Queue the frame for encoding. The raw frame goes in the cache since the live frame is displayed right away."""
+        with self.cache_lock:
+            self.cache.pop((position, self.generations[position]), None)
+            self.generations[position] += 1
+        self.buffer[position] = self.pool.submit(self._encode, frame, self.write_quality)
+        self._cache_insert((position, self.generations[position]), frame)
+
+    def _load_frame(self, position: int) -> np.ndarray:
+        """Return the decoded frame in the given slot and prefetch its neighbours unless it's the live frame."""
+        key = (position, self.generations[position])
+        frame = self._cache_lookup(key)
+        if frame is None:
+            frame = self._decode(self.buffer[position])
+            self._cache_insert(key, frame)
+
+        if position != (self.head - 1) % self.capacity:
+            self._prefetch(position)
+        return frame
+
+    def _prefetch(self, position: int):
+        """Decode in the worker pool the frames within `prefetch_radius` of the given position that aren't cached or queued yet."""
+        for offset in range(-self.prefetch_radius, self.prefetch_radius + 1):
+            neighbour = (position + offset) % self.capacity
+            if neighbour >= self.size:
+                continue
+            key = (neighbour, self.generations[neighbour])
+            with self.cache_lock:
+                if key in self.cache or key in self.pending_decodes:
+                    continue
+                self.pending_decodes.add(key)
+            self.pool.submit(self._prefetch_decode, key, self.buffer[neighbour])
+
+    def _prefetch_decode(self, key: tuple, encoded: Future):
+        """Decode a prefetched frame into the cache, run by the worker pool. A failed decode leaves the slot free to be prefetched again."""
+        try:
+            self._cache_insert(key, self._decode(encoded))
+        finally:
+            with self.cache_lock:
+                self.pending_decodes.discard(key)
+
+    def _reset_slots(self, capacity: int):
+        """Replace the slot list. Generations keep growing so decodes still running for the old slots are discarded."""
+        next_generation = max(self.generations) + 1
+        self.cache.clear()
+        self.pending_decodes.clear()
+        self.buffer = self._allocate_frames(capacity)
+        self.generations = [next_generation] * capacity
+
+    def _clear_frames(self):
+        """Remove every encoded and decoded frame."""
+        with self.cache_lock:
+            self._reset_slots(self.capacity)
+
+    def _resize_frames(self, new_capacity: int, positions: np.ndarray):
+        """Resize the slot list keeping the frames of the given slots, see CircularBuffer._resize_frames. Decoded frames are dropped
+            since slot positions change.
+        """
+        encoded_frames = [self.buffer[position] for position in positions]
+        with self.cache_lock:
+            self._reset_slots(new_capacity)
+            self.buffer[:len(encoded_frames)] = encoded_frames
+
+    def _frames(self) -> Iterator[np.ndarray]:
+        """Return a generator decoding the stored frames in slot order. The encoded frames are captured when it's created."""
+        encoded_frames = self.buffer[:self.size]
+        return (self._decode(encoded) for encoded in encoded_frames)
+
+    def _pin_frame(self, position: int) -> Future:
+        """Snapshots reference the encoded frame, which is never modified, and decode it when it's read."""
+        return self.buffer[position]
+
+    def _pinned_decoder(self) -> Callable:
+        return self._decode
+
+    def close(self):
+        """Stop the worker pool, dropping the queued encodes and prefetches."""
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+    def nbytes(self) -> int:
+        """Return the size in bytes of the encoded frames."""
+        return sum(encoded.result().nbytes for encoded in self.buffer[:self.size])
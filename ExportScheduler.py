@@ -0,0 +1,208 @@
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import heapq
+import itertools
+import os
+import shutil
+import threading
+import numpy as np
+from PySide6.QtCore import QObject, Signal
+from BufferSnapshot import BufferSnapshot
+from PipelineStats import PipelineStats
+import ExportWorker
+
+class ExportJob:
+    """ A clip export queued in the ExportScheduler. The clip is split in chunks of `chunk_frames` frames encoded in parallel. """
+    def __init__(self, job_id: int, snapshot: BufferSnapshot, filename: str, fourcc: int, fps: float, width: int, height: int,
+                 pixel_format: str, priority: int, chunk_frames: int, stats: PipelineStats = None):
+        self.job_id = job_id
+        self.snapshot = snapshot
+        self.filename = filename
+        self.fourcc = fourcc
+        self.fps = fps
+        self.width = width
+        self.height = height
+        self.pixel_format = pixel_format
+        self.priority = priority
+        self.stats = stats
+        self.chunk_starts = list(range(0, len(snapshot), chunk_frames))
+        self.chunk_frames = chunk_frames
+        self.chunk_filenames = [filename] if len(self.chunk_starts) == 1 else \
+            [f"{filename}.part{index}{os.path.splitext(filename)[1]}" for index in range(len(self.chunk_starts))]
+        self.frame_layout = None
+        self.dispatched_chunks = 0
+        self.encoded_chunks = 0
+        self.failed = False
+
+    def chunk_range(self, chunk_index: int) -> tuple[int, int]:
+        """Return the first and last (excluded) snapshot index of a chunk."""
+        start = self.chunk_starts[chunk_index]
+        return start, min(start + self.chunk_frames, len(self.snapshot))
+
+    def progress(self) -> float:
+        """Fraction of the chunks encoded so far."""
+        return self.encoded_chunks / len(self.chunk_starts)
+
+class ExportScheduler(QObject):
+    """ Bounded pool of encoder processes exporting clips from pinned buffer snapshots. Jobs are queued by priority (lower values first)
+        and long clips are split into chunks encoded in parallel and joined without re-encoding. Frames are handed to the workers through
+        shared memory one chunk at a time, so at most `max_workers` chunks are held outside the buffer.
+        Joining chunks needs ffmpeg on the PATH; without it every clip is encoded as a single chunk, still in parallel with other clips.
+    """
+    job_progress = Signal(int, float)
+    job_finished = Signal(int, str)
+    job_failed = Signal(int, str)
+
+    def __init__(self, max_workers: int = None, chunk_frames: int = 250, niceness: int = 10, parent=None):
+        """Start the worker pool and the dispatcher thread.
+
+            Arguments:
+            -max_workers (int): Number of encoder processes, by default half the cores so the capture threads keep theirs.
+            -chunk_frames (int): Number of frames of a chunk.
+            -niceness (int): Priority decrease of the worker processes where the platform supports it.
+        """
+        super().__init__(parent)
+        self.max_workers = max_workers or max(1, (os.cpu_count() or 2) // 2)
+        self.ffmpeg = shutil.which("ffmpeg")
+        self.chunk_frames = chunk_frames if self.ffmpeg else None
+        self.pool = ProcessPoolExecutor(max_workers=self.max_workers, initializer=ExportWorker.initialize_worker, initargs=(niceness,))
+        self.job_ids = itertools.count()
+        self.queue = []
+        self.jobs = {}
+        self.in_flight = 0
+        self.is_stopped = False
+        self.condition = threading.Condition()
+        self.dispatcher = threading.Thread(target=self._dispatch_loop, name="ExportScheduler", daemon=True)
+        self.dispatcher.start()
+
+    def submit(self, snapshot: BufferSnapshot, filename: str, fourcc: int, fps: float, width: int, height: int, pixel_format: str,
+               priority: int = 0, stats: PipelineStats = None) -> int:
+        """Queue the export of a snapshot and return the job id. The snapshot is released once all its frames are handed to the workers."""
+        with self.condition:
+            job_id = next(self.job_ids)
+            chunk_frames = self.chunk_frames or len(snapshot)
+            job = ExportJob(job_id, snapshot, filename, fourcc, fps, width, height, pixel_format, priority, chunk_frames, stats)
+            self.jobs[job_id] = job
+            for chunk_index in range(len(job.chunk_starts)):
+                heapq.heappush(self.queue, (priority, job_id, chunk_index))
+            self.condition.notify_all()
+        return job_id
+
+    def pending_jobs(self) -> int:
+        """Return the number of jobs not finished yet."""
+        with self.condition:
+            return len(self.jobs)
+
+    def _dispatch_loop(self):
+        """Hand the queued chunks to the workers, highest priority first, keeping at most `max_workers` in flight."""
+        while True:
+            with self.condition:
+                while not self.is_stopped and (not self.queue or self.in_flight >= self.max_workers):
+                    self.condition.wait()
+                if self.is_stopped:
+                    return
+                _, job_id, chunk_index = heapq.heappop(self.queue)
+                job = self.jobs[job_id]
+                self.in_flight += 1
+
+            try:
+                self._dispatch_chunk(job, chunk_index)
+            except Exception as err:
+                self._chunk_done(job, chunk_index, None, err)
+
+    def _dispatch_chunk(self, job: ExportJob, chunk_index: int):
+        """Copy a chunk of the snapshot into shared memory and submit its encoding."""
+        start, stop = job.chunk_range(chunk_index)
+        if job.frame_layout is None:
+            frame = job.snapshot[0]
+            job.frame_layout = (frame.shape, frame.dtype)
+        frame_shape, frame_dtype = job.frame_layout
+        shape = (stop - start, *frame_shape)
+
+        block = shared_memory.SharedMemory(create=True, size=max(1, int(np.prod(shape)) * frame_dtype.itemsize))
+        try:
+            frames = np.ndarray(shape, dtype=frame_dtype, buffer=block.buf)
+            job.snapshot.copy_frames(start, stop, frames)
+            del frames
+        except Exception:
+            block.close()
+            block.unlink()
+            raise
+
+        job.dispatched_chunks += 1
+        if job.dispatched_chunks == len(job.chunk_starts):
+            job.snapshot.release()
+
+        future = self.pool.submit(ExportWorker.encode_chunk, block.name, shape, frame_dtype.str, job.pixel_format,
+                                  job.chunk_filenames[chunk_index], job.fourcc, job.fps, job.width, job.height)
+        future.add_done_callback(lambda future: self._chunk_done(job, chunk_index, block, future.exception()))
+
+    def _chunk_done(self, job: ExportJob, chunk_index: int, block: shared_memory.SharedMemory, error: Exception):
+        """Free the chunk shared memory, report progress and finish the job once all its chunks are encoded."""
+        if block is not None:
+            block.close()
+            block.unlink()
+
+        with self.condition:
+            self.in_flight -= 1
+            self.condition.notify_all()
+
+        if error is not None:
+            if not job.failed:
+                job.failed = True
+                job.snapshot.release()
+                self._remove_job(job)
+                self.job_failed.emit(job.job_id, f"{job.filename}: {error}")
+            return
+
+        job.encoded_chunks += 1
+        if job.stats is not None:
+            start, stop = job.chunk_range(chunk_index)
+            for capture_time in job.snapshot.capture_times[start:stop]:
+                job.stats.record_export(capture_time)
+        self.job_progress.emit(job.job_id, job.progress())
+
+        if job.encoded_chunks == len(job.chunk_starts) and not job.failed:
+            if len(job.chunk_filenames) > 1:
+                try:
+                    future = self.pool.submit(ExportWorker.concatenate_chunks, job.chunk_filenames, job.filename, self.ffmpeg)
+                except RuntimeError as err:
+                    # The pool was shut down without waiting while the last chunk was encoded
+                    self._job_done(job, err)
+                    return
+                future.add_done_callback(lambda future: self._job_done(job, future.exception()))
+            else:
+                self._job_done(job, None)
+
+    def _job_done(self, job: ExportJob, error: Exception):
+        """Report the job outcome."""
+        self._remove_job(job)
+        if error is not None:
+            self.job_failed.emit(job.job_id, f"{job.filename}: {error}")
+        else:
+            self.job_finished.emit(job.job_id, job.filename)
+
+    def _remove_job(self, job: ExportJob):
+        """Forget a job and drop its chunks still queued."""
+        with self.condition:
+            self.queue = [entry for entry in self.queue if entry[1] != job.job_id]
+            heapq.heapify(self.queue)
+            self.jobs.pop(job.job_id, None)
+            self.condition.notify_all()
+
+    def shutdown(self, wait: bool = True):
+        """Shut down the worker pool. When `wait` is set every job is finished first, its chunks encoded and joined, otherwise the queued
+            chunks are dropped and their snapshots released.
+        """
+        with self.condition:
+            if wait:
+                while self.jobs:
+                    self.condition.wait()
+            self.is_stopped = True
+            self.condition.notify_all()
+            dropped_jobs = [self.jobs[job_id] for job_id in {entry[1] for entry in self.queue}]
+            self.queue = []
+        for job in dropped_jobs:
+            job.snapshot.release()
+        self.dispatcher.join()
+        self.pool.shutdown(wait=wait)
@@ -0,0 +1,47 @@
+""" Functions run by the ExportScheduler worker processes. They only depend on OpenCV and NumPy so the workers start quickly. """
+from multiprocessing import shared_memory
+import os
+import subprocess
+import cv2
+import numpy as np
+import PixelFormat
+
+def initialize_worker(niceness: int):
+    """Lower the worker priority below the capture threads and keep OpenCV single threaded, the pool already runs one encode per core."""
+    if niceness and hasattr(os, "nice"):
+        os.nice(niceness)
+    cv2.setNumThreads(1)
+
+def encode_chunk(shared_memory_name: str, shape: tuple, dtype: str, pixel_format: str, filename: str, fourcc: int, fps: float,
+                 width: int, height: int) -> int:
+    """Encode the frames stored in a shared memory block to a video file and return the number of frames written."""
+    block = shared_memory.SharedMemory(name=shared_memory_name)
+    try:
+        frames = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+        writer = cv2.VideoWriter(filename, fourcc, fps, (width, height))
+        if not writer.isOpened():
+            raise cv2.error(f"Couldn't open {filename} for writing")
+        for frame in frames:
+            writer.write(PixelFormat.to_bgr(frame, pixel_format))
+        writer.release()
+        del frames
+        return shape[0]
+    finally:
+        block.close()
+
+def concatenate_chunks(chunk_filenames: list, filename: str, ffmpeg: str) -> str:
+    """Join the chunk files into the final clip with ffmpeg, copying the encoded streams without re-encoding, and delete the chunks."""
+    list_filename = filename + ".chunks.txt"
+    with open(list_filename, "w") as list_file:
+        for chunk_filename in chunk_filenames:
+            escaped_path = os.path.abspath(chunk_filename).replace("'", "'\\''")
+            list_file.write(f"file '{escaped_path}'\n")
+    try:
+        subprocess.run([ffmpeg, "-y", "-loglevel", "error", "-f", "concat", "-safe", "0", "-i", list_filename, "-c", "copy", filename],
+                       check=True, capture_output=True)
+    finally:
+        os.remove(list_filename)
+        for chunk_filename in chunk_filenames:
+            if os.path.exists(chunk_filename):
+                os.remove(chunk_filename)
+    return filename
@@ -0,0 +1,199 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Optional
+import sys
+import time
+import cv2
+import numpy as np
+
+class FrameSource:
+    """ Source of BGR frames read by a VideoCaptureThread. The grab/retrieve/read methods follow cv2.VideoCapture so any source can be
+        used in place of it. Sources with `realtime` enabled deliver frames no faster than their fps, otherwise as fast as they are read.
+        Attributes:
+            -width (int): Frame width.
+            -height (int): Frame height.
+            -fps (float): Frame rate of the source.
+            -realtime (bool): Flag that paces grab at the source frame rate.
+    """
+    def __init__(self, width: int, height: int, fps: float, realtime: bool = True):
+        self.width = int(width)
+        self.height = int(height)
+        self.fps = float(fps)
+        self.realtime = realtime
+        self.next_frame_time = None
+
+    def _wait_for_next_frame(self):
+        """Sleep until the next frame is due when the source is paced at its frame rate."""
+        if not self.realtime or self.fps <= 0:
+            return
+        now = time.perf_counter()
+        if self.next_frame_time is None or now - self.next_frame_time > 1:
+            self.next_frame_time = now
+        elif self.next_frame_time > now:
+            time.sleep(self.next_frame_time - now)
+        self.next_frame_time += 1 / self.fps
+
+    def isOpened(self) -> bool:
+        """Check if the source can deliver frames."""
+        return True
+
+    def grab(self) -> bool:
+        """Grab the next frame without decoding it."""
+        raise NotImplementedError
+
+    def retrieve(self, image: Optional[np.ndarray] = None) -> tuple[bool, Optional[np.ndarray]]:
+        """Decode the grabbed frame, into `image` when it has the frame shape."""
+        raise NotImplementedError
+
+    def read(self, image: Optional[np.ndarray] = None) -> tuple[bool, Optional[np.ndarray]]:
+        """Grab and decode the next frame."""
+        if not self.grab():
+            return False, None
+        return self.retrieve(image)
+
+    def release(self):
+        """Release the resources held by the source."""
+        pass
+
+class OpenCVFrameSource(FrameSource):
+    """ FrameSource reading from a cv2.VideoCapture. """
+    def __init__(self, video_capture: cv2.VideoCapture, realtime: bool):
+        self.video_capture = video_capture
+        width = video_capture.get(cv2.CAP_PROP_FRAME_WIDTH)
+        height = video_capture.get(cv2.CAP_PROP_FRAME_HEIGHT)
+        fps = video_capture.get(cv2.CAP_PROP_FPS)
+        super().__init__(width, height, fps, realtime)
+
+    def isOpened(self) -> bool:
+        return self.video_capture.isOpened()
+
+    def grab(self) -> bool:
+        self._wait_for_next_frame()
+        return self.video_capture.grab()
+
+    def retrieve(self, image: Optional[np.ndarray] = None) -> tuple[bool, Optional[np.ndarray]]:
+        return self.video_capture.retrieve(image)
+
+    def release(self):
+        self.video_capture.release()
+
+class CameraFrameSource(OpenCVFrameSource):
+    """ FrameSource reading from a camera through any OpenCV backend. The camera paces itself, so grab isn't throttled. """
+    def __init__(self, capture_index: int, width: int = 1920, height: int = 1080, api_preference: Optional[int] = None):
+        """Open the camera at the given index and request the given resolution.
+
+            Arguments:
+            -capture_index (int): VideoCapture index of the camera.
+            -width (int), height (int): Requested resolution, the camera may negotiate a different one.
+            -api_preference (int): OpenCV backend, by default MSMF on Windows, V4L2 on Linux and any other backend elsewhere.
+        """
+        if api_preference is None:
+            if sys.platform == "win32":
+                api_preference = cv2.CAP_MSMF
+            elif sys.platform.startswith("linux"):
+                api_preference = cv2.CAP_V4L2
+            else:
+                api_preference = cv2.CAP_ANY
+
+        video_capture = cv2.VideoCapture(capture_index, api_preference)
+        video_capture.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        video_capture.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        super().__init__(video_capture, realtime=False)
+
+class VideoFileFrameSource(OpenCVFrameSource):
+    """ FrameSource playing a video file, at its native frame rate or as fast as possible. """
+    def __init__(self, path: str, realtime: bool = True, loop: bool = True):
+        """Open the video file at the given path.
+
+            Arguments:
+            -path (str): Path of the video file.
+            -realtime (bool): Flag that plays the file at its native frame rate instead of as fast as frames are read.
+            -loop (bool): Flag that restarts the file when it ends instead of failing the grab.
+        """
+        self.path = path
+        self.loop = loop
+        super().__init__(cv2.VideoCapture(path), realtime)
+
+    def grab(self) -> bool:
+        ret = super().grab()
+        if not ret and self.loop:
+            self.video_capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret = self.video_capture.grab()
+        return ret
+
+class SyntheticFrameSource(FrameSource):
+    """ FrameSource generating a deterministic moving test pattern, so the pipeline can run without cameras. Frame `n` is a fixed colour
+        gradient shifted by `n` plus the source index, which tells apart both frames and cameras.
+    """
+    def __init__(self, width: int = 1920, height: int = 1080, fps: float = 25, realtime: bool = True, source_index: int = 0):
+        super().__init__(width, height, fps, realtime)
+        rows = np.arange(self.height, dtype=np.uint16)[:, None]
+        columns = np.arange(self.width, dtype=np.uint16)[None, :]
+        self.pattern = np.empty((self.height, self.width, 3), dtype=np.uint8)
+        self.pattern[..., 0] = (columns + rows) & 0xFF
+        self.pattern[..., 1] = (columns * 2) & 0xFF
+        self.pattern[..., 2] = (rows * 2 + source_index * 64) & 0xFF
+        self.frame_index = -1
+
+    def grab(self) -> bool:
+        self._wait_for_next_frame()
+        self.frame_index += 1
+        return True
+
+    def retrieve(self, image: Optional[np.ndarray] = None) -> tuple[bool, Optional[np.ndarray]]:
+        if image is None or image.shape != self.pattern.shape or image.dtype != np.uint8:
+            image = np.empty_like(self.pattern)
+        np.add(self.pattern, np.uint8(self.frame_index & 0xFF), out=image)
+        return True, image
+
+def create_frame_source(source: str, capture_index: int, width: int = 1920, height: int = 1080, fps: float = 25,
+                        realtime: bool = True) -> FrameSource:
+    """Create the frame source of a camera from a source description.
+
+        Arguments:
+        -source (str): "camera" for a physical camera, "synthetic" for a generated test pattern, anything else is a video file path where
+            "{index}" is replaced with the capture index, e.g. "output/capture_{index}_clip_0.avi".
+        -capture_index (int): Index of the camera.
+        -width (int), height (int), fps (float): Requested camera resolution and synthetic pattern format.
+        -realtime (bool): Pace synthetic patterns and video files at their frame rate, False delivers frames as fast as they're asked for.
+    """
+    if source == "camera":
+        return CameraFrameSource(capture_index, width, height)
+    elif source == "synthetic":
+        return SyntheticFrameSource(width, height, fps, realtime=realtime, source_index=capture_index)
+    else:
+        return VideoFileFrameSource(source.format(index=capture_index), realtime=realtime)
+
+def open_frame_sources(open_source: Callable, count: int, on_opened: Callable = None) -> list:
+    """Open the frame sources of `count` cameras at once, each in its own thread, since opening a camera is mostly waiting for its driver
+        to negotiate the format. Returns the sources in camera order. If one fails to open, the others are released and its error raised.
+
+        Arguments:
+        -open_source (Callable): Opens the source of a camera index, e.g. create_frame_source or a CaptureProcess constructor.
+        -count (int): Number of cameras.
+        -on_opened (Callable): Called from the opening thread with the camera index and the seconds it took, as each source opens.
+    """
+    def open_camera(capture_index: int):
+        start_time = time.monotonic()
+        source = open_source(capture_index)
+        if not source.isOpened():
+            source.release()
+            raise IOError(f"Camera {capture_index} couldn't be opened")
+        if on_opened is not None:
+            on_opened(capture_index, time.monotonic() - start_time)
+        return source
+
+    sources = [None] * count
+    error = None
+    with ThreadPoolExecutor(max_workers=max(1, count), thread_name_prefix="OpenCamera") as pool:
+        futures = {pool.submit(open_camera, capture_index): capture_index for capture_index in range(count)}
+        for future in as_completed(futures):
+            try:
+                sources[futures[future]] = future.result()
+            except Exception as err:
+                error = error or err
+    if error is not None:
+        for source in sources:
+            if source is not None:
+                source.release()
+        raise error
+    return sources
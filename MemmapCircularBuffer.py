@@ -0,0 +1,251 @@
+import json
+import mmap
+import os
+import threading
+import time
+import logging
+from typing import Optional
+import numpy as np
+from PreallocatedCircularBuffer import PreallocatedCircularBuffer
+
+class MemmapCircularBuffer(PreallocatedCircularBuffer):
+    """ CircularBuffer that stores frames in a fixed-size ring file mapped with np.memmap, so the retention window is bounded by disk
+        instead of RAM. The last `hot_size` written frames are also kept in a small RAM window which serves the live tail and the decode
+        target of the capture. The sequence number and wall clock capture time of every slot are kept in a mapped metadata file updated
+        with each frame, and the layout in a JSON file, so an existing ring is reopened as it was, even after a crash.
+        Attributes:
+            -path (str): Path of the ring file.
+            -meta (np.memmap): Per-slot metadata mapped from the metadata file. A slot being overwritten has sequence -1 until it's committed.
+            -hot_size (int): Number of most recent frames kept in RAM.
+            -flush_interval (int): Number of written frames between two flushes of the ring file and its state, done by a background
+                thread so the capture never waits on the disk.
+    """
+    # The ring file has a fixed size, a buffer with a different capacity opens a new ring file
+    is_resizable = False
+    META_DTYPE = np.dtype([("sequence", np.int64), ("wall_time", np.float64)])
+
+    def __init__(self, capacity: int, frame_shape: tuple, path: str, hot_size: int = 50, flush_interval: int = 250, dtype: np.dtype = np.uint8):
+        """Open the ring file at the given path, or create it if it doesn't exist or was created with a different layout."""
+        if not isinstance(hot_size, int) or hot_size <= 0:
+            raise ValueError("Hot size must be a positive integer.")
+
+        self.path = path
+        self.state_path = path + ".json"
+        self.meta_path = path + ".meta"
+        self.hot_size = min(hot_size, capacity)
+        self.flush_interval = flush_interval
+        self.hot_head = 0
+        self.unflushed_frames = 0
+        self.is_reopened = False
+        self.flush_requested = False
+        self.is_closed = False
+        self.flush_condition = threading.Condition()
+        # Keeps the background flush and the owner from writing the state file at the same time
+        self.state_lock = threading.Lock()
+        super().__init__(capacity, frame_shape, dtype)
+
+        self.hot_buffer = np.zeros((self.hot_size, *self.frame_shape), dtype=self.dtype)
+        if self.is_reopened:
+            self._restore_state()
+        else:
+            self._write_state()
+        self.flusher = threading.Thread(target=self._flush_loop, name="MemmapCircularBuffer", daemon=True)
+        self.flusher.start()
+
+    def _allocate_frames(self, capacity: int) -> np.memmap:
+        """Map the ring file and its metadata file, reusing them when the saved layout matches the requested one."""
+        state = self._read_state()
+        layout = {"capacity": capacity, "frame_shape": list(self.frame_shape), "dtype": self.dtype.str}
+        shape = (capacity, *self.frame_shape)
+        meta_bytes = capacity * self.META_DTYPE.itemsize
+
+        if (state is not None and all(state.get(key) == value for key, value in layout.items()) and os.path.exists(self.path)
+                and os.path.exists(self.meta_path) and os.path.getsize(self.meta_path) == meta_bytes):
+            frames = np.memmap(self.path, dtype=self.dtype, mode="r+", shape=shape)
+            self.meta = np.memmap(self.meta_path, dtype=self.META_DTYPE, mode="r+", shape=(capacity,))
+            self.is_reopened = True
+        else:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            frames = np.memmap(self.path, dtype=self.dtype, mode="w+", shape=shape)
+            self.meta = np.memmap(self.meta_path, dtype=self.META_DTYPE, mode="w+", shape=(capacity,))
+            self.meta["sequence"] = -1
+
+        # Timeline peeks jump around the file, read-ahead would only pollute the page cache
+        if hasattr(mmap, "MADV_RANDOM") and frames._mmap is not None:
+            frames._mmap.madvise(mmap.MADV_RANDOM)
+        return frames
+
+    def _read_state(self) -> Optional[dict]:
+        """Return the saved buffer state, None if it's missing or unreadable."""
+        try:
+            with open(self.state_path, "r") as state_file:
+                return json.load(state_file)
+        except (OSError, ValueError):
+            return None
+
+    def _write_state(self):
+        """Save the ring layout and the tail next to the ring file. The file is replaced atomically so a crash never leaves a partial state."""
+        state = {"capacity": self.capacity, "frame_shape": list(self.frame_shape), "dtype": self.dtype.str, "tail": self.tail}
+        temporary_path = self.state_path + ".tmp"
+        with self.state_lock:
+            with open(temporary_path, "w") as state_file:
+                json.dump(state, state_file)
+            os.replace(temporary_path, self.state_path)
+
+    def _restore_state(self):
+        """Rebuild head and size from the sequence numbers in the metadata file and reload the RAM window with the most recent frames.
+            A slot left half written by a crash is blanked and kept as the oldest frame, with the capture time of the next one. The restored
+            frames are renumbered in chronological order and their wall clock capture times are converted back to the monotonic clock.
+        """
+        sequences = np.array(self.meta["sequence"])
+        valid = sequences >= 0
+        count = int(np.count_nonzero(valid))
+        if count == 0:
+            return
+
+        head = (int(np.argmax(sequences)) + 1) % self.capacity
+        # Frames are written in slot order, so going back from the newest slot the sequence numbers must decrease
+        chain = np.roll(sequences, -head)
+        ordered = bool(np.all(np.diff(chain[chain >= 0]) > 0))
+        if ordered and head == count and np.all(valid[:count]):
+            size = count
+        elif ordered and count == self.capacity:
+            size = self.capacity
+        elif ordered and count == self.capacity - 1 and not valid[head]:
+            self.buffer[head] = 0
+            size = self.capacity
+            logging.warning(f"Blanked the frame being written in slot {head} of ring file {self.path} when it was closed")
+        else:
+            logging.warning(f"Ring file {self.path} has inconsistent metadata, its frames are discarded")
+            self.meta["sequence"] = -1
+            return
+
+        self.size = size
+        self.head = head
+        state = self._read_state()
+        tail = int(state.get("tail", 0)) if state is not None else 0
+        self.tail = tail if 0 <= tail < self.capacity and (self.is_full() or tail <= self.head) else self.head
+
+        oldest = self.oldest_position()
+        for sequence_number in range(self.size):
+            self.sequence_numbers[(oldest + sequence_number) % self.capacity] = sequence_number
+        if not valid[oldest]:
+            self.meta["wall_time"][oldest] = self.meta["wall_time"][(oldest + 1) % self.capacity]
+        self.meta["sequence"] = self.sequence_numbers
+        stored = self.sequence_numbers >= 0
+        self.timestamps[stored] = self.meta["wall_time"][stored] - self._wall_clock_offset()
+        self.next_sequence = self.size
+
+        hot_frames = min(self.size, self.hot_size)
+        for distance in range(hot_frames, 0, -1):
+            position = (self.head - distance) % self.capacity
+            self.hot_buffer[self.hot_head] = self.buffer[position]
+            self.hot_head = (self.hot_head + 1) % self.hot_size
+        logging.info(f"Reopened ring file {self.path} with {self.size} frames")
+
+    @staticmethod
+    def _wall_clock_offset() -> float:
+        """Return the offset from the monotonic clock to the wall clock, which capture times are saved in to be comparable across runs."""
+        return time.time() - time.monotonic()
+
+    def _hot_index(self, position: int) -> Optional[int]:
+        """Return the RAM window index holding the given slot, None if the slot is only on disk. While write_slot is being filled the
+            oldest frame of the window is being overwritten, so it's read from the ring file instead.
+        """
+        distance = (self.head - 1 - position) % self.capacity
+        window = self.hot_size - 1 if self.write_in_progress else self.hot_size
+        if distance < min(self.size, window):
+            return (self.hot_head - 1 - distance) % self.hot_size
+        return None
+
+    def _store_frame(self, position: int, frame: np.ndarray):
+        """Copy the frame into the RAM window (unless it was decoded there already) and into the ring file."""
+        hot_slot = self.hot_buffer[self.hot_head]
+        if not np.may_share_memory(frame, hot_slot):
+            np.copyto(hot_slot, frame)
+        # Marked empty first, so a crash while the slot is written never reopens it with its old sequence number
+        self.meta["sequence"][position] = -1
+        self.buffer[position] = hot_slot
+
+    def _advance_head(self, timestamp: Optional[float] = None):
+        """Step the RAM window together with the head, record the sequence number in the metadata file and flush the ring file
+            every `flush_interval` frames.
+        """
+        position = self.head
+        self.hot_head = (self.hot_head + 1) % self.hot_size
+        super()._advance_head(timestamp)
+        self.meta["wall_time"][position] = self.timestamps[position] + self._wall_clock_offset()
+        self.meta["sequence"][position] = self.sequence_numbers[position]
+
+        self.unflushed_frames += 1
+        if self.unflushed_frames >= self.flush_interval:
+            self.unflushed_frames = 0
+            with self.flush_condition:
+                self.flush_requested = True
+                self.flush_condition.notify()
+
+    def _flush_loop(self):
+        """Flush the ring whenever the capture asks for it, until the buffer is closed."""
+        while True:
+            with self.flush_condition:
+                while not self.is_closed and not self.flush_requested:
+                    self.flush_condition.wait()
+                if self.is_closed:
+                    return
+                self.flush_requested = False
+            self.flush()
+
+    def _load_frame(self, position: int) -> np.ndarray:
+        """Return a view on the given slot, from the RAM window when the frame is recent enough."""
+        hot_index = self._hot_index(position)
+        if hot_index is not None:
+            return self.hot_buffer[hot_index]
+        return self.buffer[position]
+
+    def _clear_frames(self):
+        """The ring file is kept, only the RAM window and the saved state are reset."""
+        self.hot_head = 0
+
+    def clear(self):
+        """Clear the buffer and its metadata."""
+        super().clear()
+        self.meta["sequence"] = -1
+        self._write_state()
+
+    def _frames(self) -> np.ndarray:
+        """Return a view on the stored frames in slot order, mapped from the ring file."""
+        return self.buffer[:self.size]
+
+    def _pin_frame(self, position: int) -> np.ndarray:
+        """Snapshots reference the ring file, which is only overwritten at head position, rather than the RAM window."""
+        return self.buffer[position]
+
+    def write_slot(self) -> np.ndarray:
+        """Return the RAM window slot where the next frame can be decoded in place. The ring file slot is only written by commit_frame."""
+        with self.snapshots_lock:
+            self.write_in_progress = True
+        return self.hot_buffer[self.hot_head]
+
+    def flush(self):
+        """Write the dirty pages of the ring and metadata files to disk and save the buffer state. The files are synced with fsync, which
+            writes back the mapped pages too and unlike np.memmap.flush releases the GIL while it waits on the disk.
+        """
+        for path in (self.path, self.meta_path):
+            file_descriptor = os.open(path, os.O_RDWR)
+            try:
+                os.fsync(file_descriptor)
+            finally:
+                os.close(file_descriptor)
+        self._write_state()
+
+    def close(self):
+        """Stop the background flush and flush the ring a last time."""
+        with self.flush_condition:
+            if self.is_closed:
+                return
+            self.is_closed = True
+            self.flush_condition.notify()
+        self.flusher.join()
+        self.flush()
@@ -0,0 +1,221 @@
+from PySide6.QtCore import QThread, Signal, Qt, QMutex, QMutexLocker, QWaitCondition, QEvent, QObject, Slot
+from PySide6.QtGui import QPixmap, QImage
+from PySide6.QtWidgets import QLabel
+import math
+import cv2
+import numpy as np
+import PixelFormat
+from PipelineStats import PipelineStats
+
+LAYOUTS = ["grid", "2x2", "3x3", "4x4", "1+N"]
+
+def mosaic_tiles(layout: str, camera_count: int, width: int, height: int, spacing: int = 2) -> list[tuple[int, int, int, int]]:
+    """Return the x, y, width and height of the tile of every camera shown by a mosaic layout, cameras that don't fit are left out.
+
+        Arguments:
+        -layout (str): "grid" picks the smallest square grid holding every camera, "RxC" is a grid of R rows and C columns and "1+N"
+            shows the first camera large with the others along the right and bottom edges.
+        -camera_count (int): Number of cameras.
+        -width (int), height (int): Mosaic size.
+        -spacing (int): Pixels left between the tiles.
+    """
+    if layout == "1+N":
+        # The large tile spans (k - 1) x (k - 1) cells of a k x k grid, which leaves 2k - 1 small cells, k is at least 3
+        cells = 3
+        while 2 * cells - 1 < camera_count - 1:
+            cells += 1
+        positions = [(0, 0, cells - 1, cells - 1)]
+        positions += [(cells - 1, row, 1, 1) for row in range(cells - 1)]
+        positions += [(column, cells - 1, 1, 1) for column in range(cells)]
+        rows = columns = cells
+    else:
+        if layout == "grid":
+            columns = max(1, math.ceil(math.sqrt(camera_count)))
+            rows = max(1, math.ceil(camera_count / columns))
+        else:
+            rows, columns = (int(count) for count in layout.split("x"))
+        positions = [(index % columns, index // columns, 1, 1) for index in range(rows * columns)]
+
+    tiles = []
+    for column, row, column_span, row_span in positions[:camera_count]:
+        x0, x1 = column * width // columns, (column + column_span) * width // columns
+        y0, y1 = row * height // rows, (row + row_span) * height // rows
+        tiles.append((x0 + spacing // 2, y0 + spacing // 2, max(2, x1 - x0 - spacing), max(2, y1 - y0 - spacing)))
+    return tiles
+
+class MosaicRendererThread(QThread):
+    ''' QThread compositing the frames of every camera into one mosaic painted on a single QLabel, instead of a VideoRendererThread and
+        a label per camera. Each camera posts its frames in its own one-slot mailbox, the worker scales the new ones straight into their
+        tile of a preallocated mosaic (I420 frames are scaled plane by plane and only the tile is converted to BGR) and the GUI thread
+        paints the whole mosaic once. Two mosaics are kept: the worker composes one while the other waits to be painted, tiles without
+        a new frame are copied over from the last mosaic.
+    '''
+    frame_ready = Signal()
+
+    # BGR of the label background, #121414
+    BACKGROUND = (20, 20, 18)
+
+    def __init__(self, video_label: QLabel, camera_count: int, pixel_format: str = PixelFormat.BGR, stats: list[PipelineStats] = None,
+                 layout: str = "grid", parent=None):
+        '''Create the compositor.
+
+            Arguments:
+            -video_label (QLabel): Label the mosaic is painted on, the mosaic takes its size.
+            -camera_count (int): Number of cameras posting frames.
+            -pixel_format (str): Pixel format of the posted frames.
+            -stats (list): PipelineStats of every camera, or None.
+            -layout (str): One of LAYOUTS or "RxC", see mosaic_tiles.
+        '''
+        super().__init__(parent)
+        self.video_label = video_label
+        self.camera_count = camera_count
+        self.pixel_format = pixel_format
+        self.stats = stats
+        self.layout = layout
+        self.mutex = QMutex()
+        self.frame_posted = QWaitCondition()
+
+        # Flags
+        self.is_stopped = False
+        self.is_paint_pending = False
+
+        # Mailboxes, one per camera, and the capture and emit times of the frames in the mosaic waiting to be painted
+        self.posted_frames = [None] * camera_count
+        self.ready_times = [None] * camera_count
+        self.target_size = (video_label.width(), video_label.height())
+
+        # Mosaics, the worker composes mosaics[1 - front_index] while mosaics[front_index] is painted
+        self.mosaics = []
+        self.front_index = 0
+        self.tiles = []
+        self.scratch_frames = [None] * camera_count
+
+        video_label.installEventFilter(self)
+        self.frame_ready.connect(self.paint_frame, Qt.QueuedConnection)
+
+    def run(self):
+        ''' Overrided method from the QThread class. Composite the posted frames until the thread is stopped.'''
+        mosaic_key = None
+        while True:
+            with QMutexLocker(self.mutex):
+                while not any(frame is not None for frame in self.posted_frames) and not self.is_stopped:
+                    self.frame_posted.wait(self.mutex)
+                if self.is_stopped:
+                    break
+                posted_frames = self.posted_frames
+                self.posted_frames = [None] * self.camera_count
+                target_size = self.target_size
+                layout = self.layout
+
+            if mosaic_key != (target_size, layout):
+                mosaic_key = (target_size, layout)
+                self.allocate_mosaics(target_size, layout)
+
+            back_index = 1 - self.front_index
+            self.compose(self.mosaics[back_index], self.mosaics[self.front_index], posted_frames)
+
+            with QMutexLocker(self.mutex):
+                self.front_index = back_index
+                for camera_index, posted_frame in enumerate(posted_frames):
+                    if posted_frame is None:
+                        continue
+                    if self.ready_times[camera_index] is not None and self.stats is not None:
+                        self.stats[camera_index].increment("frames_superseded")
+                    self.ready_times[camera_index] = posted_frame[1:]
+                if self.is_paint_pending:
+                    continue
+                self.is_paint_pending = True
+            self.frame_ready.emit()
+
+    def allocate_mosaics(self, target_size: tuple[int, int], layout: str):
+        '''Allocate both mosaics at the label size and lay the tiles out. Mosaics are only replaced under the mutex, the GUI thread may
+            be painting the front one.
+        '''
+        width, height = max(2, target_size[0]), max(2, target_size[1])
+        mosaics = [np.empty((height, width, 3), dtype=np.uint8) for _ in range(2)]
+        for mosaic in mosaics:
+            mosaic[:] = self.BACKGROUND
+        tiles = mosaic_tiles(layout, self.camera_count, width, height)
+        with QMutexLocker(self.mutex):
+            self.mosaics = mosaics
+            self.tiles = tiles
+            self.scratch_frames = [None] * self.camera_count
+
+    def compose(self, mosaic: np.ndarray, last_mosaic: np.ndarray, posted_frames: list):
+        '''Write the posted frames in their tile of the mosaic, and copy the other tiles from the last mosaic.'''
+        for camera_index, (x, y, width, height) in enumerate(self.tiles):
+            tile = mosaic[y:y + height, x:x + width]
+            if posted_frames[camera_index] is None:
+                np.copyto(tile, last_mosaic[y:y + height, x:x + width])
+            else:
+                self.render_tile(camera_index, posted_frames[camera_index][0], tile)
+
+    def render_tile(self, camera_index: int, display_frame: np.ndarray, tile: np.ndarray):
+        '''Scale a frame to fit its tile, keeping its aspect ratio, and write it in the middle of the tile as BGR.'''
+        frame_width, frame_height = PixelFormat.frame_size(display_frame, self.pixel_format)
+        tile_height, tile_width = tile.shape[:2]
+        scale = min(tile_width / frame_width, tile_height / frame_height)
+        # Even sizes, I420 frames are scaled plane by plane
+        width, height = max(2, int(frame_width * scale) & ~1), max(2, int(frame_height * scale) & ~1)
+        x, y = (tile_width - width) // 2, (tile_height - height) // 2
+        destination = tile[y:y + height, x:x + width]
+        interpolation = cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR
+
+        if self.pixel_format == PixelFormat.I420:
+            scratch_frame = self.scratch_frames[camera_index]
+            if scratch_frame is None or scratch_frame.shape != PixelFormat.frame_shape(width, height, self.pixel_format):
+                scratch_frame = self.scratch_frames[camera_index] = np.empty(PixelFormat.frame_shape(width, height, self.pixel_format),
+                                                                             dtype=np.uint8)
+            PixelFormat.resize(display_frame, self.pixel_format, (width, height), dst=scratch_frame, interpolation=interpolation)
+            cv2.cvtColor(scratch_frame, cv2.COLOR_YUV2BGR_I420, dst=destination)
+        else:
+            PixelFormat.resize(display_frame, self.pixel_format, (width, height), dst=destination, interpolation=interpolation)
+
+    def post_frame(self, camera_index: int, display_frame: np.ndarray, capture_time: float = float("nan"), emit_time: float = None):
+        '''Post the frame of a camera, replacing its previous one if it wasn't composited yet. Connect it with a direct connection (e.g.
+            through functools.partial for the camera index) so it runs in the capture thread.
+        '''
+        with QMutexLocker(self.mutex):
+            if self.posted_frames[camera_index] is not None and self.stats is not None:
+                self.stats[camera_index].increment("frames_superseded")
+            self.posted_frames[camera_index] = (display_frame, capture_time, emit_time)
+            self.frame_posted.wakeOne()
+
+    @Slot()
+    def paint_frame(self):
+        '''Paint the last composited mosaic on the label. Runs on the GUI thread.'''
+        with QMutexLocker(self.mutex):
+            self.is_paint_pending = False
+            ready_times = self.ready_times
+            self.ready_times = [None] * self.camera_count
+            if not self.mosaics:
+                return
+            # Copied into the pixmap while the worker can't swap the mosaics
+            mosaic = self.mosaics[self.front_index]
+            height, width = mosaic.shape[:2]
+            q_image = QImage(mosaic.data, width, height, mosaic.strides[0], QImage.Format_BGR888)
+            pixmap = QPixmap.fromImage(q_image)
+        self.video_label.setPixmap(pixmap)
+
+        if self.stats is not None:
+            for camera_stats, times in zip(self.stats, ready_times):
+                if times is not None and times[1] is not None:
+                    camera_stats.record_display(*times)
+
+    def set_layout(self, layout: str):
+        '''Change the mosaic layout, from the next composited frame.'''
+        with QMutexLocker(self.mutex):
+            self.layout = layout
+
+    def eventFilter(self, watched: QObject, event: QEvent) -> bool:
+        '''Track the label size, the mosaic is allocated at it.'''
+        if watched is self.video_label and event.type() == QEvent.Resize:
+            with QMutexLocker(self.mutex):
+                self.target_size = (event.size().width(), event.size().height())
+        return super().eventFilter(watched, event)
+
+    def stop(self):
+        with QMutexLocker(self.mutex):
+            self.is_stopped = True
+            self.frame_posted.wakeAll()
+        self.wait()
@@ -0,0 +1,163 @@
+from bisect import bisect_right
+import json
+import math
+import os
+import time
+
+class LatencyHistogram:
+    """ Fixed-bucket latency histogram. Buckets are log spaced between 0.1 ms and 10 s, so recording a value is a bisect and an increment
+        and the memory never grows. Percentiles are estimated from the bucket upper edges.
+    """
+    EDGES_MS = [0.1 * 10 ** (exponent / 8) for exponent in range(41)]
+
+    def __init__(self):
+        self.counts = [0] * (len(self.EDGES_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, seconds: float):
+        """Record a latency given in seconds."""
+        milliseconds = seconds * 1000
+        self.counts[bisect_right(self.EDGES_MS, milliseconds)] += 1
+        self.count += 1
+        self.total_ms += milliseconds
+        if milliseconds > self.max_ms:
+            self.max_ms = milliseconds
+
+    def percentile(self, fraction: float) -> float:
+        """Return the estimated latency in milliseconds below which the given fraction of the recorded values falls."""
+        if self.count == 0:
+            return 0.0
+        threshold = fraction * self.count
+        cumulative = 0
+        for index, bucket_count in enumerate(self.counts):
+            cumulative += bucket_count
+            if cumulative >= threshold:
+                return self.EDGES_MS[index] if index < len(self.EDGES_MS) else self.max_ms
+        return self.max_ms
+
+    def snapshot(self) -> dict:
+        """Return the histogram summary and its non-empty buckets keyed by upper edge in milliseconds."""
+        return {"count": self.count,
+                "mean_ms": self.total_ms / self.count if self.count else 0.0,
+                "p50_ms": self.percentile(0.5), "p95_ms": self.percentile(0.95), "p99_ms": self.percentile(0.99),
+                "max_ms": self.max_ms,
+                "buckets": {(f"{self.EDGES_MS[index]:.3g}" if index < len(self.EDGES_MS) else "inf"): bucket_count
+                            for index, bucket_count in enumerate(self.counts) if bucket_count}}
+
+class PipelineStats:
+    """ Per-camera instrumentation of the capture -> buffer -> display/export pipeline. Each metric is only updated by one thread (the
+        capture thread, the GUI thread or an export thread) so no lock is taken on the hot path; snapshots read them without locking.
+        Attributes:
+            -name (str): Name of the camera.
+            -timestamps (dict): Monotonic time of the last frame that went through each stage.
+            -first_capture_time, first_display_time (float): Monotonic time the first frame was written in the buffer and painted, None until
+                then.
+            -histograms (dict): Latency histograms, "grab_to_write", "capture_to_emit", "emit_to_display", "capture_to_display" and
+                "capture_to_export".
+            -counters (dict): "frames_captured", "frames_emitted", "frames_displayed", "frames_exported", "missed_ticks" (ticks that arrived
+                while the previous frame was still being processed), "dropped_frames" (camera frames never grabbed) and "frames_superseded"
+                (emitted frames replaced in the renderer mailbox by a newer one before being rendered).
+    """
+    STAGES = ["grab", "write", "emit", "display", "export"]
+    HISTOGRAMS = ["grab_to_write", "capture_to_emit", "emit_to_display", "capture_to_display", "capture_to_export"]
+    COUNTERS = ["frames_captured", "frames_emitted", "frames_displayed", "frames_exported", "missed_ticks", "dropped_frames",
+                "frames_superseded"]
+
+    def __init__(self, name: str, fps: float = 0.0):
+        self.name = name
+        self.fps = fps
+        self.started_at = time.monotonic()
+        self.timestamps = dict.fromkeys(self.STAGES, 0.0)
+        self.histograms = {histogram: LatencyHistogram() for histogram in self.HISTOGRAMS}
+        self.counters = dict.fromkeys(self.COUNTERS, 0)
+        self.max_display_backlog = 0
+        self.first_capture_time = None
+        self.first_display_time = None
+
+    def record_capture(self, grab_time: float, write_time: float):
+        """Record a frame written in the buffer, estimating from the gap since the previous grab how many camera frames were skipped."""
+        previous_grab_time = self.timestamps["grab"]
+        if previous_grab_time and self.fps > 0:
+            skipped_frames = round((grab_time - previous_grab_time) * self.fps) - 1
+            if skipped_frames > 0:
+                self.counters["dropped_frames"] += skipped_frames
+        if self.first_capture_time is None:
+            self.first_capture_time = write_time
+        self.timestamps["grab"] = grab_time
+        self.timestamps["write"] = write_time
+        self.histograms["grab_to_write"].record(write_time - grab_time)
+        self.counters["frames_captured"] += 1
+
+    def restart_capture(self):
+        """Forget the previous grab when the capture stops writing in the buffer or resumes, e.g. around a playback, so the gap isn't
+            counted as dropped frames.
+        """
+        self.timestamps["grab"] = 0.0
+
+    def record_emit(self, capture_time: float, emit_time: float):
+        """Record a frame sent to the renderer. `capture_time` is NaN for frames replayed from the buffer, only live frames count for latency."""
+        self.timestamps["emit"] = emit_time
+        self.counters["frames_emitted"] += 1
+        if not math.isnan(capture_time):
+            self.histograms["capture_to_emit"].record(emit_time - capture_time)
+
+    def record_display(self, capture_time: float, emit_time: float):
+        """Record a frame painted on its label."""
+        display_time = time.monotonic()
+        if self.first_display_time is None:
+            self.first_display_time = display_time
+        self.timestamps["display"] = display_time
+        self.counters["frames_displayed"] += 1
+        self.histograms["emit_to_display"].record(display_time - emit_time)
+        if not math.isnan(capture_time):
+            self.histograms["capture_to_display"].record(display_time - capture_time)
+        backlog = self.display_backlog()
+        if backlog > self.max_display_backlog:
+            self.max_display_backlog = backlog
+
+    def record_export(self, capture_time: float):
+        """Record a frame written to a clip file."""
+        export_time = time.monotonic()
+        self.timestamps["export"] = export_time
+        self.counters["frames_exported"] += 1
+        self.histograms["capture_to_export"].record(export_time - capture_time)
+
+    def increment(self, counter: str, amount: int = 1):
+        """Increment one of the counters."""
+        self.counters[counter] += amount
+
+    def display_backlog(self) -> int:
+        """Return the number of frames emitted to the renderer and neither displayed nor superseded yet."""
+        return self.counters["frames_emitted"] - self.counters["frames_displayed"] - self.counters["frames_superseded"]
+
+    def snapshot(self) -> dict:
+        """Return all the metrics as a JSON serializable dict."""
+        uptime = time.monotonic() - self.started_at
+        return {"name": self.name, "uptime_s": uptime,
+                "capture_fps": self.counters["frames_captured"] / uptime if uptime > 0 else 0.0,
+                "display_fps": self.counters["frames_displayed"] / uptime if uptime > 0 else 0.0,
+                "display_backlog": self.display_backlog(), "max_display_backlog": self.max_display_backlog,
+                "counters": dict(self.counters), "timestamps": dict(self.timestamps),
+                "histograms": {name: histogram.snapshot() for name, histogram in self.histograms.items()}}
+
+    def summary(self) -> str:
+        """Return a one line summary for the stats overlay."""
+        capture_to_display = self.histograms["capture_to_display"]
+        uptime = max(time.monotonic() - self.started_at, 1e-9)
+        return (f"{self.name}: {self.counters['frames_captured'] / uptime:5.1f} fps | "
+                f"capture->display p50 {capture_to_display.percentile(0.5):6.1f} ms p95 {capture_to_display.percentile(0.95):6.1f} ms | "
+                f"missed ticks {self.counters['missed_ticks']} | dropped {self.counters['dropped_frames']} | "
+                f"superseded {self.counters['frames_superseded']} | "
+                f"backlog {self.display_backlog()}")
+
+def dump_stats(stats: list, path: str):
+    """Write the snapshot of every camera stats to a JSON file. The file is replaced atomically so readers never see a partial dump."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temporary_path = path + ".tmp"
+    with open(temporary_path, "w") as stats_file:
+        json.dump({"time": time.time(), "cameras": [camera_stats.snapshot() for camera_stats in stats]}, stats_file, indent=2)
+    os.replace(temporary_path, path)
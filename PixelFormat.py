@@ -0,0 +1,89 @@
+from typing import Optional
+import cv2
+import numpy as np
+
+# Pixel formats a CircularBuffer can store. BGR is what OpenCV captures and displays, I420 is planar YUV 4:2:0 which takes half the memory.
+BGR = "bgr"
+I420 = "i420"
+PIXEL_FORMATS = (BGR, I420)
+
+def check_pixel_format(pixel_format: str):
+    """Raise a ValueError if the pixel format isn't supported."""
+    if pixel_format not in PIXEL_FORMATS:
+        raise ValueError(f"Unknown pixel format '{pixel_format}', expected one of {PIXEL_FORMATS}")
+
+def frame_shape(width: int, height: int, pixel_format: str) -> tuple:
+    """Return the shape of a stored frame of the given size. I420 needs an even width and height."""
+    check_pixel_format(pixel_format)
+    if pixel_format == I420:
+        if width % 2 or height % 2:
+            raise ValueError(f"I420 frames need an even size, got {width}x{height}")
+        return (height * 3 // 2, width)
+    return (height, width, 3)
+
+def from_bgr(frame: np.ndarray, pixel_format: str, dst: Optional[np.ndarray] = None) -> np.ndarray:
+    """Convert a BGR frame to the given pixel format, writing into `dst` when given. BGR frames are returned (or copied into `dst`) as they are."""
+    if pixel_format == I420:
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2YUV_I420, dst=dst)
+    if dst is not None:
+        np.copyto(dst, frame)
+        return dst
+    return frame
+
+def to_bgr(frame: np.ndarray, pixel_format: str) -> np.ndarray:
+    """Convert a stored frame back to BGR for display or export. BGR frames are returned as they are."""
+    if pixel_format == I420:
+        return cv2.cvtColor(frame, cv2.COLOR_YUV2BGR_I420)
+    return frame
+
+def frame_size(frame: np.ndarray, pixel_format: str) -> tuple[int, int]:
+    """Return the width and height of the image held in a stored frame."""
+    if pixel_format == I420:
+        return frame.shape[1], frame.shape[0] * 2 // 3
+    return frame.shape[1], frame.shape[0]
+
+def crop(frame: np.ndarray, pixel_format: str, x: int, y: int, width: int, height: int) -> np.ndarray:
+    """Return a region of a stored frame, in the same pixel format. BGR regions are views of the frame. I420 regions are copied into a
+        new frame and aligned to even coordinates, since every chroma sample covers 2x2 pixels.
+    """
+    if pixel_format == I420:
+        frame_width, frame_height = frame_size(frame, pixel_format)
+        x, y = x & ~1, y & ~1
+        width, height = max(2, width & ~1), max(2, height & ~1)
+        chroma = frame[frame_height:].reshape(2, frame_height // 2, frame_width // 2)
+        region = np.empty((height * 3 // 2, width), dtype=frame.dtype)
+        region[:height] = frame[y:y + height, x:x + width]
+        region[height:].reshape(2, height // 2, width // 2)[:] = chroma[:, y // 2:(y + height) // 2, x // 2:(x + width) // 2]
+        return region
+    return frame[y:y + height, x:x + width]
+
+def resize_plane(image: np.ndarray, size: tuple[int, int], dst: Optional[np.ndarray] = None, interpolation: int = cv2.INTER_AREA) -> np.ndarray:
+    """Scale an image or a single plane, writing into `dst` when given. INTER_AREA downscales are done as 2x halvings, which OpenCV
+        runs on a fast path for integer factors, followed by an INTER_LINEAR pass of less than 2x: close to INTER_AREA at a fraction of
+        its cost for the arbitrary factors of labels and tiles.
+    """
+    if interpolation == cv2.INTER_AREA:
+        while image.shape[1] >= 2 * size[0] and image.shape[0] >= 2 * size[1]:
+            image = cv2.resize(image, (image.shape[1] // 2, image.shape[0] // 2), interpolation=cv2.INTER_AREA)
+        if (image.shape[1], image.shape[0]) != tuple(size):
+            interpolation = cv2.INTER_LINEAR
+    return cv2.resize(image, size, dst=dst, interpolation=interpolation)
+
+def resize(frame: np.ndarray, pixel_format: str, size: tuple[int, int], dst: Optional[np.ndarray] = None,
+           interpolation: int = cv2.INTER_AREA) -> np.ndarray:
+    """Scale a stored frame to the given width and height, in the same pixel format, writing into `dst` when given, see resize_plane.
+        I420 frames are scaled plane by plane so they're never converted, the size must be even.
+    """
+    if pixel_format == I420:
+        width, height = size
+        frame_width, frame_height = frame_size(frame, pixel_format)
+        if dst is None:
+            dst = np.empty(frame_shape(width, height, pixel_format), dtype=frame.dtype)
+        # The U and V planes follow the Y plane, each a quarter of its size
+        chroma = frame[frame_height:].reshape(2, frame_height // 2, frame_width // 2)
+        dst_chroma = dst[height:].reshape(2, height // 2, width // 2)
+        resize_plane(frame[:frame_height], size, dst=dst[:height], interpolation=interpolation)
+        for plane, dst_plane in zip(chroma, dst_chroma):
+            resize_plane(plane, (width // 2, height // 2), dst=dst_plane, interpolation=interpolation)
+        return dst
+    return resize_plane(frame, size, dst=dst, interpolation=interpolation)
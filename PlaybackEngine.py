@@ -0,0 +1,125 @@
+from PySide6.QtCore import QObject, Signal
+from typing import Optional
+import time
+
+class PlaybackEngine(QObject):
+    """ Variable speed playback of the camera buffers driven by a monotonic clock. The engine keeps a media time, a capture time of the
+        buffered frames, which advances by the elapsed clock time multiplied by the playback rate. At every display refresh each camera is
+        told the media time and shows the frame captured at that time, so the cameras stay aligned and timer jitter doesn't accumulate.
+        The media time loops over the buffered range of the first camera, in both directions.
+        Attributes:
+            -rate (float): Playback rate, negative values play in reverse.
+            -blend (bool): Blend the two frames around the media time when playing slower than real time.
+            -is_active (bool): The engine drives the displayed frames.
+            -is_playing (bool): The media time advances, it's frozen while paused or stepping.
+    """
+    RATES = [-1.0, 0.25, 0.5, 1.0, 2.0]
+
+    state_changed = Signal(float, bool)
+
+    def __init__(self, capture_threads: list = None, blend: bool = True, parent=None):
+        super().__init__(parent)
+        self.capture_threads = capture_threads if capture_threads is not None else []
+        self.blend = blend
+        self.rate = 1.0
+        self.is_active = False
+        self.is_playing = False
+        self.anchor_media_time = 0.0
+        self.anchor_clock = time.perf_counter()
+
+    def media_time(self) -> float:
+        """Return the media time at the current clock time."""
+        if not self.is_playing:
+            return self.anchor_media_time
+        return self.anchor_media_time + (time.perf_counter() - self.anchor_clock) * self.rate
+
+    def anchor(self, media_time: float):
+        """Restart the clock from the given media time."""
+        self.anchor_media_time = media_time
+        self.anchor_clock = time.perf_counter()
+
+    def time_range(self) -> Optional[tuple[float, float, float]]:
+        """Return the capture times of the oldest and newest frame of the first camera and its frame interval, None if it has no frames."""
+        if not self.capture_threads:
+            return None
+        time_range = self.capture_threads[0].get_time_range()
+        if time_range is None:
+            return None
+        return (*time_range, 1 / self.capture_threads[0].fps)
+
+    def start(self, rate: float = None):
+        """Play the buffers from their oldest frame, or their newest one in reverse."""
+        if rate is not None:
+            self.rate = rate
+        time_range = self.time_range()
+        if time_range is None:
+            return
+        self.anchor(time_range[0] if self.rate >= 0 else time_range[1])
+        self.is_active = True
+        self.is_playing = True
+        self.state_changed.emit(self.rate, self.is_playing)
+
+    def stop(self):
+        """Give the displayed frames back to the capture threads."""
+        self.is_active = False
+        self.is_playing = False
+        self.state_changed.emit(self.rate, self.is_playing)
+
+    def set_rate(self, rate: float):
+        """Change the playback rate without jumping, the clock restarts from the current media time."""
+        self.anchor(self.media_time())
+        self.rate = rate
+        self.state_changed.emit(self.rate, self.is_playing)
+
+    def change_rate(self, steps: int):
+        """Move the playback rate by the given number of steps through RATES."""
+        index = min(range(len(self.RATES)), key=lambda index: abs(self.RATES[index] - self.rate))
+        self.set_rate(self.RATES[max(0, min(len(self.RATES) - 1, index + steps))])
+
+    def pause(self):
+        self.anchor(self.media_time())
+        self.is_playing = False
+        self.state_changed.emit(self.rate, self.is_playing)
+
+    def resume(self):
+        self.anchor(self.media_time())
+        self.is_playing = True
+        self.state_changed.emit(self.rate, self.is_playing)
+
+    def toggle_pause(self):
+        if self.is_playing:
+            self.pause()
+        else:
+            self.resume()
+
+    def seek(self, media_time: float):
+        """Move the media time, keeping the playing state."""
+        self.anchor(media_time)
+
+    def step(self, frames: int):
+        """Pause and move by the given number of frames of the first camera, backwards for negative values."""
+        self.pause()
+        step_time = self.capture_threads[0].get_step_time(self.anchor_media_time, frames) if self.capture_threads else None
+        if step_time is not None:
+            # Half a frame past the reference frame, so the frames the other cameras grabbed a little later are shown with it
+            self.anchor(step_time + 0.5 / self.capture_threads[0].fps)
+
+    def update(self):
+        """Compute the media time for this display refresh, looping over the buffered range, and send it to every camera.
+            Frames are only blended in slow motion, stepping and pausing show whole frames.
+        """
+        if not self.is_active:
+            return
+        time_range = self.time_range()
+        if time_range is None:
+            return
+        oldest_time, newest_time, frame_interval = time_range
+        media_time = self.media_time()
+        if not oldest_time <= media_time <= newest_time:
+            span = newest_time - oldest_time + frame_interval
+            media_time = oldest_time + (media_time - oldest_time) % span
+            self.anchor(media_time)
+
+        blend = self.blend and self.is_playing and abs(self.rate) < 1
+        for thread in self.capture_threads:
+            thread.set_playback_time(media_time, blend)
@@ -0,0 +1,95 @@
+from typing import Optional
+import numpy as np
+from CircularBuffer import CircularBuffer
+
+class PreallocatedCircularBuffer(CircularBuffer):
+    """ CircularBuffer that stores every frame in a single contiguous block allocated up front. Writing a frame copies it into its slot
+        (or the capture decodes straight into it) so no memory is allocated or released while the buffer is running.
+        Frames returned by read_frame, peek_frame and get_buffer are views on the block and are overwritten when the head wraps around.
+        Attributes:
+            -frame_shape (tuple): Shape of a single frame, e.g. (1080, 1920, 3).
+            -dtype (np.dtype): Data type of the frame pixels.
+            -buffer (np.ndarray): The (capacity, *frame_shape) block used for storing frames.
+            -prefault (bool): Flag that touches every page of the block when it's allocated.
+    """
+    overwrites_in_place = True
+
+    def __init__(self, capacity: int, frame_shape: tuple, dtype: np.dtype = np.uint8, prefault: bool = True):
+        """Initialize the circular buffer allocating the storage for `capacity` frames of the given shape. With `prefault` off the pages
+            are only touched by prefault_frames, e.g. by the capture thread instead of the thread creating the buffer.
+        """
+        self.frame_shape = tuple(int(dimension) for dimension in frame_shape)
+        self.dtype = np.dtype(dtype)
+        self.write_in_progress = False
+        self.prefault = prefault
+        super().__init__(capacity)
+
+    def _allocate_frames(self, capacity: int) -> np.ndarray:
+        """Allocate the contiguous frame block and touch every page so the first wraparound doesn't page fault."""
+        block = np.empty((capacity, *self.frame_shape), dtype=self.dtype)
+        if self.prefault:
+            block.fill(0)
+        return block
+
+    def prefault_frames(self):
+        """Touch every page of a block allocated with `prefault` off, before the first frame is written. Releases the GIL while it runs."""
+        self.buffer.fill(0)
+        self.prefault = True
+
+    def _store_frame(self, position: int, frame: np.ndarray):
+        """Copy a frame into the given slot unless it has been decoded in place already."""
+        slot = self.buffer[position]
+        if not np.may_share_memory(frame, slot):
+            np.copyto(slot, frame)
+
+    def _load_frame(self, position: int) -> np.ndarray:
+        """Return a view on the given slot."""
+        return self.buffer[position]
+
+    def _clear_frames(self):
+        """The block is kept allocated, only the buffer size is reset."""
+        pass
+
+    def _resize_frames(self, new_capacity: int, positions: np.ndarray):
+        """Allocate a new block keeping the frames of the given slots, see CircularBuffer._resize_frames."""
+        new_buffer = self._allocate_frames(new_capacity)
+        new_buffer[:len(positions)] = self.buffer[positions]
+        self.buffer = new_buffer
+
+    def _frames(self) -> np.ndarray:
+        """Return a view on the stored frames in slot order."""
+        return self.buffer[:self.size]
+
+    def write_slot(self) -> np.ndarray:
+        """Return a view on the slot at head position. The caller can fill it in place (e.g. cv2.VideoCapture.read(image=slot))
+            and must then call commit_frame to step the head forward.
+        """
+        # Flagged before the slot is released so a snapshot taken in between leaves the slot out instead of pinning it undetached
+        with self.snapshots_lock:
+            self.write_in_progress = True
+        self._release_slot(self.head)
+        return self.buffer[self.head]
+
+    def commit_frame(self, frame: Optional[np.ndarray] = None, timestamp: Optional[float] = None):
+        """Step the head forward after write_slot has been filled. If the frame was decoded into a different array it's copied into the slot
+
+            Arguments:
+            -frame(np.ndarray): The frame returned by the decoder, None if it was written directly into the slot.
+            -timestamp(float): Monotonic capture time of the frame in seconds, the current time.monotonic() if None
+        """
+        if frame is not None:
+            self._release_slot(self.head)
+            self._store_frame(self.head, frame)
+        self._advance_head(timestamp)
+        self.write_in_progress = False
+
+    def snapshot(self, first_sequence: int, last_sequence: int):
+        """Pin a range of frames, see CircularBuffer.snapshot. The oldest frame is left out while write_slot is being filled over it."""
+        with self.snapshots_lock:
+            if self.write_in_progress and self.is_full():
+                first_sequence = max(first_sequence, int(self.sequence_numbers[self.head]) + 1)
+            return super().snapshot(first_sequence, last_sequence)
+
+    def nbytes(self) -> int:
+        """Return the size in bytes of the preallocated block."""
+        return self.buffer.nbytes
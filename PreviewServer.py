@@ -0,0 +1,264 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+from urllib.parse import urlsplit, parse_qsl
+import asyncio
+import threading
+import time
+import cv2
+import numpy as np
+import PixelFormat
+
+# Resolution (width, None keeps the camera one), JPEG quality and frame rate of the preview tiers
+TIERS = {"low": (320, 60, 10.0), "medium": (640, 75, 15.0), "high": (None, 85, 25.0)}
+SOURCES = ["display", "live"]
+
+class PreviewFeed:
+    ''' JPEG frames of one camera at one tier, encoded once and shared by every client watching them. The feed only runs while it has
+        clients: it reads the camera frame at the tier frame rate, encodes it in the worker pool when it's a new one and keeps the last
+        JPEG, and the clients each take the newest one when they're ready for it.
+        Attributes:
+            -jpeg (bytes): Last encoded frame, None until the first one.
+            -frame_id (int): Number of frames encoded, clients compare it to the one they sent last.
+            -capture_time (float): Capture time of the last encoded frame.
+    '''
+    # Seconds a feed keeps running after its last client left, so reconnecting clients don't wait for a new encoder
+    IDLE_SECONDS = 5.0
+
+    def __init__(self, capture_thread, source: str, tier: str):
+        self.capture_thread = capture_thread
+        self.source = source
+        self.width, self.quality, self.fps = TIERS[tier]
+        self.fps = min(self.fps, capture_thread.fps or self.fps)
+        self.jpeg = None
+        self.frame_id = 0
+        self.capture_time = None
+        self.clients = 0
+        self.last_client_time = time.monotonic()
+        self.frame_ready = asyncio.Condition()
+        self.task = None
+        self.frame = None
+
+    def read_frame(self) -> Optional[tuple[np.ndarray, float]]:
+        '''Copy the frame to preview out of the camera buffer, reusing the same array.'''
+        if self.source == "live":
+            result = self.capture_thread.read_latest_frame(self.frame)
+        else:
+            result = self.capture_thread.read_display_frame(self.frame)
+        if result is not None:
+            self.frame = result[0]
+        return result
+
+    def encode(self) -> Optional[tuple[bytes, float]]:
+        '''Read and encode the frame to preview, None if there is none or it's the frame encoded last. Runs in the worker pool.'''
+        if not self.capture_thread.isRunning():
+            return None
+        result = self.read_frame()
+        if result is None or result[1] == self.capture_time:
+            return None
+        frame, capture_time = result
+        pixel_format = self.capture_thread.pixel_format
+        frame_width, frame_height = PixelFormat.frame_size(frame, pixel_format)
+        if self.width is not None and self.width < frame_width:
+            size = (self.width & ~1, max(2, round(self.width * frame_height / frame_width / 2) * 2))
+            frame = PixelFormat.resize(frame, pixel_format, size)
+        ret, jpeg = cv2.imencode(".jpg", PixelFormat.to_bgr(frame, pixel_format), [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        return (jpeg.tobytes(), capture_time) if ret else None
+
+    async def run(self, pool: ThreadPoolExecutor):
+        '''Encode frames at the feed frame rate until the feed has been idle for IDLE_SECONDS.'''
+        loop = asyncio.get_running_loop()
+        interval = 1 / self.fps
+        next_time = loop.time()
+        while self.clients or time.monotonic() - self.last_client_time < self.IDLE_SECONDS:
+            try:
+                encoded = await loop.run_in_executor(pool, self.encode)
+            except Exception as err:
+                print(f"Preview of camera {self.capture_thread.capture_index} failed: {type(err).__name__}: {err}")
+                encoded = None
+            if encoded is not None:
+                async with self.frame_ready:
+                    self.jpeg, self.capture_time = encoded
+                    self.frame_id += 1
+                    self.frame_ready.notify_all()
+            # A late encode skips ticks instead of catching up
+            next_time = max(next_time + interval, loop.time())
+            await asyncio.sleep(next_time - loop.time())
+
+    async def next_frame(self, last_frame_id: int) -> tuple[int, bytes]:
+        '''Wait for a frame newer than the given one and return it with its id. Frames encoded meanwhile are skipped.'''
+        async with self.frame_ready:
+            await self.frame_ready.wait_for(lambda: self.frame_id > last_frame_id)
+            return self.frame_id, self.jpeg
+
+class PreviewServer:
+    ''' MJPEG over HTTP preview of the cameras, for other people in the room to watch the live or replayed frames in a browser. Frames
+        are copied out of the camera buffers (without taking the capture mutex with the "seqlock" buffer storage), encoded once per
+        camera, source and tier by a PreviewFeed and shared by all its clients. A client gets the newest frame each time its connection
+        has sent the previous one, so a slow client drops frames and never holds back the capture or the other clients.
+        Served by an asyncio loop in its own thread, with the encoding in a small worker pool:
+
+            GET /                                         index of the streams
+            GET /camera/<index>/stream?tier=low&source=display   multipart/x-mixed-replace MJPEG stream
+            GET /camera/<index>/snapshot?tier=high&source=live  single JPEG
+
+        "display" shows what the operator sees, the frame at the playback time during playback, "live" the newest buffered frame.
+    '''
+    # Bytes a client connection may have waiting to be sent, about one frame, before the client counts as slow
+    WRITE_BUFFER_BYTES = 256 * 1024
+
+    def __init__(self, capture_threads: Callable, host: str = "0.0.0.0", port: int = 8080, workers: int = 2):
+        '''Create the server, start() begins listening.
+
+            Arguments:
+            -capture_threads (Callable): Returns the list of the running capture threads, which can change over time.
+            -host (str), port (int): Address listened on, "0.0.0.0" serves the LAN. The previews have no authentication.
+            -workers (int): Threads encoding the frames.
+        '''
+        self.capture_threads = capture_threads
+        self.host = host
+        self.port = port
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="PreviewServer")
+        self.feeds = {}
+        self.loop = None
+        self.server = None
+        self.thread = None
+        self.is_listening = threading.Event()
+
+    def start(self):
+        '''Start the asyncio thread and wait until it listens.'''
+        self.thread = threading.Thread(target=self.run, name="PreviewServer", daemon=True)
+        self.thread.start()
+        self.is_listening.wait()
+        if self.server is None:
+            raise OSError(f"Preview server couldn't listen on {self.host}:{self.port}")
+        print(f"Preview server listening on http://{self.host}:{self.port}")
+
+    def run(self):
+        '''Entry point of the asyncio thread.'''
+        self.loop = asyncio.new_event_loop()
+        try:
+            self.server = self.loop.run_until_complete(asyncio.start_server(self.handle_connection, self.host, self.port))
+            # Port 0 picks a free port
+            self.port = self.server.sockets[0].getsockname()[1]
+        except OSError as err:
+            print(f"Error starting preview server on {self.host}:{self.port}: {err}")
+            self.server = None
+            self.is_listening.set()
+            return
+        self.is_listening.set()
+        self.loop.run_forever()
+        self.loop.close()
+
+    def feed(self, camera_index: int, source: str, tier: str) -> Optional[PreviewFeed]:
+        '''Return the feed of a camera, starting it if it isn't running. None if there is no such camera.'''
+        capture_threads = self.capture_threads()
+        if not 0 <= camera_index < len(capture_threads):
+            return None
+        key = (camera_index, source, tier)
+        feed = self.feeds.get(key)
+        # A feed of a capture thread that was replaced, or that stopped after going idle, is started again
+        if feed is None or feed.capture_thread is not capture_threads[camera_index] or feed.task.done():
+            feed = PreviewFeed(capture_threads[camera_index], source, tier)
+            feed.task = self.loop.create_task(feed.run(self.pool))
+            self.feeds[key] = feed
+        return feed
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        '''Serve one GET request, the stream runs until the client disconnects.'''
+        try:
+            request_line = (await reader.readline()).decode("latin-1").split()
+            while (await reader.readline()).strip():
+                pass
+            if len(request_line) != 3 or request_line[0] != "GET":
+                await self.respond(writer, 405, "text/plain", b"Only GET is supported")
+                return
+            url = urlsplit(request_line[1])
+            query = dict(parse_qsl(url.query))
+            parts = url.path.strip("/").split("/")
+            if url.path.strip("/") == "":
+                await self.respond(writer, 200, "text/html", self.index_page().encode())
+                return
+            source, tier = query.get("source", "display"), query.get("tier", "low")
+            if len(parts) != 3 or parts[0] != "camera" or not parts[1].isdigit() or parts[2] not in ("stream", "snapshot") \
+                    or source not in SOURCES or tier not in TIERS:
+                await self.respond(writer, 404, "text/plain", b"Not found")
+                return
+            feed = self.feed(int(parts[1]), source, tier)
+            if feed is None:
+                await self.respond(writer, 404, "text/plain", b"No such camera")
+                return
+
+            feed.clients += 1
+            try:
+                if parts[2] == "snapshot":
+                    _, jpeg = await asyncio.wait_for(feed.next_frame(feed.frame_id - 1 if feed.jpeg else 0), timeout=5)
+                    await self.respond(writer, 200, "image/jpeg", jpeg)
+                else:
+                    await self.stream(feed, reader, writer)
+            finally:
+                feed.clients -= 1
+                feed.last_client_time = time.monotonic()
+        except (ConnectionError, asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            # Cancelled by stop()
+            pass
+        finally:
+            writer.close()
+
+    async def stream(self, feed: PreviewFeed, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        '''Send the feed frames as a multipart MJPEG stream, each part the newest frame once the previous one has been sent. Ends when
+            the client disconnects, which is noticed even while the feed has no new frame, e.g. a paused playback.
+        '''
+        writer.transport.set_write_buffer_limits(high=self.WRITE_BUFFER_BYTES)
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: multipart/x-mixed-replace; boundary=frame\r\n"
+                     b"Cache-Control: no-cache\r\nConnection: close\r\n\r\n")
+        disconnected = asyncio.ensure_future(self.wait_disconnect(reader))
+        try:
+            frame_id = 0
+            while True:
+                next_frame = asyncio.ensure_future(feed.next_frame(frame_id))
+                await asyncio.wait({next_frame, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+                if disconnected.done():
+                    next_frame.cancel()
+                    return
+                frame_id, jpeg = next_frame.result()
+                writer.write(b"--frame\r\nContent-Type: image/jpeg\r\nContent-Length: " + str(len(jpeg)).encode() + b"\r\n\r\n"
+                             + jpeg + b"\r\n")
+                await writer.drain()
+        finally:
+            disconnected.cancel()
+
+    @staticmethod
+    async def wait_disconnect(reader: asyncio.StreamReader):
+        '''Return once the client closes the connection, a stream client sends nothing after its request.'''
+        try:
+            while await reader.read(4096):
+                pass
+        except ConnectionError:
+            pass
+
+    async def respond(self, writer: asyncio.StreamWriter, status: int, content_type: str, body: bytes):
+        reasons = {200: "OK", 404: "Not Found", 405: "Method Not Allowed"}
+        writer.write(f"HTTP/1.1 {status} {reasons[status]}\r\nContent-Type: {content_type}\r\nContent-Length: {len(body)}\r\n"
+                     f"Connection: close\r\n\r\n".encode("latin-1") + body)
+        await writer.drain()
+
+    def index_page(self) -> str:
+        links = []
+        for index in range(len(self.capture_threads())):
+            streams = " ".join(f'<a href="/camera/{index}/stream?tier={tier}">{tier}</a>' for tier in TIERS)
+            links.append(f'<li>Camera {index}: {streams} <a href="/camera/{index}/stream?tier=low&source=live">live</a></li>')
+        images = "".join(f'<img src="/camera/{index}/stream?tier=low" width="320">' for index in range(len(self.capture_threads())))
+        return f"<!DOCTYPE html><html><head><title>VAR preview</title></head><body><ul>{''.join(links)}</ul>{images}</body></html>"
+
+    def stop(self):
+        '''Stop listening, disconnect the clients and stop the encoders.'''
+        if self.loop is None or self.server is None:
+            return
+        def close():
+            self.server.close()
+            for task in asyncio.all_tasks(self.loop):
+                task.cancel()
+            self.loop.call_later(0.1, self.loop.stop)
+        self.loop.call_soon_threadsafe(close)
+        self.thread.join(timeout=5)
+        self.pool.shutdown(wait=True)
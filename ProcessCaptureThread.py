@@ -0,0 +1,88 @@
+from PySide6.QtCore import QMutexLocker
+import time
+import PixelFormat
+from VideoCaptureThread import VideoCaptureThread
+from CaptureProcess import CaptureProcess
+from SharedMemoryCircularBuffer import SharedMemoryCircularBuffer
+
+class ProcessCaptureThread(VideoCaptureThread):
+    ''' VideoCaptureThread whose camera is grabbed and decoded in a separate CaptureProcess, writing a SharedMemoryCircularBuffer.
+        The thread forwards every sync tick to the process and, once the frame is committed, reads the ring through zero-copy views for
+        display, playback, peeking and export exactly like a local buffer. Only the ticks and their answers cross the process boundary.
+    '''
+    def __init__(self, buffer_size: int, capture_index: int = None, source: str = "camera", pixel_format: str = PixelFormat.BGR,
+                 source_options: dict = None, proxy_width: int = 160, proxy_settle_time: float = 0.15, activity_width: int = 64,
+                 frame_source: CaptureProcess = None, parent=None):
+        '''Start the capture process and map its ring.
+
+            Arguments:
+            -buffer_size (int): The ring size in frames.
+            -capture_index (int): Index of the camera.
+            -source (str): "camera", "synthetic" or a video file path, opened in the capture process, see create_frame_source.
+            -pixel_format (str): Pixel format of the buffered frames, "bgr" or "i420".
+            -source_options (dict): Other arguments of create_frame_source, e.g. width, height or realtime.
+            -proxy_width, proxy_settle_time, activity_width: See VideoCaptureThread.
+            -frame_source (CaptureProcess): Capture process already started, e.g. opened along with the other cameras by
+                open_frame_sources. By default one is started for `source`.
+            -parent: Parent QObject.
+        '''
+        super().__init__(buffer_size, capture_index=capture_index, buffer_storage="shared", pixel_format=pixel_format,
+                         frame_source=frame_source or CaptureProcess(source, capture_index, pixel_format, **(source_options or {})),
+                         proxy_width=proxy_width, proxy_settle_time=proxy_settle_time, activity_width=activity_width, parent=parent)
+
+    def create_buffer(self, buffer_size: int) -> SharedMemoryCircularBuffer:
+        '''Create the shared ring and let the capture process attach to it.'''
+        frame_shape = PixelFormat.frame_shape(int(self.width), int(self.height), self.pixel_format)
+        buffer = SharedMemoryCircularBuffer(buffer_size, frame_shape=frame_shape)
+        self.video_capture.attach(buffer)
+        return buffer
+
+    def run(self):
+        ''' Overrided method from the VideoCaptureThread class. Every tick makes the capture process write the next frame in the ring, the
+            thread only waits for it (without holding the GIL) and then emits the frame to display.
+        '''
+        while True:
+
+            with QMutexLocker(self.mutex):
+                while self.pending_ticks == 0 and not self.is_stopped:
+                    self.sync_condition.wait(self.mutex)
+                if self.is_stopped:
+                    break
+                if self.pending_ticks > 1:
+                    self.stats.increment("missed_ticks", self.pending_ticks - 1)
+                self.pending_ticks = 0
+                is_playback = self.is_playback
+                if not is_playback:
+                    position = self.buffer.head_position()
+                    # The process overwrites the head slot in place, snapshots pinning it get their copy first
+                    self.buffer.prepare_remote_write()
+
+            ret, capture_time, write_time = self.video_capture.tick(is_playback)
+            proxy = activity = None
+            if ret and not is_playback:
+                frame = self.buffer.peek_frame(position)
+                proxy = self.make_proxy(frame, is_playback)
+                activity = self.measure_activity(frame, proxy, is_playback)
+            elif is_playback:
+                self.measure_activity(None, None, is_playback)
+
+            with QMutexLocker(self.mutex):
+                if not is_playback:
+                    self.buffer.finish_remote_write()
+                if not ret:
+                    raise Exception("ERROR: Couldn't read from the capture process")
+                if not is_playback:
+                    self.stats.record_capture(capture_time, write_time)
+                    if proxy is not None:
+                        self.proxies.store(position, proxy, self.buffer.position_sequence(position))
+                    if activity is not None:
+                        self.activity.store(position, activity, self.buffer.position_sequence(position))
+                    if self.recorder is not None:
+                        self.recorder.push_frame(frame, capture_time)
+                display_frame, capture_time, head_position, tail_position = self.next_display_frame()
+
+            # Emitting the frame to display, the buffer positions are sampled by the GUI at its refresh rate (see UIStatePublisher)
+            emit_time = time.monotonic()
+            self.stats.record_emit(capture_time, emit_time)
+            self.buffer_positions = (head_position, tail_position)
+            self.display_frame.emit(display_frame, capture_time, emit_time)
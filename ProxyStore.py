@@ -0,0 +1,46 @@
+from typing import Optional
+import numpy as np
+import PixelFormat
+
+class ProxyStore:
+    """ Low-resolution proxies of the frames of a CircularBuffer, one per buffer slot, stored in a single preallocated block.
+        Proxies are kept in the buffer pixel format so they go through the same render path as the full frames. An I420 proxy is
+        built by downscaling each plane separately, the full frame is never converted.
+        Attributes:
+            -proxy_width, proxy_height (int): Proxy size, even and with the aspect ratio of the frames.
+            -proxies (np.ndarray): Proxy of every slot.
+            -sequence_numbers (np.ndarray): Sequence number of the frame each proxy was built from, -1 for empty slots.
+    """
+    def __init__(self, capacity: int, width: int, height: int, pixel_format: str = PixelFormat.BGR, proxy_width: int = 160):
+        """Allocate the proxies of a buffer of the given capacity holding frames of the given size."""
+        if not isinstance(proxy_width, int) or proxy_width <= 0:
+            raise ValueError("Proxy width must be a positive integer.")
+
+        self.width = int(width)
+        self.height = int(height)
+        self.pixel_format = pixel_format
+        self.proxy_width = max(2, proxy_width - proxy_width % 2)
+        self.proxy_height = max(2, 2 * round(self.proxy_width * self.height / self.width / 2))
+        self.proxies = np.zeros((capacity, *PixelFormat.frame_shape(self.proxy_width, self.proxy_height, pixel_format)), dtype=np.uint8)
+        self.sequence_numbers = np.full(capacity, -1, dtype=np.int64)
+
+    def make_proxy(self, frame: np.ndarray, dst: Optional[np.ndarray] = None) -> np.ndarray:
+        """Downscale a frame to a proxy, writing into `dst` when given."""
+        if dst is None:
+            dst = np.empty(self.proxies.shape[1:], dtype=np.uint8)
+        return PixelFormat.resize(frame, self.pixel_format, (self.proxy_width, self.proxy_height), dst=dst)
+
+    def store(self, position: int, proxy: np.ndarray, sequence_number: int):
+        """Store the proxy of the frame written in the given buffer slot."""
+        np.copyto(self.proxies[position], proxy)
+        self.sequence_numbers[position] = sequence_number
+
+    def get(self, position: int, sequence_number: Optional[int]) -> Optional[np.ndarray]:
+        """Return the proxy of a buffer slot, None if it wasn't built from the frame with the given sequence number (the frame now in the slot)."""
+        if sequence_number is None or not 0 <= position < len(self.proxies) or self.sequence_numbers[position] != sequence_number:
+            return None
+        return self.proxies[position]
+
+    def clear(self):
+        """Invalidate every proxy."""
+        self.sequence_numbers.fill(-1)
@@ -0,0 +1,317 @@
+from PySide6.QtCore import QThread, Signal
+from concurrent.futures import ThreadPoolExecutor
+from bisect import bisect_left, bisect_right
+from typing import Optional
+import glob
+import itertools
+import json
+import os
+import queue
+import shutil
+import subprocess
+import threading
+import time
+import cv2
+import numpy as np
+import PixelFormat
+
+# Clip ids are shared by the recorders of every camera, so a clip id identifies one clip across cameras
+clip_ids = itertools.count()
+
+class Segment:
+    """ A closed segment file of the recording.
+        Attributes:
+            -number (int): Segment number, increasing in recording order.
+            -filename (str): Path of the segment file.
+            -capture_times (np.ndarray): Monotonic capture time of every frame of the segment, in order.
+            -size (int): Size of the file in bytes.
+    """
+    def __init__(self, number: int, filename: str, capture_times: list):
+        self.number = number
+        self.filename = filename
+        self.capture_times = np.array(capture_times, dtype=np.float64)
+        self.size = os.path.getsize(filename)
+
+    @property
+    def start_time(self) -> float:
+        return float(self.capture_times[0])
+
+    @property
+    def end_time(self) -> float:
+        return float(self.capture_times[-1])
+
+class ClipRequest:
+    """ A clip waiting for the segments covering its time range to be closed. """
+    def __init__(self, clip_id: int, start_time: float, end_time: float, filename: str):
+        self.clip_id = clip_id
+        self.start_time = start_time
+        self.end_time = end_time
+        self.filename = filename
+
+class SegmentRecorderThread(QThread):
+    """ Continuous background recording of a camera to short fixed-length segment files on disk, with a rolling retention limit.
+        Every segment is a separate file, so it starts on a keyframe, and the default MJPG codec makes every frame a keyframe. Clips are
+        cut from the segments covering their time range by copying the encoded streams with ffmpeg, so nothing is re-encoded.
+        Without ffmpeg on the PATH a clip is a folder referencing its segments with hard links, with an ffconcat playlist of the exact cut.
+        Segments left over from a previous run are deleted on start, their monotonic capture times aren't comparable across runs.
+    """
+    clip_finished = Signal(int, str)
+    clip_failed = Signal(int, str)
+
+    def __init__(self, capture_index: int, width: int, height: int, fps: float, pixel_format: str = PixelFormat.BGR,
+                 path: str = "recording", segment_seconds: float = 2.0, retention_seconds: float = 600.0, max_bytes: int = None,
+                 encoding: str = "MJPG", queue_size: int = 25, parent=None):
+        super().__init__(parent)
+        '''Set up the recording folder of the camera. The recording starts with the thread.
+
+            Arguments:
+            -capture_index (int): Index of the recorded camera, the segments are written in path/capture_<index>.
+            -width, height (int): Frame size.
+            -fps (float): Frame rate the segments are written at.
+            -pixel_format (str): Pixel format of the frames pushed by the capture thread.
+            -path (str): Folder of the recordings.
+            -segment_seconds (float): Length of a segment.
+            -retention_seconds (float): Recording time kept on disk, older segments are deleted.
+            -max_bytes (int): Optional limit of the size of the segments kept on disk.
+            -encoding (str): FourCC of the segment codec, keep an intra-only codec such as MJPG for frame accurate cuts.
+            -queue_size (int): Number of frames waiting to be encoded. Frames pushed from a preallocated buffer are views of its slots, so
+                it must stay below the buffer capacity.
+        '''
+        self.capture_index = capture_index
+        self.width = int(width)
+        self.height = int(height)
+        self.fps = fps
+        self.pixel_format = pixel_format
+        self.path = os.path.join(path, f"capture_{capture_index}")
+        self.segment_frames = max(1, round(segment_seconds * fps))
+        self.retention_seconds = retention_seconds
+        self.max_bytes = max_bytes
+        self.fourcc = cv2.VideoWriter_fourcc(*encoding)
+        self.ffmpeg = shutil.which("ffmpeg")
+
+        self.frames = queue.Queue(maxsize=queue_size)
+        self.dropped_frames = 0
+        self.writer = None
+        self.segment_number = 0
+        self.segment_filename = None
+        self.segment_times = []
+        self.segments = []
+        self.pinned_segments = {}
+        self.segments_lock = threading.Lock()
+
+        self.pending_clips = []
+        self.clips_lock = threading.Lock()
+        self.extractor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"SegmentExtractor{capture_index}")
+
+        os.makedirs(self.path, exist_ok=True)
+
+    def push_frame(self, frame: np.ndarray, capture_time: float):
+        '''Queue a captured frame for recording. Called by the capture thread, it never blocks: the frame is dropped if the queue is full.'''
+        try:
+            self.frames.put_nowait((frame, capture_time))
+        except queue.Full:
+            self.dropped_frames += 1
+
+    def request_clip(self, start_time: float, end_time: float, filename: str) -> int:
+        '''Queue the extraction of a clip and return its id. The clip is cut as soon as the segments covering it are closed, the open
+            segment is closed early if needed. clip_finished or clip_failed is emitted with the clip id, unique across the recorders of
+            every camera, once it's done.
+
+            Arguments:
+            -start_time, end_time (float): Monotonic capture times of the first and last frame of the clip, None for the oldest recorded
+                frame and for now.
+            -filename (str): Path of the clip file.
+        '''
+        clip = ClipRequest(next(clip_ids), float("-inf") if start_time is None else start_time,
+                           time.monotonic() if end_time is None else end_time, filename)
+        with self.clips_lock:
+            self.pending_clips.append(clip)
+        return clip.clip_id
+
+    def run(self):
+        ''' Overrided method from the QThread class. Encode the queued frames to the current segment until the thread is stopped,
+            starting a new segment every `segment_frames` frames.
+        '''
+        self.remove_stale_segments()
+        while True:
+            item = self.frames.get()
+            if item is None:
+                break
+            frame, capture_time = item
+
+            if self.writer is None:
+                self.open_segment()
+            self.writer.write(PixelFormat.to_bgr(frame, self.pixel_format))
+            self.segment_times.append(capture_time)
+            del frame, item
+
+            ready_clips = self.ready_clips(capture_time)
+            if ready_clips or len(self.segment_times) >= self.segment_frames:
+                self.close_segment()
+            for clip in ready_clips:
+                self.dispatch_clip(clip)
+
+        self.close_segment()
+        for clip in self.ready_clips(float("inf")):
+            self.dispatch_clip(clip)
+        self.extractor.shutdown(wait=True)
+
+    def stop(self):
+        '''Close the current segment, cut the clips still pending and wait for the thread to finish.'''
+        self.frames.put(None)
+        self.wait()
+
+    def remove_stale_segments(self):
+        '''Delete the segments and the index left over from a previous run.'''
+        for filename in glob.glob(os.path.join(self.path, "segment_*.avi")) + glob.glob(os.path.join(self.path, "index.json")):
+            try:
+                os.remove(filename)
+            except OSError as err:
+                print(f"Error removing stale segment {filename}: {err}")
+
+    def open_segment(self):
+        '''Start a new segment file.'''
+        self.segment_filename = os.path.join(self.path, f"segment_{self.segment_number:06d}.avi")
+        self.writer = cv2.VideoWriter(self.segment_filename, self.fourcc, self.fps, (self.width, self.height))
+        if not self.writer.isOpened():
+            raise cv2.error(f"Couldn't open segment {self.segment_filename} for writing")
+        self.segment_times = []
+
+    def close_segment(self):
+        '''Finish the current segment, add it to the recording and apply the retention limit.'''
+        if self.writer is None:
+            return
+        self.writer.release()
+        self.writer = None
+        segment = Segment(self.segment_number, self.segment_filename, self.segment_times)
+        self.segment_number += 1
+
+        with self.segments_lock:
+            self.segments.append(segment)
+            self.apply_retention()
+            self.write_index()
+
+    def apply_retention(self):
+        '''Delete the oldest segments past the retention limits. Segments used by a clip being cut are kept until it's done.'''
+        while len(self.segments) > 1:
+            oldest = self.segments[0]
+            recorded_seconds = self.segments[-1].end_time - oldest.start_time
+            recorded_bytes = sum(segment.size for segment in self.segments)
+            if recorded_seconds <= self.retention_seconds and (self.max_bytes is None or recorded_bytes <= self.max_bytes):
+                break
+            if self.pinned_segments.get(oldest.number):
+                break
+            try:
+                os.remove(oldest.filename)
+            except OSError as err:
+                print(f"Error removing segment {oldest.filename}: {err}")
+            self.segments.pop(0)
+
+    def write_index(self):
+        '''Save the list of the recorded segments next to them. The file is replaced atomically so readers never see a partial index.'''
+        index = {"fps": self.fps, "width": self.width, "height": self.height,
+                 "segments": [{"filename": os.path.basename(segment.filename), "start_time": segment.start_time,
+                               "end_time": segment.end_time, "frames": len(segment.capture_times)} for segment in self.segments]}
+        index_path = os.path.join(self.path, "index.json")
+        try:
+            with open(index_path + ".tmp", "w") as index_file:
+                json.dump(index, index_file)
+            os.replace(index_path + ".tmp", index_path)
+        except OSError as err:
+            print(f"Error writing segment index {index_path}: {err}")
+
+    def ready_clips(self, capture_time: float) -> list[ClipRequest]:
+        '''Remove and return the pending clips ending before the given capture time.'''
+        with self.clips_lock:
+            ready_clips = [clip for clip in self.pending_clips if clip.end_time <= capture_time]
+            self.pending_clips = [clip for clip in self.pending_clips if clip.end_time > capture_time]
+        return ready_clips
+
+    def dispatch_clip(self, clip: ClipRequest):
+        '''Pin the segments covering the clip and cut it in the extractor thread.'''
+        with self.segments_lock:
+            segments = [segment for segment in self.segments if segment.end_time >= clip.start_time and segment.start_time <= clip.end_time]
+            for segment in segments:
+                self.pinned_segments[segment.number] = self.pinned_segments.get(segment.number, 0) + 1
+        self.extractor.submit(self.extract_clip, clip, segments)
+
+    def unpin_segments(self, segments: list[Segment]):
+        with self.segments_lock:
+            for segment in segments:
+                self.pinned_segments[segment.number] -= 1
+                if not self.pinned_segments[segment.number]:
+                    del self.pinned_segments[segment.number]
+
+    def extract_clip(self, clip: ClipRequest, segments: list[Segment]):
+        '''Cut the clip from its segments and report the outcome.'''
+        try:
+            if not segments:
+                raise ValueError("no recorded frames in the requested range")
+            entries = self.concat_entries(segments, clip.start_time, clip.end_time)
+            if self.ffmpeg:
+                filename = self.concatenate_segments(entries, clip.filename)
+            else:
+                filename = self.link_segments(entries, clip.filename)
+        except (OSError, ValueError, subprocess.CalledProcessError) as err:
+            self.clip_failed.emit(clip.clip_id, f"{clip.filename}: {err}")
+        else:
+            self.clip_finished.emit(clip.clip_id, filename)
+        finally:
+            self.unpin_segments(segments)
+
+    def concat_entries(self, segments: list[Segment], start_time: float, end_time: float) -> list[tuple[str, Optional[float], Optional[float]]]:
+        '''Return the segment files of a clip with the in and out points, in seconds, of the cut in the first and last one.
+            The segments are written at a constant frame rate, so the frame index gives its time in the file.
+        '''
+        entries = []
+        for index, segment in enumerate(segments):
+            inpoint = outpoint = None
+            if index == 0:
+                first_frame = bisect_left(segment.capture_times, start_time)
+                inpoint = first_frame / self.fps if first_frame else None
+            if index == len(segments) - 1:
+                last_frame = bisect_right(segment.capture_times, end_time)
+                outpoint = last_frame / self.fps if last_frame < len(segment.capture_times) else None
+            entries.append((segment.filename, inpoint, outpoint))
+        return entries
+
+    def write_concat_list(self, entries: list, list_filename: str, relative: bool = False):
+        '''Write an ffconcat playlist of the clip entries.'''
+        with open(list_filename, "w") as list_file:
+            list_file.write("ffconcat version 1.0\n")
+            for filename, inpoint, outpoint in entries:
+                path = os.path.basename(filename) if relative else os.path.abspath(filename)
+                list_file.write("file '{}'\n".format(path.replace("'", "'\\''")))
+                if inpoint is not None:
+                    list_file.write(f"inpoint {inpoint:.6f}\n")
+                if outpoint is not None:
+                    list_file.write(f"outpoint {outpoint:.6f}\n")
+
+    def concatenate_segments(self, entries: list, filename: str) -> str:
+        '''Cut the clip with ffmpeg, copying the encoded streams without re-encoding.'''
+        list_filename = filename + ".ffconcat"
+        self.write_concat_list(entries, list_filename)
+        try:
+            subprocess.run([self.ffmpeg, "-y", "-loglevel", "error", "-f", "concat", "-safe", "0", "-i", list_filename, "-c", "copy", filename],
+                           check=True, capture_output=True)
+        finally:
+            os.remove(list_filename)
+        return filename
+
+    def link_segments(self, entries: list, filename: str) -> str:
+        '''Reference the clip segments from a folder named after the clip, with hard links (copies across file systems), and an ffconcat
+            playlist of the exact cut.
+        '''
+        folder = os.path.splitext(filename)[0]
+        os.makedirs(folder, exist_ok=True)
+        linked_entries = []
+        for segment_filename, inpoint, outpoint in entries:
+            linked_filename = os.path.join(folder, os.path.basename(segment_filename))
+            if not os.path.exists(linked_filename):
+                try:
+                    os.link(segment_filename, linked_filename)
+                except OSError:
+                    shutil.copyfile(segment_filename, linked_filename)
+            linked_entries.append((linked_filename, inpoint, outpoint))
+        self.write_concat_list(linked_entries, os.path.join(folder, "clip.ffconcat"), relative=True)
+        return folder
@@ -0,0 +1,167 @@
+from typing import Optional
+import time
+import numpy as np
+from PreallocatedCircularBuffer import PreallocatedCircularBuffer
+
+class SeqlockCircularBuffer(PreallocatedCircularBuffer):
+    """ PreallocatedCircularBuffer for one writer and any number of readers that don't take the writer's lock. Every slot has a version
+        counter, a seqlock: the writer makes it odd before it touches the slot and even again once the frame, its capture time and its
+        sequence number are written. A reader copies the slot and checks that the version was even and didn't change meanwhile: a torn
+        copy is retried, a slot that holds another frame by then is reported as overwritten. The head, size and next sequence number are
+        published together in a single tuple assignment after every write, so readers always see a consistent set.
+        Writing (write_slot/commit_frame/write_frame) is unchanged for the capture thread. Only the read_* and copy_range methods are
+        lock-free, every other method still needs the caller's lock.
+        Attributes:
+            -slot_versions (np.ndarray): Seqlock version of every slot, odd while the slot is being written.
+            -published (tuple): Head, size and next sequence number after the last completed write.
+            -torn_reads (int): Copies retried because the writer changed the slot during the copy.
+    """
+    # Reads giving up after this many torn copies or in-progress writes, the caller sees the frame as missing
+    MAX_READ_RETRIES = 100
+
+    def __init__(self, capacity: int, frame_shape: tuple, dtype: np.dtype = np.uint8, prefault: bool = True):
+        """Initialize the circular buffer allocating the storage for `capacity` frames of the given shape, see PreallocatedCircularBuffer."""
+        super().__init__(capacity, frame_shape, dtype, prefault)
+        self.slot_versions = np.zeros(capacity, dtype=np.int64)
+        self.published = (0, 0, 0)
+        self.torn_reads = 0
+
+    def _begin_write(self, position: int):
+        if self.slot_versions[position] % 2 == 0:
+            self.slot_versions[position] += 1
+
+    def _end_write(self, position: int):
+        if self.slot_versions[position] % 2 == 1:
+            self.slot_versions[position] += 1
+        self.published = (self.head, self.size, self.next_sequence)
+
+    def write_frame(self, frame: np.ndarray, timestamp: Optional[float] = None):
+        """Write a frame at head position and step forward, see CircularBuffer.write_frame."""
+        position = self.head
+        self._begin_write(position)
+        super().write_frame(frame, timestamp)
+        self._end_write(position)
+
+    def write_slot(self) -> np.ndarray:
+        """Return a view on the slot at head position to fill in place, see PreallocatedCircularBuffer.write_slot. Readers of the frame
+            it held see it as overwritten from now on.
+        """
+        slot = super().write_slot()
+        self._begin_write(self.head)
+        return slot
+
+    def commit_frame(self, frame: Optional[np.ndarray] = None, timestamp: Optional[float] = None):
+        """Step the head forward after write_slot has been filled, see PreallocatedCircularBuffer.commit_frame."""
+        position = self.head
+        self._begin_write(position)
+        super().commit_frame(frame, timestamp)
+        self._end_write(position)
+
+    def clear(self):
+        """Clear the buffer. Readers must not be running."""
+        super().clear()
+        self.slot_versions += self.slot_versions % 2
+        self.published = (self.head, self.size, self.next_sequence)
+
+    def _resize_frames(self, new_capacity: int, positions: np.ndarray):
+        """Resize the frame block and the slot versions. Readers must not be running."""
+        super()._resize_frames(new_capacity, positions)
+        self.slot_versions = np.zeros(new_capacity, dtype=np.int64)
+
+    def resize(self, new_capacity: int):
+        """Resize the buffer, see CircularBuffer.resize. Readers must not be running."""
+        super().resize(new_capacity)
+        self.published = (self.head, self.size, self.next_sequence)
+
+    def sequence_range(self) -> Optional[tuple[int, int]]:
+        """Return the sequence numbers of the oldest and newest published frames, None if the buffer is empty. Lock-free."""
+        _, size, next_sequence = self.published
+        if size == 0:
+            return None
+        return next_sequence - size, next_sequence - 1
+
+    def read_sequence(self, sequence_number: int, out: Optional[np.ndarray] = None) -> Optional[tuple[np.ndarray, float]]:
+        """Copy the frame with the given sequence number without locking. Returns the copy and its capture time, None if the frame isn't
+            in the buffer: not written yet, or overwritten before or while it was copied.
+
+            Arguments:
+            -sequence_number (int): Sequence number of the frame.
+            -out (np.ndarray): Array of the frame shape to copy into, a new one is allocated if None.
+        """
+        head, size, next_sequence = self.published
+        if not next_sequence - size <= sequence_number < next_sequence:
+            return None
+        position = (head - (next_sequence - sequence_number)) % self.capacity
+        if out is None:
+            out = np.empty(self.frame_shape, dtype=self.dtype)
+
+        for _ in range(self.MAX_READ_RETRIES):
+            version = self.slot_versions[position]
+            if version % 2 == 1:
+                # The writer is filling the slot, the frame is gone unless it's the one being written
+                if self.sequence_numbers[position] == sequence_number:
+                    return None
+                time.sleep(0)
+                continue
+            if self.sequence_numbers[position] != sequence_number:
+                return None
+            np.copyto(out, self.buffer[position])
+            timestamp = float(self.timestamps[position])
+            if self.slot_versions[position] == version:
+                return out, timestamp
+            self.torn_reads += 1
+        return None
+
+    def read_latest(self, out: Optional[np.ndarray] = None) -> Optional[tuple[np.ndarray, float, int]]:
+        """Copy the newest frame without locking. Returns the copy, its capture time and its sequence number, None if the buffer is empty."""
+        for _ in range(self.MAX_READ_RETRIES):
+            sequence_range = self.sequence_range()
+            if sequence_range is None:
+                return None
+            result = self.read_sequence(sequence_range[1], out)
+            if result is not None:
+                return result[0], result[1], sequence_range[1]
+        return None
+
+    def read_at_time(self, timestamp: float, out: Optional[np.ndarray] = None) -> Optional[tuple[np.ndarray, float, int]]:
+        """Copy the last frame captured at or before the given time (the oldest one for earlier times) without locking. Returns the copy,
+            its capture time and its sequence number, None if the buffer is empty.
+        """
+        for _ in range(self.MAX_READ_RETRIES):
+            head, size, next_sequence = self.published
+            if size == 0:
+                return None
+            # Binary search over the published frames, a slot rewritten meanwhile fails the copy below and the search is repeated
+            low, high = next_sequence - size, next_sequence
+            while low < high:
+                middle = (low + high) // 2
+                if self.timestamps[(head - (next_sequence - middle)) % self.capacity] <= timestamp:
+                    low = middle + 1
+                else:
+                    high = middle
+            sequence_number = max(low - 1, next_sequence - size)
+            result = self.read_sequence(sequence_number, out)
+            if result is not None:
+                return result[0], result[1], sequence_number
+        return None
+
+    def copy_range(self, first_sequence: int, out: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Copy consecutive frames starting at the given sequence number into `out` without locking, e.g. for an export. Frames the
+            writer overwrites before they are copied are skipped. Returns the sequence numbers and capture times of the copied frames,
+            which `out` holds from index 0.
+
+            Arguments:
+            -first_sequence (int): Sequence number of the first frame, frames older than the oldest buffered one are skipped.
+            -out (np.ndarray): (count, *frame_shape) array receiving the frames.
+        """
+        sequence_numbers, capture_times = [], []
+        sequence_range = self.sequence_range()
+        if sequence_range is not None:
+            sequence_number = max(first_sequence, sequence_range[0])
+            while len(sequence_numbers) < len(out) and sequence_number < self.published[2]:
+                result = self.read_sequence(sequence_number, out[len(sequence_numbers)])
+                if result is not None:
+                    sequence_numbers.append(sequence_number)
+                    capture_times.append(result[1])
+                sequence_number += 1
+        return np.array(sequence_numbers, dtype=np.int64), np.array(capture_times, dtype=np.float64)
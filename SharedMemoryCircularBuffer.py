@@ -0,0 +1,118 @@
+from multiprocessing import shared_memory
+import numpy as np
+from PreallocatedCircularBuffer import PreallocatedCircularBuffer
+
+class SharedMemoryCircularBuffer(PreallocatedCircularBuffer):
+    """ PreallocatedCircularBuffer whose frames and metadata live in a multiprocessing.shared_memory segment, so a capture process can
+        write the ring while the GUI process reads it through zero-copy views. The segment holds a header with head, size and next_sequence,
+        the per-slot timestamps and sequence numbers, then the frame block; every process mapping it sees the same buffer state.
+        The tail stays local to each process. Only one process writes: the GUI process creates the segment and maps the frames read-only,
+        the capture process attaches to it by name and writes.
+        Attributes:
+            -name (str): Name of the shared memory segment.
+            -is_owner (bool): The segment was created by this buffer, which unlinks it on close.
+    """
+    HEADER_FIELDS = ["head", "size", "next_sequence"]
+    # Every process maps the segment with the layout it was created with
+    is_resizable = False
+
+    def __init__(self, capacity: int, frame_shape: tuple, name: str = None, dtype: np.dtype = np.uint8):
+        """Create a new shared ring, or attach to the one with the given name which must have the same capacity, frame shape and dtype."""
+        self.name = name
+        self.is_owner = name is None
+        self.segment = None
+        super().__init__(capacity, frame_shape, dtype)
+
+        header_bytes = len(self.HEADER_FIELDS) * 8
+        self.timestamps = np.ndarray((capacity,), dtype=np.float64, buffer=self.segment.buf, offset=header_bytes)
+        self.sequence_numbers = np.ndarray((capacity,), dtype=np.int64, buffer=self.segment.buf, offset=header_bytes + capacity * 8)
+        if self.is_owner:
+            self.timestamps.fill(0)
+            self.sequence_numbers.fill(-1)
+            self.buffer.flags.writeable = False
+
+    @staticmethod
+    def segment_size(capacity: int, frame_shape: tuple, dtype: np.dtype) -> int:
+        """Return the size in bytes of the shared segment of a ring."""
+        return 8 * (len(SharedMemoryCircularBuffer.HEADER_FIELDS) + 2 * capacity) + capacity * int(np.prod(frame_shape)) * np.dtype(dtype).itemsize
+
+    def _allocate_frames(self, capacity: int) -> np.ndarray:
+        """Create or attach the shared segment and return the frame block mapped in it. A new segment is touched like the preallocated block."""
+        size = self.segment_size(capacity, self.frame_shape, self.dtype)
+        if self.is_owner:
+            self.segment = shared_memory.SharedMemory(create=True, size=size)
+            self.name = self.segment.name
+        else:
+            self.segment = shared_memory.SharedMemory(name=self.name)
+            if self.segment.size < size:
+                raise ValueError(f"Shared ring {self.name} is smaller than a ring of {capacity} frames of shape {self.frame_shape}")
+
+        self.header = np.ndarray((len(self.HEADER_FIELDS),), dtype=np.int64, buffer=self.segment.buf)
+        block = np.ndarray((capacity, *self.frame_shape), dtype=self.dtype, buffer=self.segment.buf,
+                           offset=8 * (len(self.HEADER_FIELDS) + 2 * capacity))
+        if self.is_owner:
+            self.header.fill(0)
+            block.fill(0)
+        return block
+
+    # Buffer state shared by every process mapping the ring
+    @property
+    def head(self) -> int:
+        return int(self.header[0])
+
+    @head.setter
+    def head(self, value: int):
+        self.header[0] = value
+
+    @property
+    def size(self) -> int:
+        return int(self.header[1])
+
+    @size.setter
+    def size(self, value: int):
+        self.header[1] = value
+
+    @property
+    def next_sequence(self) -> int:
+        return int(self.header[2])
+
+    @next_sequence.setter
+    def next_sequence(self, value: int):
+        self.header[2] = value
+
+    def clear(self):
+        """Clear the buffer. Only the writing process may clear it."""
+        if self.is_owner:
+            raise PermissionError("The shared ring is written by the capture process")
+        super().clear()
+
+    def prepare_remote_write(self):
+        """Called by the reading process before letting the writer fill the head slot: the frames pinned there by snapshots are copied
+            out, and new snapshots leave the slot out until finish_remote_write.
+        """
+        self._release_slot(self.head)
+        self.write_in_progress = True
+
+    def finish_remote_write(self):
+        """Called by the reading process once the writer has committed the frame."""
+        self.write_in_progress = False
+
+    def close(self):
+        """Unmap the segment, and remove it if this buffer created it. The buffer can't be used afterwards."""
+        if self.segment is None:
+            return
+        self.buffer = None
+        self.timestamps = self.sequence_numbers = np.zeros(0)
+        self.header = np.zeros(len(self.HEADER_FIELDS), dtype=np.int64)
+        try:
+            self.segment.close()
+        except BufferError:
+            # Views still exported (e.g. a frame held by the renderer), the mapping goes away with them
+            pass
+        if self.is_owner:
+            self.segment.unlink()
+        self.segment = None
+
+    def nbytes(self) -> int:
+        """Return the size in bytes of the shared segment."""
+        return self.segment.size if self.segment is not None else 0
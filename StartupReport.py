@@ -0,0 +1,86 @@
+from typing import Optional
+import json
+import os
+import time
+from PipelineStats import PipelineStats
+
+class StartupReport:
+    """ Startup timeline of the application, from its launch to the first frame of every camera, so the startup time can be tracked across
+        versions and camera setups. Phases are marked as they end and every camera reports how long it took to open; once all the cameras
+        have a first frame the report is printed and appended as one JSON line to a history file.
+        All times are on the monotonic clock of PipelineStats and reported in seconds since the launch.
+        Attributes:
+            -launch_time (float): Monotonic time the application was launched.
+            -phases (dict): Monotonic time each phase ended, e.g. "ui_loaded", "start_requested", "cameras_opened", "capture_started".
+            -open_seconds (dict): Seconds each camera took to open, by camera index.
+            -first_frame_times (dict): Monotonic time of the first frame of each camera, by camera index.
+            -is_finished (bool): Flag set once every camera had its first frame.
+    """
+    def __init__(self, launch_time: float = None):
+        self.launch_time = launch_time if launch_time is not None else time.monotonic()
+        self.phases = {}
+        self.open_seconds = {}
+        self.first_frame_times = {}
+        self.is_finished = False
+
+    def mark(self, phase: str):
+        """Record the end of a startup phase."""
+        self.phases[phase] = time.monotonic()
+
+    def camera_opened(self, capture_index: int, seconds: float):
+        """Record the time a camera took to open."""
+        self.open_seconds[capture_index] = seconds
+
+    def update(self, stats: list[PipelineStats], stage: str = "display") -> bool:
+        """Record the first frame of the cameras that got one and return True the first time every camera has one.
+
+            Arguments:
+            -stats (list): Stats of every camera, in camera order.
+            -stage (str): "display" waits for the first frame painted, "capture" for the first frame buffered, e.g. without a window.
+        """
+        if self.is_finished or not stats:
+            return False
+        for capture_index, camera_stats in enumerate(stats):
+            first_time = camera_stats.first_display_time if stage == "display" else camera_stats.first_capture_time
+            if first_time is not None:
+                self.first_frame_times[capture_index] = first_time
+        self.is_finished = len(self.first_frame_times) == len(stats)
+        return self.is_finished
+
+    def elapsed(self, monotonic_time: Optional[float]) -> Optional[float]:
+        """Return the seconds from the launch to a monotonic time."""
+        return None if monotonic_time is None else round(monotonic_time - self.launch_time, 4)
+
+    def snapshot(self) -> dict:
+        """Return the report as a JSON serializable dict."""
+        first_frame = max(self.first_frame_times.values()) if self.is_finished else None
+        start_requested = self.phases.get("start_requested")
+        # Excludes the time the operator took to press Start
+        start_to_first_frame = None
+        if first_frame is not None and start_requested is not None:
+            start_to_first_frame = round(first_frame - start_requested, 4)
+        return {"time": time.time(),
+                "launch_to_first_frame_s": self.elapsed(first_frame),
+                "start_to_first_frame_s": start_to_first_frame,
+                "phases": {phase: self.elapsed(phase_time) for phase, phase_time in self.phases.items()},
+                "cameras": [{"index": capture_index, "open_s": round(self.open_seconds.get(capture_index, 0.0), 4),
+                             "first_frame_s": self.elapsed(self.first_frame_times.get(capture_index))}
+                            for capture_index in sorted(set(self.open_seconds) | set(self.first_frame_times))]}
+
+    def summary(self) -> str:
+        """Return a one line summary of the report."""
+        report = self.snapshot()
+        phases = " | ".join(f"{phase} {seconds:.2f}s" for phase, seconds in report["phases"].items())
+        cameras = ", ".join(f"{camera['index']}: {camera['open_s']:.2f}s" for camera in report["cameras"])
+        first_frame = report["launch_to_first_frame_s"]
+        return (f"Startup: {phases} | camera open {cameras} | first frame "
+                + (f"{first_frame:.2f}s after launch" if first_frame is not None else "pending")
+                + (f", {report['start_to_first_frame_s']:.2f}s after start" if report["start_to_first_frame_s"] is not None else ""))
+
+    def save(self, path: str):
+        """Append the report as one JSON line to the history file at the given path."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "a") as history_file:
+            history_file.write(json.dumps(self.snapshot()) + "\n")
@@ -0,0 +1,17 @@
+from PySide6.QtCore import Qt
+from PySide6.QtWidgets import QLabel, QWidget
+
+class StatsOverlay(QLabel):
+    """ Semi-transparent label drawn over the main window showing the PipelineStats summary of every camera. """
+    def __init__(self, parent: QWidget):
+        super().__init__(parent)
+        self.setStyleSheet("background-color: rgba(0, 0, 0, 160); color: #ededed; font-family: monospace; font-size: 11px; padding: 4px;")
+        self.setAttribute(Qt.WA_TransparentForMouseEvents)
+        self.move(10, 10)
+        self.hide()
+
+    def update_stats(self, stats: list):
+        """Show one summary line per camera."""
+        self.setText("\n".join(camera_stats.summary() for camera_stats in stats))
+        self.adjustSize()
+        self.raise_()
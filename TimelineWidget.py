@@ -1,8 +1,17 @@
-from PySide6.QtCore import Qt, QRectF, Signal
-from PySide6.QtGui import QPainter, QPen
+from PySide6.QtCore import Qt, QRectF, Signal, QEvent
+from PySide6.QtGui import QPainter, QPen, QImage, QPixmap, QColor
 from PySide6.QtWidgets import QWidget, QVBoxLayout, QGraphicsView, QGraphicsScene
+from typing import Optional
+import cv2
+import numpy as np
 
 class TimelineWidget(QWidget):
+    ''' Timeline of the buffer drawn as a filmstrip: the proxies of the buffered frames are laid along it at the position of their slot,
+        with an activity heatmap along the bottom, the bookmarked and exported ranges and the head and tail cursors of every camera on
+        top. Positions are buffer slots, like the playback and write sliders.
+        The scene items are created once and each layer is only refilled when its data changes: moving the cursors at the display refresh
+        rate just moves their items, and the view repaints the strips they cross.
+    '''
     cursor_positions_changed = Signal(int, int)
 
     def __init__(self, range_max, parent=None):
@@ -11,45 +20,205 @@ class TimelineWidget(QWidget):
         self.range_max = range_max
         self.head_position = 0
         self.tail_position = 0
+        self.camera_positions = []
+        self.thumbnails = []
+        self.bookmark_ranges = []
+        self.export_ranges = []
+        self.activity = None
+        self.timeline_height = 54
+        self.heatmap_height = 6
+        self.export_height = 4
+        # Activity score drawn at full heat, a fifth of the picture changing
+        self.heatmap_scale = 0.2
 
         self.init_ui()
 
     def init_ui(self):
         layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
 
         self.timeline_view = QGraphicsView()
         self.timeline_scene = QGraphicsScene()
         self.timeline_view.setScene(self.timeline_scene)
+        self.timeline_view.setRenderHint(QPainter.SmoothPixmapTransform)
+        self.timeline_view.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.timeline_view.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.timeline_view.setFixedHeight(self.timeline_height + 4)
+        self.timeline_view.setAlignment(Qt.AlignLeft | Qt.AlignTop)
+        # Everything is laid out again when the viewport width changes
+        self.timeline_view.viewport().installEventFilter(self)
 
         layout.addWidget(self.timeline_view)
 
         self.setStyleSheet("background-color: #333;")
 
+        # Persistent items, stacked filmstrip < heatmap < ranges < frame < cursors
+        self.filmstrip_item = self.timeline_scene.addPixmap(QPixmap())
+        self.heatmap_item = self.timeline_scene.addPixmap(QPixmap())
+        self.heatmap_item.setZValue(1)
+        self.bookmark_items = []
+        self.bookmark_marker_items = []
+        self.export_items = []
+        self.frame_item = self.timeline_scene.addRect(QRectF(), QPen(Qt.white))
+        self.frame_item.setZValue(3)
+        self.head_items = []
+        self.tail_items = []
+
+    def position_x(self, position: int) -> float:
+        '''Return the x coordinate of a buffer slot on the timeline.'''
+        return position / max(self.range_max, 1) * self.timeline_view.viewport().width()
+
+    def thumbnail_count(self) -> int:
+        '''Return the number of thumbnails that fit side by side in the timeline, for 16:9 frames.'''
+        return max(1, self.timeline_view.viewport().width() // (self.timeline_height * 16 // 9))
 
     def update_timeline(self):
-        self.timeline_scene.clear()
-
-        # Draw the timeline
-        pen = QPen(Qt.SolidLine)
-        pen.setColor(Qt.white)
-
-        timeline_height = 30
-        timeline_rect = QRectF(0, 0, self.width(), timeline_height)
-        self.timeline_scene.addRect(timeline_rect, pen)
-
-        # Draw the head cursor
-        head_rect = QRectF(self.head_position, 0, 2, timeline_height)
-        self.timeline_scene.addRect(head_rect, pen)
-
-        # Draw the tail cursor
-        tail_rect = QRectF(self.tail_position, 0, 2, timeline_height)
-        self.timeline_scene.addRect(tail_rect, pen)
-
-        self.timeline_view.setSceneRect(self.timeline_scene.itemsBoundingRect())
-
-    def set_cursor_positions(self, head_position, tail_position):
-        if head_position != self.head_position or tail_position != self.tail_position:
-            self.head_position = head_position
-            self.tail_position = tail_position
+        '''Lay out every layer again, when the timeline width or its range changed.'''
+        timeline_rect = QRectF(0, 0, self.timeline_view.viewport().width(), self.timeline_height)
+        self.frame_item.setRect(timeline_rect)
+        self.timeline_view.setSceneRect(timeline_rect)
+        self.draw_filmstrip()
+        self.draw_heatmap()
+        self.draw_ranges()
+        self.draw_cursors()
+
+    def eventFilter(self, watched, event) -> bool:
+        if watched is self.timeline_view.viewport() and event.type() == QEvent.Resize:
             self.update_timeline()
+        return super().eventFilter(watched, event)
+
+    def draw_filmstrip(self):
+        '''Paint the thumbnails in the filmstrip pixmap, every thumbnail fills the timeline up to the next one.'''
+        width = max(1, self.timeline_view.viewport().width())
+        filmstrip = QPixmap(width, self.timeline_height)
+        filmstrip.fill(QColor(51, 51, 51))
+        painter = QPainter(filmstrip)
+        for index, (position, thumbnail) in enumerate(self.thumbnails):
+            if index + 1 < len(self.thumbnails):
+                next_position = self.thumbnails[index + 1][0]
+            else:
+                next_position = min(self.range_max, position + self.range_max / self.thumbnail_count())
+            height, thumbnail_width = thumbnail.shape[:2]
+            q_image = QImage(thumbnail.data, thumbnail_width, height, thumbnail.strides[0], QImage.Format_BGR888)
+            span_width = max(1, round(self.position_x(next_position) - self.position_x(position)))
+            pixmap = QPixmap.fromImage(q_image).scaled(span_width, self.timeline_height, Qt.KeepAspectRatioByExpanding,
+                                                       Qt.SmoothTransformation)
+            painter.drawPixmap(round(self.position_x(position)), 0, pixmap, 0, 0, span_width, self.timeline_height)
+        painter.end()
+        self.filmstrip_item.setPixmap(filmstrip)
+
+    def draw_heatmap(self):
+        '''Paint the activity heatmap, one column per slot stretched over the timeline, slots without a score are left dark.'''
+        if self.activity is None or not len(self.activity):
+            self.heatmap_item.hide()
+            return
+        heat = (np.clip(np.nan_to_num(self.activity, nan=0.0) / self.heatmap_scale, 0, 1) * 255).astype(np.uint8)
+        heatmap = cv2.applyColorMap(heat[np.newaxis], cv2.COLORMAP_INFERNO)
+        heatmap[0, np.isnan(self.activity)] = (40, 40, 40)
+        q_image = QImage(heatmap.data, heatmap.shape[1], 1, heatmap.strides[0], QImage.Format_BGR888)
+        width = max(1, round(self.position_x(len(self.activity))))
+        self.heatmap_item.setPixmap(QPixmap.fromImage(q_image).scaled(width, self.heatmap_height, Qt.IgnoreAspectRatio,
+                                                                      Qt.FastTransformation))
+        self.heatmap_item.setPos(0, self.timeline_height - self.heatmap_height)
+        self.heatmap_item.show()
+
+    def range_rects(self, ranges: list[tuple[int, int]], y: float, height: float) -> list[QRectF]:
+        '''Return the rectangles covering slot ranges, a range wrapping around the end of the buffer takes two.'''
+        rects = []
+        for start_position, end_position in ranges:
+            parts = [(start_position, end_position)] if start_position <= end_position else [(start_position, self.range_max), (0, end_position)]
+            for part_start, part_end in parts:
+                x = self.position_x(part_start)
+                rects.append(QRectF(x, y, max(2, self.position_x(part_end) - x), height))
+        return rects
+
+    def set_rect_items(self, items: list, rects: list[QRectF], color: QColor, z: float):
+        '''Show one rectangle item per rect, reusing the items already in the scene and hiding the ones left over.'''
+        while len(items) < len(rects):
+            item = self.timeline_scene.addRect(QRectF(), QPen(Qt.NoPen), color)
+            item.setZValue(z)
+            items.append(item)
+        for item, rect in zip(items, rects):
+            item.setRect(rect)
+            item.show()
+        for item in items[len(rects):]:
+            item.hide()
+
+    def draw_ranges(self):
+        '''Lay out the bookmarked ranges, with a marker at their start, and the exported ranges along the top.'''
+        self.set_rect_items(self.bookmark_items, self.range_rects(self.bookmark_ranges, 0, self.timeline_height), QColor(255, 160, 0, 70), 2)
+        markers = [QRectF(self.position_x(start_position), 0, 2, self.timeline_height) for start_position, _ in self.bookmark_ranges]
+        self.set_rect_items(self.bookmark_marker_items, markers, QColor(255, 160, 0), 2)
+        self.set_rect_items(self.export_items, self.range_rects(self.export_ranges, 0, self.export_height), QColor(60, 200, 120), 2)
+
+    def draw_cursors(self):
+        '''Move the head and tail cursors of every camera, each camera in its own lane of the timeline height.'''
+        count = len(self.camera_positions)
+        if len(self.head_items) != count:
+            for item in self.head_items + self.tail_items:
+                self.timeline_scene.removeItem(item)
+            lane_height = self.timeline_height / max(count, 1)
+            self.head_items = [self.timeline_scene.addRect(QRectF(0, 0, 2, lane_height), QPen(Qt.red)) for _ in range(count)]
+            self.tail_items = [self.timeline_scene.addRect(QRectF(0, 0, 2, lane_height), QPen(Qt.white)) for _ in range(count)]
+            for item in self.head_items + self.tail_items:
+                item.setZValue(4)
+        lane_height = self.timeline_height / max(count, 1)
+        for lane, (head_position, tail_position) in enumerate(self.camera_positions):
+            self.head_items[lane].setPos(self.position_x(head_position), lane * lane_height)
+            self.tail_items[lane].setPos(self.position_x(tail_position), lane * lane_height)
+
+    def set_thumbnails(self, thumbnails: list[tuple[int, np.ndarray]]):
+        '''Replace the filmstrip thumbnails.
+
+            Arguments:
+            -thumbnails (list): (slot, BGR proxy) pairs sorted by slot.
+        '''
+        self.thumbnails = thumbnails
+        self.draw_filmstrip()
+
+    def set_bookmarks(self, bookmark_ranges: list[tuple[int, int]]):
+        '''Replace the bookmark markers.
+
+            Arguments:
+            -bookmark_ranges (list): (first slot, last slot) of every bookmark in the buffer.
+        '''
+        if bookmark_ranges != self.bookmark_ranges:
+            self.bookmark_ranges = bookmark_ranges
+            self.draw_ranges()
+
+    def set_exports(self, export_ranges: list[tuple[int, int]]):
+        '''Replace the exported range markers.
+
+            Arguments:
+            -export_ranges (list): (first slot, last slot) of every exported range still in the buffer.
+        '''
+        if export_ranges != self.export_ranges:
+            self.export_ranges = export_ranges
+            self.draw_ranges()
+
+    def set_activity(self, activity: Optional[np.ndarray]):
+        '''Replace the activity heatmap.
+
+            Arguments:
+            -activity (np.ndarray): Activity score of every slot, NaN for slots without one. None hides the heatmap.
+        '''
+        self.activity = activity
+        self.draw_heatmap()
+
+    def set_camera_positions(self, camera_positions: list[tuple[int, int]]):
+        '''Move the cursors to the buffer positions of every camera.
+
+            Arguments:
+            -camera_positions (list): (head slot, tail slot) of every camera, the first camera drives cursor_positions_changed.
+        '''
+        if camera_positions == self.camera_positions:
+            return
+        self.camera_positions = list(camera_positions)
+        self.draw_cursors()
+        if self.camera_positions and self.camera_positions[0] != (self.head_position, self.tail_position):
+            self.head_position, self.tail_position = self.camera_positions[0]
             self.cursor_positions_changed.emit(self.head_position, self.tail_position)
+
+    def set_cursor_positions(self, head_position, tail_position):
+        '''Move the cursors of the first camera.'''
+        self.set_camera_positions([(head_position, tail_position)] + self.camera_positions[1:])
@@ -0,0 +1,47 @@
+from PySide6.QtCore import QObject, QTimer, Signal, Slot
+from PySide6.QtGui import QGuiApplication
+
+class UIStatePublisher(QObject):
+    ''' Publishes the buffer positions of every camera to the GUI in one batched update per display refresh. The capture threads only
+        store their positions (VideoCaptureThread.buffer_positions), a timer on the GUI thread samples all of them and emits
+        state_updated when one changed, instead of every camera signalling its head and tail across threads on every frame.
+        Attributes:
+            -interval (int): Sampling interval in milliseconds.
+            -positions (list): (head, tail) of every camera at the last update.
+    '''
+    state_updated = Signal(list)
+
+    def __init__(self, interval: int = None, parent=None):
+        '''
+            Arguments:
+            -interval (int): Sampling interval in milliseconds, by default one refresh of the primary screen.
+            -parent: Parent QObject.
+        '''
+        super().__init__(parent)
+        if interval is None:
+            screen = QGuiApplication.primaryScreen()
+            refresh_rate = screen.refreshRate() if screen is not None else 0
+            interval = round(1000 / (refresh_rate if refresh_rate > 0 else 60))
+        self.interval = max(1, interval)
+        self.capture_threads = []
+        self.positions = []
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.publish)
+
+    def start(self, capture_threads: list):
+        '''Start sampling the given capture threads.'''
+        self.capture_threads = capture_threads
+        self.positions = []
+        self.timer.start(self.interval)
+
+    def stop(self):
+        self.timer.stop()
+        self.capture_threads = []
+
+    @Slot()
+    def publish(self):
+        '''Sample the positions of every camera and emit them if they changed since the last update.'''
+        positions = [thread.buffer_positions for thread in self.capture_threads]
+        if positions != self.positions:
+            self.positions = positions
+            self.state_updated.emit(positions)
@@ -3,25 +3,71 @@ import cv2
 import numpy as np
 import threading
 from CircularBuffer import CircularBuffer
+from PreallocatedCircularBuffer import PreallocatedCircularBuffer
+from SeqlockCircularBuffer import SeqlockCircularBuffer
+from MemmapCircularBuffer import MemmapCircularBuffer
+from EncodedCircularBuffer import EncodedCircularBuffer
+from FrameSource import FrameSource, CameraFrameSource
+import PixelFormat
+from PipelineStats import PipelineStats
+from BufferSnapshot import BufferSnapshot
+from SegmentRecorderThread import SegmentRecorderThread
+from ProxyStore import ProxyStore
+from ActivityIndex import ActivityIndex
 import time
+import os
+from typing import Optional
 
 class VideoCaptureThread(QThread):
-    display_frame = Signal(np.ndarray)
-    head_position_updated = Signal(int)
-    tail_position_updated = Signal(int)
+    display_frame = Signal(np.ndarray, float, float)
 
-    def __init__(self, buffer_size: int, capture_index: int = None, parent=None):
+    def __init__(self, buffer_size: int, capture_index: int = None, buffer_storage: str = "deque", buffer_path: str = "buffer",
+                 pixel_format: str = PixelFormat.BGR, capture_mode: str = "grab",
+                 frame_source: FrameSource = None, proxy_width: int = 160, proxy_settle_time: float = 0.15, activity_width: int = 64,
+                 static_quality: int = None, parent=None):
         super().__init__()
         '''QThread that processes frame from a VideoCapture by writing and reading a CircularBuffer and emits them on the GUI.
         
             Arguments:
             -buffer_size (int): The CircularBuffer size in frames.
             -capture_index (int): VideoCapture index to a specific webcam
+            -buffer_storage (str): "deque" stores every frame as a separate array, "preallocated" stores them in a single block allocated up front,
+                "memmap" stores them in a ring file on disk that is reopened on the next start, "encoded" stores them JPEG encoded in RAM,
+                "seqlock" preallocates them like "preallocated" and lets read_latest_frame, read_frame_at and get_capture_data copy frames
+                without taking the mutex.
+            -buffer_path (str): Folder of the ring files used by the "memmap" buffer storage.
+            -pixel_format (str): Pixel format of the buffered frames, "bgr" or "i420". I420 frames take half the memory and are converted
+                back to BGR only when they are displayed or exported.
+            -capture_mode (str): "grab" grabs and decodes the frame outside the mutex, locking it only to update the buffer, "read" reads
+                the frame while holding the mutex.
+            -frame_source (FrameSource): Source of the frames, by default the camera at capture_index opened at 1920x1080.
+            -proxy_width (int): Width of the low-resolution proxy built for every buffered frame, shown while scrubbing. None disables proxies.
+            -proxy_settle_time (float): Seconds the peek position must stay still before the full frame replaces the proxy.
+            -activity_width (int): Width of the grayscale sample every buffered frame is scored on for the activity index. None disables it.
+            -static_quality (int): With the "encoded" buffer storage, JPEG quality of the frames scoring below `static_threshold`, to keep
+                static footage in less memory. None stores every frame at the buffer quality.
             -parent: Parent QObject.
         ''' 
         # Data containers
         self.video_capture = None
-        self.buffer = CircularBuffer(buffer_size)
+        self.buffer = None
+        self.buffer_storage = buffer_storage
+        self.buffer_path = buffer_path
+        self.capture_index = capture_index
+        self.pixel_format = pixel_format
+        self.capture_frame_bgr = None
+        self.recorder = None
+        self.proxies = None
+        self.proxy_width = proxy_width
+        self.proxy_settle_time = proxy_settle_time
+        self.activity = None
+        self.activity_width = activity_width
+        self.static_quality = static_quality
+        # Activity score below which a frame counts as static
+        self.static_threshold = 0.005
+        if capture_mode not in ("grab", "read"):
+            raise ValueError(f"Unknown capture mode '{capture_mode}'")
+        self.capture_mode = capture_mode
 
         # Flags
         self.is_stopped = False
@@ -30,6 +76,13 @@ class VideoCaptureThread(QThread):
 
         # Values
         self.peek_position = 0
+        self.peek_time = 0.0
+        self.playback_time = None
+        self.playback_blend = False
+        self.review_snapshot = None
+        self.pending_ticks = 0
+        # Head and tail positions of the buffer after the last frame, replaced as one tuple so the GUI reads them without the mutex
+        self.buffer_positions = (0, 0)
 
         # Mutex for thread safety
         self.mutex = QMutex()
@@ -40,81 +93,502 @@ class VideoCaptureThread(QThread):
             raise TypeError("Argument 'capture_index' is None or is not of int type")
         else:
             try:
-                self.video_capture = cv2.VideoCapture(capture_index, cv2.CAP_MSMF)                
-                self.video_capture.set(cv2.CAP_PROP_FRAME_WIDTH, 1920)
-                self.video_capture.set(cv2.CAP_PROP_FRAME_HEIGHT, 1080)
-                self.width = self.video_capture.get(cv2.CAP_PROP_FRAME_WIDTH)
-                self.height = self.video_capture.get(cv2.CAP_PROP_FRAME_HEIGHT)
-                #self.video_capture.set(cv2.CAP_PROP_FPS, 25 )
-                self.fps = self.video_capture.get(cv2.CAP_PROP_FPS)
+                self.video_capture = frame_source if frame_source is not None else CameraFrameSource(capture_index, 1920, 1080)
+                self.width = self.video_capture.width
+                self.height = self.video_capture.height
+                self.fps = self.video_capture.fps
                 self.frame_interval = (1 / self.fps) * 1000
+                self.stats = PipelineStats(f"capture_{capture_index}", self.fps)
+                self.buffer = self.create_buffer(buffer_size)
+                if proxy_width:
+                    self.proxies = ProxyStore(self.buffer.capacity, self.width, self.height, pixel_format, proxy_width)
+                if activity_width:
+                    self.activity = ActivityIndex(self.buffer.capacity, self.width, self.height, pixel_format, activity_width)
                 print("\n---------")
                 print("Video Capture Thread CREATED")
-                print(f"Capture Index: {capture_index} | Buffer Size: {buffer_size} | Width: {self.width} | Height: {self.height} | FPS: {self.fps}")
+                print(f"Capture Index: {capture_index} | Buffer Size: {buffer_size} | Buffer Storage: {buffer_storage} | Width: {self.width} | Height: {self.height} | FPS: {self.fps}")
                 print("---------\n")
+            except ValueError:
+                raise
             except:
                 raise SystemError(f"Argument 'capture_index' = {capture_index} is not a valid index for cv2.VideoCapture object")
 
+    def create_buffer(self, buffer_size: int) -> CircularBuffer:
+        '''Create the CircularBuffer matching the selected buffer storage.
+
+            Arguments:
+            -buffer_size (int): The CircularBuffer size in frames.
+        '''
+        frame_shape = PixelFormat.frame_shape(int(self.width), int(self.height), self.pixel_format)
+
+        if self.buffer_storage == "deque":
+            return CircularBuffer(buffer_size)
+        elif self.buffer_storage == "preallocated":
+            return PreallocatedCircularBuffer(buffer_size, frame_shape=frame_shape, prefault=False)
+        elif self.buffer_storage == "seqlock":
+            return SeqlockCircularBuffer(buffer_size, frame_shape=frame_shape, prefault=False)
+        elif self.buffer_storage == "memmap":
+            ring_path = os.path.join(self.buffer_path, f"capture_{self.capture_index}_{self.pixel_format}.ring")
+            return MemmapCircularBuffer(buffer_size, frame_shape=frame_shape, path=ring_path)
+        elif self.buffer_storage == "encoded":
+            if self.pixel_format != PixelFormat.BGR:
+                raise ValueError("The encoded buffer storage is already YUV 4:2:0 internally, use the bgr pixel format with it")
+            return EncodedCircularBuffer(buffer_size)
+        else:
+            raise ValueError(f"Unknown buffer storage '{self.buffer_storage}'")
+
+    def grab_frame(self) -> tuple[bool, float]:
+        '''Grab the next frame from the VideoCapture without decoding it and return the monotonic time it was grabbed at.
+            Grabbing is cheap, so the cameras woken by the same tick grab their frames close together.
+        '''
+        ret = self.video_capture.grab()
+        return ret, time.monotonic()
+
+    def retrieve_frame(self, is_playback: bool) -> tuple[bool, Optional[np.ndarray]]:
+        '''Decode the grabbed frame. With a preallocated buffer the frame is decoded (or converted to the buffer pixel format) straight into
+            the head slot. In playback mode nothing is written in the buffer, so the grabbed frame is dropped without decoding it unless
+            it's recorded.
+
+            Arguments:
+            -is_playback (bool): Playback flag at the time the frame was grabbed.
+        '''
+        if is_playback and self.recorder is None:
+            return True, None
+        elif is_playback:
+            ret, frame = self.video_capture.retrieve()
+            return ret, PixelFormat.from_bgr(frame, self.pixel_format) if ret else None
+        elif isinstance(self.buffer, PreallocatedCircularBuffer):
+            if self.pixel_format == PixelFormat.BGR:
+                return self.video_capture.retrieve(self.buffer.write_slot())
+            ret, self.capture_frame_bgr = self.video_capture.retrieve(self.capture_frame_bgr)
+            frame = PixelFormat.from_bgr(self.capture_frame_bgr, self.pixel_format, dst=self.buffer.write_slot()) if ret else None
+            return ret, frame
+        else:
+            ret, frame = self.video_capture.retrieve()
+            return ret, PixelFormat.from_bgr(frame, self.pixel_format) if ret else None
+
+    def make_proxy(self, frame: np.ndarray, is_playback: bool) -> Optional[np.ndarray]:
+        '''Build the proxy of a retrieved frame, None if proxies are disabled or the frame won't be buffered.'''
+        if self.proxies is None or is_playback or frame is None:
+            return None
+        return self.proxies.make_proxy(frame)
+
+    def measure_activity(self, frame: np.ndarray, proxy: Optional[np.ndarray], is_playback: bool) -> Optional[float]:
+        '''Score a retrieved frame for the activity index on its proxy if there is one, None if the index is disabled or the frame won't
+            be buffered. Frames aren't buffered during playback, so the first frame after it scores 0 instead of the whole gap.
+        '''
+        if self.activity is None:
+            return None
+        if is_playback:
+            self.activity.reset()
+            return None
+        if frame is None:
+            return None
+        return self.activity.measure(frame if proxy is None else proxy)
+
+    def store_frame(self, frame: np.ndarray, capture_time: float, proxy: np.ndarray = None, activity: float = None):
+        '''Write the retrieved frame at the head of the buffer and store its proxy and activity score, computed here if not given.
+            With a preallocated buffer this only steps the head forward.
+        '''
+        position = self.buffer.head_position()
+        if proxy is None and self.proxies is not None:
+            proxy = self.proxies.make_proxy(frame)
+        if activity is None:
+            activity = self.measure_activity(frame, proxy, False)
+        if isinstance(self.buffer, PreallocatedCircularBuffer):
+            self.buffer.commit_frame(frame, timestamp=capture_time)
+        elif isinstance(self.buffer, EncodedCircularBuffer) and self.static_quality is not None and activity is not None:
+            quality = self.static_quality if activity < self.static_threshold else None
+            self.buffer.write_frame(frame, timestamp=capture_time, quality=quality)
+        else:
+            self.buffer.write_frame(frame, timestamp=capture_time)
+        self.stats.record_capture(capture_time, time.monotonic())
+        if self.proxies is not None:
+            self.proxies.store(position, proxy, self.buffer.position_sequence(position))
+        if activity is not None:
+            self.activity.store(position, activity, self.buffer.position_sequence(position))
+        if self.recorder is not None:
+            self.recorder.push_frame(frame, capture_time)
+
+    def capture_frame(self) -> bool:
+        '''Grab, decode and write the next frame at the head of the buffer in one go. Used by the "read" capture mode.'''
+        ret, capture_time = self.grab_frame()
+        if ret:
+            ret, frame = self.retrieve_frame(self.is_playback)
+        if not ret:
+            return False
+        if not self.is_playback:
+            self.store_frame(frame, capture_time)
+        else:
+            self.measure_activity(frame, None, True)
+            if self.recorder is not None:
+                self.recorder.push_frame(frame, capture_time)
+        return True
+
+    def next_display_frame(self) -> tuple[np.ndarray, float, int, int]:
+        '''Return the frame to display, its capture time if it's the live frame (NaN otherwise) and the head and tail positions of the buffer.'''
+        capture_time = float("nan")
+        # If the user is dragging the timeline cursor the frame shown corresponds to the position on the timeline
+        # If the user isn't dragging the timeline cursor the frae shown is the one at the tail of the buffer
+        # While the cursor is moving its proxy is shown, the full frame replaces it once the cursor settles
+        if self.is_peeking:
+            display_frame = None
+            if self.proxies is not None and time.monotonic() - self.peek_time < self.proxy_settle_time:
+                display_frame = self.proxies.get(self.peek_position, self.buffer.position_sequence(self.peek_position))
+            if display_frame is None:
+                display_frame = self.buffer.peek_frame(self.peek_position)
+        elif self.is_playback and self.playback_time is not None and self.review_snapshot is not None:
+            display_frame = self.review_frame()
+        elif self.is_playback and self.playback_time is not None and not self.buffer.is_empty():
+            display_frame = self.playback_frame()
+        else:
+            read_position = min(self.buffer.tail_position(), len(self.buffer) - 1)
+            if not self.is_playback and read_position == (self.buffer.head_position() - 1) % self.buffer.capacity:
+                capture_time = self.buffer.position_timestamp(read_position)
+            display_frame = self.buffer.read_frame(playback=self.is_playback)
+        return display_frame, capture_time, self.buffer.head_position(), self.buffer.tail_position()
+
+    def playback_frame(self) -> np.ndarray:
+        '''Return the frame captured at the playback time set by the PlaybackEngine and move the tail to it. When blending, the frame is
+            mixed with the next one in proportion to where the playback time falls between their capture times.
+        '''
+        position = self.buffer.find_time_position(self.playback_time)
+        self.buffer.set_tail_position(position)
+        display_frame = self.buffer.peek_frame(position)
+        if not self.playback_blend:
+            return display_frame
+
+        next_position = self.buffer.find_sequence_position(self.buffer.position_sequence(position) + 1)
+        if next_position is None:
+            return display_frame
+        frame_time = self.buffer.position_timestamp(position)
+        next_frame_time = self.buffer.position_timestamp(next_position)
+        weight = (self.playback_time - frame_time) / (next_frame_time - frame_time) if next_frame_time > frame_time else 0.0
+        if weight <= 0.0:
+            return display_frame
+        # A new array is returned since the renderer may still hold the previous blended frame
+        return cv2.addWeighted(display_frame, 1.0 - weight, self.buffer.peek_frame(next_position), weight, 0.0)
+
+    def review_frame(self) -> np.ndarray:
+        '''Return the frame of the review snapshot captured at the playback time, or its first frame for earlier times.'''
+        capture_times = self.review_snapshot.capture_times
+        index = max(int(np.searchsorted(capture_times, self.playback_time, side="right")) - 1, 0)
+        return self.review_snapshot[index]
 
     def run(self):
         ''' Overrided method from the QThread class. The VideoCapture frames are processed until an exception or the thread is stopped.
-            This thread is based on a CircularBuffer object on which it writes and read the video frame in input from an OpenCV VideoCapture
+            This thread is based on a CircularBuffer object on which it writes and read the video frame in input from an OpenCV VideoCapture.
+            In the "grab" capture mode the frame is grabbed and decoded without holding the mutex, which is only locked to update the buffer.
         '''
         if not self.video_capture.isOpened():
             raise Exception("ERROR: Couldn't open VideoCapture")
+        # The block pages are touched here rather than on the thread creating the buffer, so every camera touches its own in parallel
+        if isinstance(self.buffer, PreallocatedCircularBuffer) and not self.buffer.prefault:
+            self.buffer.prefault_frames()
+
+        while True:
 
-        while not self.is_stopped:
-        
             with QMutexLocker(self.mutex):
-                self.sync_condition.wait(self.mutex)
+                while self.pending_ticks == 0 and not self.is_stopped:
+                    self.sync_condition.wait(self.mutex)
+                if self.is_stopped:
+                    break
+                if self.pending_ticks > 1:
+                    self.stats.increment("missed_ticks", self.pending_ticks - 1)
+                self.pending_ticks = 0
 
-                ret, frame = self.video_capture.read()
+                if self.capture_mode == "read":
+                    if not self.capture_frame():
+                        raise Exception("ERROR: Couldn't read from VideoCapture")
+                    display_frame, capture_time, head_position, tail_position = self.next_display_frame()
+                else:
+                    is_playback = self.is_playback
 
+            if self.capture_mode == "grab":
+                ret, capture_time = self.grab_frame()
+                if ret:
+                    ret, frame = self.retrieve_frame(is_playback)
                 if not ret:
                     raise Exception("ERROR: Couldn't read from VideoCapture")
-                
-                # Writing the current frame at the head of the buffer
-                if not self.is_playback:
-                    self.buffer.write_frame(frame)
-
-                # If the user is dragging the timeline cursor the frame shown corresponds to the position on the timeline
-                # If the user isn't dragging the timeline cursor the frae shown is the one at the tail of the buffer
-                if self.is_peeking:
-                    display_frame = self.buffer.peek_frame(self.peek_position)
-                else:
-                    display_frame = self.buffer.read_frame(playback=self.is_playback)
+                proxy = self.make_proxy(frame, is_playback)
+                activity = self.measure_activity(frame, proxy, is_playback)
+
+                with QMutexLocker(self.mutex):
+                    # Writing the current frame at the head of the buffer
+                    if not is_playback:
+                        self.store_frame(frame, capture_time, proxy, activity)
+                    elif self.recorder is not None:
+                        self.recorder.push_frame(frame, capture_time)
+                    display_frame, capture_time, head_position, tail_position = self.next_display_frame()
 
-                # Emitting signals to update the GUI
-                self.head_position_updated.emit(self.buffer.head_position())
-                self.tail_position_updated.emit(self.buffer.tail_position())
-                self.display_frame.emit(display_frame)
+            # Emitting the frame to display, the buffer positions are sampled by the GUI at its refresh rate (see UIStatePublisher)
+            emit_time = time.monotonic()
+            self.stats.record_emit(capture_time, emit_time)
+            self.buffer_positions = (head_position, tail_position)
+            self.display_frame.emit(display_frame, capture_time, emit_time)
 
     def synchronize_threads(self):
         # Emit signal to synchronize all threads
         with QMutexLocker(self.mutex):
             synch_time = time.time()
             print(f"Thread: {self} synch at time: {synch_time}")
+            self.pending_ticks += 1
             self.sync_condition.wakeAll() 
 
     def stop(self):
         with QMutexLocker(self.mutex):
             self.is_stopped = True
+            self.sync_condition.wakeAll()
         self.wait()
+        self.buffer.flush()
+        self.video_capture.release()
+        self.buffer.close()
     
-    def get_capture_data(self) -> tuple[list, int, int, int]:
+    def get_capture_data(self) -> tuple[list, int, int, int, str, np.ndarray]:
         '''Return a tuple containing the buffer and capture data.
 
             Returns:
             -Content of the circular buffer as a list
             -Frame width and height
             -Video FPS
+            -Pixel format of the buffered frames
+            -Capture time of the buffered frames, in the same order
         '''
+        if isinstance(self.buffer, SeqlockCircularBuffer):
+            # Copied without the mutex, frames overwritten during the copy are left out
+            sequence_range = self.buffer.sequence_range()
+            if sequence_range is None:
+                return [None, self.width, self.height, self.fps, self.pixel_format, np.empty(0)]
+            frames = np.empty((sequence_range[1] - sequence_range[0] + 1, *self.buffer.frame_shape), dtype=self.buffer.dtype)
+            _, capture_times = self.buffer.copy_range(sequence_range[0], frames)
+            return [list(frames[:len(capture_times)]), self.width, self.height, self.fps, self.pixel_format, capture_times]
+
         with QMutexLocker(self.mutex):
             buffer = self.buffer.get_buffer()
-            capture_parameters = [buffer, self.width, self.height, self.fps]
+            capture_times = self.buffer.timestamps[:len(self.buffer)].copy()
+            capture_parameters = [buffer, self.width, self.height, self.fps, self.pixel_format, capture_times]
             
         return capture_parameters
 
+    def read_latest_frame(self, out: np.ndarray = None) -> Optional[tuple[np.ndarray, float]]:
+        '''Return a copy of the newest buffered frame and its capture time, None if the buffer is empty. With the "seqlock" buffer storage
+            the frame is copied without taking the mutex, so readers like analytics or previews don't delay the capture.
+
+            Arguments:
+            -out (np.ndarray): Array of the buffered frame shape to copy into, a new one is allocated if None.
+        '''
+        if isinstance(self.buffer, SeqlockCircularBuffer):
+            result = self.buffer.read_latest(out)
+            return None if result is None else result[:2]
+        with QMutexLocker(self.mutex):
+            if self.buffer.is_empty():
+                return None
+            position = self.buffer.newest_position()
+            return self.copy_frame(self.buffer.peek_frame(position), out), self.buffer.position_timestamp(position)
+
+    def read_frame_at(self, timestamp: float, out: np.ndarray = None) -> Optional[tuple[np.ndarray, float]]:
+        '''Return a copy of the last frame captured at or before the given time and its capture time, None if the buffer is empty.
+            Lock-free with the "seqlock" buffer storage, see read_latest_frame.
+
+            Arguments:
+            -timestamp (float): Monotonic capture time.
+            -out (np.ndarray): Array of the buffered frame shape to copy into, a new one is allocated if None.
+        '''
+        if isinstance(self.buffer, SeqlockCircularBuffer):
+            result = self.buffer.read_at_time(timestamp, out)
+            return None if result is None else result[:2]
+        with QMutexLocker(self.mutex):
+            position = self.buffer.find_time_position(timestamp)
+            if position is None:
+                return None
+            return self.copy_frame(self.buffer.peek_frame(position), out), self.buffer.position_timestamp(position)
+
+    def read_display_frame(self, out: np.ndarray = None) -> Optional[tuple[np.ndarray, float]]:
+        '''Return a copy of the frame the operator sees and its capture time: the newest frame live, the frame at the playback time during
+            playback. None if there is no frame. Used by previews, which must not change the tail like next_display_frame does.
+
+            Arguments:
+            -out (np.ndarray): Array of the buffered frame shape to copy into, a new one is allocated if None.
+        '''
+        with QMutexLocker(self.mutex):
+            playback_time = self.playback_time if self.is_playback else None
+            if playback_time is not None and self.review_snapshot is not None:
+                capture_times = self.review_snapshot.capture_times
+                index = max(int(np.searchsorted(capture_times, playback_time, side="right")) - 1, 0)
+                return self.copy_frame(self.review_snapshot[index], out), float(capture_times[index])
+        if playback_time is None:
+            return self.read_latest_frame(out)
+        return self.read_frame_at(playback_time, out)
+
+    @staticmethod
+    def copy_frame(frame: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+        if out is None:
+            return frame.copy()
+        np.copyto(out, frame)
+        return out
+
+    def export_range(self, start: float = None, end: float = None, unit: str = "sequence") -> Optional[BufferSnapshot]:
+        '''Return a pinned snapshot of a range of the buffer in chronological order, without copying the frames. The capture keeps running:
+            frames it would overwrite while they are still pinned are copied out of the buffer first. Release the snapshot once it's exported.
+            Returns None if the buffer is empty or the range isn't in it.
+
+            Arguments:
+            -start, end: First and last frame of the range, both included, None for the oldest and the newest frame in the buffer.
+            -unit (str): "slot" for buffer positions, "sequence" for frame sequence numbers, "time" for monotonic capture times.
+        '''
+        with QMutexLocker(self.mutex):
+            sequence_range = self.buffer.resolve_range(start, end, unit)
+            if sequence_range is None:
+                return None
+            return self.buffer.snapshot(*sequence_range)
+
+    def attach_recorder(self, recorder: SegmentRecorderThread):
+        '''Record every captured frame with the given SegmentRecorderThread, including the frames captured during playback.
+
+            Arguments:
+            -recorder (SegmentRecorderThread): Recorder of this camera, None to stop recording.
+        '''
+        with QMutexLocker(self.mutex):
+            self.recorder = recorder
+
+    def resolve_time_range(self, start: float = None, end: float = None, unit: str = "sequence") -> Optional[tuple[float, float]]:
+        '''Return the capture times of the first and last frame of a range of the buffer, None if the buffer is empty or the range isn't in it.
+
+            Arguments:
+            -start, end: First and last frame of the range, see export_range.
+            -unit (str): "slot", "sequence" or "time".
+        '''
+        with QMutexLocker(self.mutex):
+            sequence_range = self.buffer.resolve_range(start, end, unit)
+            if sequence_range is None:
+                return None
+            return tuple(self.buffer.position_timestamp(self.buffer.find_sequence_position(sequence)) for sequence in sequence_range)
+
+    def get_filmstrip(self, count: int) -> list[tuple[int, np.ndarray]]:
+        '''Return up to `count` BGR proxies evenly spread over the buffer slots, with their slot, for the timeline filmstrip.
+            Slots not written yet are skipped.
+
+            Arguments:
+            -count (int): Number of thumbnails.
+        '''
+        if self.proxies is None or count <= 0:
+            return []
+        positions = np.linspace(0, self.buffer.capacity - 1, count).round().astype(int)
+        with QMutexLocker(self.mutex):
+            thumbnails = []
+            for position in positions:
+                proxy = self.proxies.get(int(position), self.buffer.position_sequence(int(position)))
+                if proxy is not None:
+                    thumbnails.append((int(position), proxy.copy()))
+        return [(position, PixelFormat.to_bgr(proxy, self.pixel_format)) for position, proxy in thumbnails]
+
+    def get_activity(self) -> Optional[np.ndarray]:
+        '''Return the activity score of every buffer slot, NaN for empty slots, for the timeline heatmap. None if the index is disabled.'''
+        if self.activity is None:
+            return None
+        with QMutexLocker(self.mutex):
+            return self.activity.slot_scores(self.buffer.sequence_numbers)
+
+    def find_action(self, timestamp: float, direction: int, threshold: float = 0.005, min_gap: int = 10) -> Optional[float]:
+        '''Return the capture time of the first frame of the next (direction 1) or previous (direction -1) action in the buffer, None if
+            there isn't one. An action is a run of frames scoring at least `threshold`, runs less than `min_gap` frames apart are one action.
+
+            Arguments:
+            -timestamp (float): Monotonic capture time to search from.
+            -direction (int): 1 to search forward, -1 backward.
+            -threshold (float): Activity score, the fraction of the picture that changed, a frame needs to be part of an action.
+            -min_gap (int): Static frames ending an action.
+        '''
+        if self.activity is None:
+            return None
+        with QMutexLocker(self.mutex):
+            if self.review_snapshot is not None or self.buffer.is_empty():
+                return None
+            # Slots in chronological order, frames without a score are NaN and count as static
+            positions = (self.buffer.oldest_position() + np.arange(len(self.buffer))) % self.buffer.capacity
+            scores = self.activity.slot_scores(self.buffer.sequence_numbers)[positions]
+            capture_times = self.buffer.timestamps[positions]
+
+        active = np.flatnonzero(scores >= threshold)
+        if len(active) == 0:
+            return None
+        starts = active[np.insert(np.diff(active) > min_gap, 0, True)]
+        start_times = capture_times[starts]
+        if direction > 0:
+            index = int(np.searchsorted(start_times, timestamp, side="right"))
+            return float(start_times[index]) if index < len(start_times) else None
+        index = int(np.searchsorted(start_times, timestamp, side="left")) - 1
+        return float(start_times[index]) if index >= 0 else None
+
+    def set_playback_time(self, playback_time: Optional[float], blend: bool = False):
+        '''Show the frame captured at the given time during playback, instead of stepping the tail one frame per tick.
+
+            Arguments:
+            -playback_time (float): Monotonic capture time to show, None to go back to stepping the tail.
+            -blend (bool): Blend the frames around the playback time.
+        '''
+        with QMutexLocker(self.mutex):
+            self.playback_time = playback_time
+            self.playback_blend = blend
+
+    def set_review_snapshot(self, snapshot: Optional[BufferSnapshot]):
+        '''Play a pinned snapshot, e.g. the frames of a bookmark the ring has already overwritten, instead of the buffer. The playback
+            times then refer to the snapshot frames. None goes back to playing the buffer.
+        '''
+        with QMutexLocker(self.mutex):
+            self.review_snapshot = snapshot
+
+    def get_time_range(self) -> Optional[tuple[float, float]]:
+        '''Return the capture times of the oldest and newest buffered frames (of the review snapshot when reviewing one), None if the
+            buffer is empty.
+        '''
+        with QMutexLocker(self.mutex):
+            if self.review_snapshot is not None:
+                return float(self.review_snapshot.capture_times[0]), float(self.review_snapshot.capture_times[-1])
+            if self.buffer.is_empty():
+                return None
+            return self.buffer.position_timestamp(self.buffer.oldest_position()), self.buffer.position_timestamp(self.buffer.newest_position())
+
+    def get_step_time(self, timestamp: float, frames: int) -> Optional[float]:
+        '''Return the capture time of the frame the given number of frames after (or before, if negative) the one captured at the given time,
+            clamped to the buffered frames. None if the buffer is empty.
+
+            Arguments:
+            -timestamp (float): Monotonic capture time of the current frame.
+            -frames (int): Number of frames to step.
+        '''
+        with QMutexLocker(self.mutex):
+            if self.review_snapshot is not None:
+                capture_times = self.review_snapshot.capture_times
+                index = max(int(np.searchsorted(capture_times, timestamp, side="right")) - 1, 0)
+                return float(capture_times[min(max(index + frames, 0), len(capture_times) - 1)])
+            position = self.buffer.find_time_position(timestamp)
+            if position is None:
+                return None
+            oldest_sequence = self.buffer.position_sequence(self.buffer.oldest_position())
+            newest_sequence = self.buffer.position_sequence(self.buffer.newest_position())
+            sequence = min(max(self.buffer.position_sequence(position) + frames, oldest_sequence), newest_sequence)
+            return self.buffer.position_timestamp(self.buffer.find_sequence_position(sequence))
+
+    def get_position_timestamp(self, position: int) -> Optional[float]:
+        '''Return the monotonic capture time of the frame in the given buffer position, None if the position is empty.
+
+            Arguments:
+            -position (int): Buffer index of the frame.
+        '''
+        with QMutexLocker(self.mutex):
+            return self.buffer.position_timestamp(position)
+
+    def get_time_position(self, timestamp: float) -> Optional[int]:
+        '''Return the buffer position of the last frame captured at or before the given time, None if the buffer is empty.
+            Used to align cameras on capture time instead of buffer index, since cameras drift and drop frames independently.
+
+            Arguments:
+            -timestamp (float): Monotonic time in seconds, as returned by get_position_timestamp.
+        '''
+        with QMutexLocker(self.mutex):
+            return self.buffer.find_time_position(timestamp)
+
     def set_buffer_peeking(self, is_peeking: bool, new_peek_position: int = None):
         ''' When the thread is peeking playback frames are shown by indexing the CircularBuffer.
         
@@ -125,6 +599,7 @@ class VideoCaptureThread(QThread):
         with QMutexLocker(self.mutex):
             self.is_peeking = is_peeking
             self.peek_position = new_peek_position
+            self.peek_time = time.monotonic()
 
             if not is_peeking:
                 self.buffer.set_tail_position(new_peek_position)
@@ -138,7 +613,10 @@ class VideoCaptureThread(QThread):
         '''
         with QMutexLocker(self.mutex):
             self.is_playback = is_playback
+            self.stats.restart_capture()
             if is_playback:
                 self.buffer.set_tail_position(position=0)
             else:
+                self.playback_time = None
+                self.review_snapshot = None
                 self.buffer.set_tail_to_head()
\ No newline at end of file
@@ -1,31 +1,218 @@
-from PySide6.QtCore import QThread, Signal, Qt, QMutex, QMutexLocker, Slot
+from PySide6.QtCore import QThread, Signal, Qt, QMutex, QMutexLocker, QWaitCondition, QEvent, QObject, QPointF, Slot
 from PySide6.QtGui import QPixmap, QImage
 from PySide6.QtWidgets import QLabel
+import cv2
 import numpy as np
 import time
+import PixelFormat
+from PipelineStats import PipelineStats
 class VideoRendererThread(QThread):
-    update_signal = Signal(np.ndarray, int)
+    ''' QThread that turns the frames emitted by a VideoCaptureThread into images ready to be painted on a QLabel. Frames are posted in a
+        one-slot mailbox, a frame that wasn't rendered yet is replaced by the newer one, so slow rendering drops stale frames instead of
+        queueing them. The worker converts the frame to BGR and downscales it to the label size with cv2.resize, the GUI thread only
+        wraps the result in a QPixmap. At most one rendered image waits for the GUI thread at a time.
+        Zoom and pan only crop the visible region of the frame before scaling it to the label, so a zoomed view costs no more than a
+        full one. The mouse wheel zooms around the cursor, dragging pans and a double click resets the view.
+    '''
+    frame_ready = Signal()
 
-    def __init__(self, video_label: QLabel, parent=None):
+    MAX_ZOOM = 8.0
+    WHEEL_ZOOM_SPEED = 0.001
+
+    def __init__(self, video_label: QLabel, pixel_format: str = PixelFormat.BGR, stats: PipelineStats = None, parent=None):
         super().__init__(parent)
         self.video_label = video_label
+        self.pixel_format = pixel_format
+        self.stats = stats
         self.mutex = QMutex()
+        self.frame_posted = QWaitCondition()
+
+        # Flags
+        self.is_stopped = False
+        self.is_paint_pending = False
+
+        # Mailboxes
+        self.posted_frame = None
+        self.ready_frame = None
+        self.target_size = (video_label.width(), video_label.height())
+
+        # Zoom, the visible region is 1 / zoom_factor of the frame around zoom_center, in coordinates normalized to the frame size
+        self.zoom_factor = 1.0
+        self.zoom_center = (0.5, 0.5)
+        self.painted_size = (0, 0)
+        self.drag_position = None
+
+        video_label.installEventFilter(self)
+        self.frame_ready.connect(self.paint_frame, Qt.QueuedConnection)
 
     def run(self):
-        self.update_signal.connect(self.video_label_update)
+        ''' Overrided method from the QThread class. Render the posted frames until the thread is stopped.'''
+        while True:
+            with QMutexLocker(self.mutex):
+                while self.posted_frame is None and not self.is_stopped:
+                    self.frame_posted.wait(self.mutex)
+                if self.is_stopped:
+                    break
+                display_frame, capture_time, emit_time = self.posted_frame
+                self.posted_frame = None
+                target_size = self.target_size
+                region = self.zoom_region()
+
+            rendered_frame = self.render_frame(display_frame, target_size, region)
+
+            with QMutexLocker(self.mutex):
+                if self.ready_frame is not None and self.stats is not None:
+                    self.stats.increment("frames_superseded")
+                self.ready_frame = (rendered_frame, capture_time, emit_time)
+                if self.is_paint_pending:
+                    continue
+                self.is_paint_pending = True
+            self.frame_ready.emit()
 
-    @Slot(np.ndarray)
-    def video_label_update(self, display_frame: np.ndarray):
+    @Slot(np.ndarray, float, float)
+    def video_label_update(self, display_frame: np.ndarray, capture_time: float = float("nan"), emit_time: float = None):
+        '''Post a frame to render, replacing the previous one if it wasn't rendered yet. Connect it with a direct connection so it runs
+            in the thread emitting the frame and nothing queues up on the GUI thread.
+        '''
         with QMutexLocker(self.mutex):
+            if self.posted_frame is not None and self.stats is not None:
+                self.stats.increment("frames_superseded")
+            self.posted_frame = (display_frame, capture_time, emit_time)
+            self.frame_posted.wakeOne()
 
-            height, width, channel = display_frame.shape
-            bytes_per_line = 3 * width
-            q_image = QImage(display_frame.data, width, height, bytes_per_line, QImage.Format_BGR888)
-            q_image = q_image.scaled(self.video_label.width(),self.video_label.height(), 
-                                    Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
+    def render_frame(self, display_frame: np.ndarray, target_size: tuple[int, int], region: tuple = None) -> np.ndarray:
+        '''Crop the visible region of a frame, convert it to BGR and scale it to fit the target size, keeping its aspect ratio.
 
-            pixmap = QPixmap.fromImage(q_image)
-            self.video_label.setPixmap(pixmap)
+            Arguments:
+            -display_frame (np.ndarray): Frame in the renderer pixel format.
+            -target_size (tuple): Width and height of the label.
+            -region (tuple): Visible x, y, width and height normalized to the frame size, None for the whole frame. Normalized
+                coordinates apply the same way to full frames and to the proxies shown while scrubbing.
+        '''
+        if region is not None and region != (0.0, 0.0, 1.0, 1.0):
+            frame_width, frame_height = PixelFormat.frame_size(display_frame, self.pixel_format)
+            x, y = round(region[0] * frame_width), round(region[1] * frame_height)
+            width = max(1, min(frame_width - x, round(region[2] * frame_width)))
+            height = max(1, min(frame_height - y, round(region[3] * frame_height)))
+            display_frame = PixelFormat.crop(display_frame, self.pixel_format, x, y, width, height)
+        display_frame = PixelFormat.to_bgr(display_frame, self.pixel_format)
+        height, width = display_frame.shape[:2]
+        scale = min(target_size[0] / width, target_size[1] / height)
+        if scale <= 0 or scale == 1:
+            return np.ascontiguousarray(display_frame)
+        scaled_size = (max(1, round(width * scale)), max(1, round(height * scale)))
+        return PixelFormat.resize(display_frame, PixelFormat.BGR, scaled_size, interpolation=cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR)
+
+    @Slot()
+    def paint_frame(self):
+        '''Paint the last rendered frame on the label. Runs on the GUI thread.'''
+        with QMutexLocker(self.mutex):
+            ready_frame = self.ready_frame
+            self.ready_frame = None
+            self.is_paint_pending = False
+        if ready_frame is None:
+            return
+
+        rendered_frame, capture_time, emit_time = ready_frame
+        height, width = rendered_frame.shape[:2]
+        q_image = QImage(rendered_frame.data, width, height, rendered_frame.strides[0], QImage.Format_BGR888)
+        self.video_label.setPixmap(QPixmap.fromImage(q_image))
+        self.painted_size = (width, height)
+
+        if self.stats is not None and emit_time is not None:
+            self.stats.record_display(capture_time, emit_time)
+
+    def zoom_region(self) -> tuple[float, float, float, float]:
+        '''Return the visible x, y, width and height normalized to the frame size. Call it with the mutex locked.'''
+        size = 1 / self.zoom_factor
+        return (self.zoom_center[0] - size / 2, self.zoom_center[1] - size / 2, size, size)
+
+    def set_zoom(self, zoom_factor: float, center: tuple[float, float] = None):
+        '''Zoom the view, keeping the visible region inside the frame.
+
+            Arguments:
+            -zoom_factor (float): Magnification, from 1 (whole frame) to MAX_ZOOM.
+            -center (tuple): Frame point shown at the center of the label, normalized to the frame size. Unchanged if None.
+        '''
+        with QMutexLocker(self.mutex):
+            self.zoom_factor = min(max(zoom_factor, 1.0), self.MAX_ZOOM)
+            center_x, center_y = center if center is not None else self.zoom_center
+            half_size = 0.5 / self.zoom_factor
+            self.zoom_center = (min(max(center_x, half_size), 1 - half_size), min(max(center_y, half_size), 1 - half_size))
+
+    def zoom_at(self, zoom_factor: float, view_point: tuple[float, float]):
+        '''Zoom the view keeping the frame point under the given view point in place.
+
+            Arguments:
+            -zoom_factor (float): New magnification.
+            -view_point (tuple): Point of the displayed image, normalized to its size.
+        '''
+        with QMutexLocker(self.mutex):
+            x, y, size, _ = self.zoom_region()
+        frame_x, frame_y = x + view_point[0] * size, y + view_point[1] * size
+        new_size = 1 / min(max(zoom_factor, 1.0), self.MAX_ZOOM)
+        self.set_zoom(zoom_factor, (frame_x + (0.5 - view_point[0]) * new_size, frame_y + (0.5 - view_point[1]) * new_size))
+
+    def pan(self, view_dx: float, view_dy: float):
+        '''Move the view by a displacement normalized to the displayed image size, the frame follows the pointer.'''
+        with QMutexLocker(self.mutex):
+            size = 1 / self.zoom_factor
+            center_x, center_y = self.zoom_center
+        self.set_zoom(self.zoom_factor, (center_x - view_dx * size, center_y - view_dy * size))
+
+    def reset_zoom(self):
+        self.set_zoom(1.0, (0.5, 0.5))
+
+    def view_point(self, position: QPointF) -> tuple[float, float]:
+        '''Return a label position as a point of the displayed image normalized to its size, the pixmap is centered in the label.'''
+        painted_width, painted_height = self.painted_size
+        if painted_width == 0 or painted_height == 0:
+            return (0.5, 0.5)
+        x = (position.x() - (self.video_label.width() - painted_width) / 2) / painted_width
+        y = (position.y() - (self.video_label.height() - painted_height) / 2) / painted_height
+        return (min(max(x, 0.0), 1.0), min(max(y, 0.0), 1.0))
+
+    def eventFilter(self, watched: QObject, event: QEvent) -> bool:
+        '''Track the label size, the frames are scaled to it by the worker, and handle the zoom and pan of the view.'''
+        if watched is not self.video_label:
+            return super().eventFilter(watched, event)
+
+        event_type = event.type()
+        if event_type == QEvent.Resize:
+            with QMutexLocker(self.mutex):
+                self.target_size = (event.size().width(), event.size().height())
+        elif event_type == QEvent.Wheel:
+            zoom_factor = self.zoom_factor * (1 + self.WHEEL_ZOOM_SPEED * event.angleDelta().y())
+            self.zoom_at(zoom_factor, self.view_point(event.position()))
+            return True
+        elif event_type == QEvent.MouseButtonDblClick and event.button() == Qt.LeftButton:
+            self.reset_zoom()
+            return True
+        elif event_type == QEvent.MouseButtonPress and event.button() == Qt.LeftButton and self.zoom_factor > 1:
+            self.drag_position = event.position()
+            return True
+        elif event_type == QEvent.MouseMove and self.drag_position is not None:
+            painted_width, painted_height = self.painted_size
+            if painted_width and painted_height:
+                delta = event.position() - self.drag_position
+                self.pan(delta.x() / painted_width, delta.y() / painted_height)
+            self.drag_position = event.position()
+            return True
+        elif event_type == QEvent.MouseButtonRelease and self.drag_position is not None:
+            self.drag_position = None
+            return True
+        return super().eventFilter(watched, event)
+
+    def stop(self):
+        with QMutexLocker(self.mutex):
+            self.is_stopped = True
+            self.frame_posted.wakeAll()
+        self.wait()
 
     def switch_label_position(self, new_video_label: QLabel):
-        self.video_label = new_video_label
\ No newline at end of file
+        self.video_label.removeEventFilter(self)
+        new_video_label.installEventFilter(self)
+        with QMutexLocker(self.mutex):
+            self.video_label = new_video_label
+            self.target_size = (new_video_label.width(), new_video_label.height())
+        self.drag_position = None
@@ -1,10 +1,13 @@
 from PySide6.QtCore import QThread, Signal
 import cv2
+import PixelFormat
+from PipelineStats import PipelineStats
 
 class VideoWriterThread(QThread):
     finished = Signal()
 
-    def __init__(self, buffer: list, width: int, height: int, fps: int, filename: str, fourcc: cv2.VideoWriter_fourcc, parent=None):
+    def __init__(self, buffer: list, width: int, height: int, fps: int, filename: str, fourcc: cv2.VideoWriter_fourcc,
+                 pixel_format: str = PixelFormat.BGR, capture_times: list = None, stats: PipelineStats = None, parent=None):
         super().__init__()
         self.buffer = buffer
         self.filename = filename
@@ -12,12 +15,17 @@ class VideoWriterThread(QThread):
         self.fps = fps
         self.width = width
         self.height = height
+        self.pixel_format = pixel_format
+        self.capture_times = capture_times
+        self.stats = stats
 
     def run(self):
         writer = cv2.VideoWriter(self.filename, self.fourcc, self.fps, (self.width, self.height))
         try:
-            for frame in self.buffer:
-                writer.write(frame)
+            for index, frame in enumerate(self.buffer):
+                writer.write(PixelFormat.to_bgr(frame, self.pixel_format))
+                if self.stats is not None and self.capture_times is not None:
+                    self.stats.record_export(self.capture_times[index])
         except:
             cv2.Error("Couldn't write file to disk")
 
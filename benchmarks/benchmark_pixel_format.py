@@ -0,0 +1,39 @@
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import PixelFormat
+
+RESOLUTIONS = [(1280, 720), (1920, 1080), (3840, 2160)]
+REPETITIONS = 100
+
+def time_per_call(function, repetitions: int = REPETITIONS) -> float:
+    """Return the average time of a call in milliseconds."""
+    function()
+    start = time.perf_counter()
+    for _ in range(repetitions):
+        function()
+    return (time.perf_counter() - start) / repetitions * 1000
+
+def benchmark_pixel_format(resolutions: list = RESOLUTIONS, repetitions: int = REPETITIONS) -> list[dict]:
+    """Measure the memory of a frame and the BGR <-> I420 conversion cost for every resolution."""
+    rng = np.random.default_rng(0)
+    results = []
+    for width, height in resolutions:
+        bgr_frame = rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+        i420_frame = np.empty(PixelFormat.frame_shape(width, height, PixelFormat.I420), dtype=np.uint8)
+
+        encode_time = time_per_call(lambda: PixelFormat.from_bgr(bgr_frame, PixelFormat.I420, dst=i420_frame), repetitions)
+        decode_time = time_per_call(lambda: PixelFormat.to_bgr(i420_frame, PixelFormat.I420), repetitions)
+
+        results.append({"width": width, "height": height, "bgr_bytes": bgr_frame.nbytes, "i420_bytes": i420_frame.nbytes,
+                        "bgr_to_i420_ms": encode_time, "i420_to_bgr_ms": decode_time})
+    return results
+
+if __name__ == "__main__":
+    print(f"{'Resolution':>12} | {'BGR MB':>7} | {'I420 MB':>7} | {'BGR->I420 ms':>12} | {'I420->BGR ms':>12}")
+    for result in benchmark_pixel_format():
+        print(f"{result['width']:>5}x{result['height']:<6} | {result['bgr_bytes'] / 2**20:>7.2f} | {result['i420_bytes'] / 2**20:>7.2f} | "
+              f"{result['bgr_to_i420_ms']:>12.3f} | {result['i420_to_bgr_ms']:>12.3f}")
@@ -0,0 +1,318 @@
+""" Headless benchmark suite of the capture -> buffer -> render -> export pipeline. Results are printed and written to a JSON file so runs
+    can be compared, e.g.:
+
+        python benchmarks/run_benchmarks.py --output bench_output.json
+        python benchmarks/run_benchmarks.py --quick --sections buffer render
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+
+# The renderer benchmark needs a QApplication, the offscreen platform runs it without a display
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+from PySide6 import __version__ as pyside_version
+from PySide6.QtWidgets import QApplication, QLabel
+
+from CircularBuffer import CircularBuffer
+from PreallocatedCircularBuffer import PreallocatedCircularBuffer
+from SeqlockCircularBuffer import SeqlockCircularBuffer
+from EncodedCircularBuffer import EncodedCircularBuffer
+from FrameSource import SyntheticFrameSource
+from VideoCaptureThread import VideoCaptureThread
+from ProcessCaptureThread import ProcessCaptureThread
+from VideoRendererThread import VideoRendererThread
+from MosaicRendererThread import MosaicRendererThread
+from VideoWriterThread import VideoWriterThread
+from benchmark_pixel_format import benchmark_pixel_format
+
+BUFFER_STORAGES = ["deque", "preallocated", "seqlock", "encoded"]
+SECTIONS = ["buffer", "capture", "readers", "render", "mosaic", "export", "pixel_format"]
+
+def create_buffer(storage: str, capacity: int, frame_shape: tuple) -> CircularBuffer:
+    """Create a buffer of the given storage, as VideoCaptureThread.create_buffer does."""
+    if storage == "preallocated":
+        return PreallocatedCircularBuffer(capacity, frame_shape)
+    elif storage == "seqlock":
+        return SeqlockCircularBuffer(capacity, frame_shape)
+    elif storage == "encoded":
+        return EncodedCircularBuffer(capacity)
+    return CircularBuffer(capacity)
+
+def operations_per_second(function, operations: int) -> float:
+    """Run `function` the given number of times and return how many calls per second it sustained."""
+    start = time.perf_counter()
+    for index in range(operations):
+        function(index)
+    return operations / (time.perf_counter() - start)
+
+def benchmark_buffer(capacities: list, resolutions: list, operations: int) -> list[dict]:
+    """Measure write, read and random peek throughput of every buffer storage. Encoded writes only queue the encoding job, so their rate is
+        the cost paid by the capture thread.
+    """
+    rng = np.random.default_rng(0)
+    results = []
+    for width, height in resolutions:
+        frames = [SyntheticFrameSource(width, height, realtime=False, source_index=index).read()[1] for index in range(4)]
+        for capacity in capacities:
+            for storage in BUFFER_STORAGES:
+                buffer = create_buffer(storage, capacity, frames[0].shape)
+                # The deque storage keeps references, a fresh copy per write matches what a capture hands over
+                if storage == "deque":
+                    write = lambda index: buffer.write_frame(frames[index % 4].copy())
+                else:
+                    write = lambda index: buffer.write_frame(frames[index % 4])
+                write_rate = operations_per_second(write, max(operations, capacity))
+                read_rate = operations_per_second(lambda index: buffer.read_frame(playback=True), operations)
+                peek_positions = rng.integers(0, capacity, operations)
+                peek_rate = operations_per_second(lambda index: buffer.peek_frame(int(peek_positions[index])), operations)
+
+                results.append({"storage": storage, "capacity": capacity, "width": width, "height": height,
+                                "write_fps": write_rate, "read_fps": read_rate, "peek_fps": peek_rate})
+                print(f"buffer  {storage:>12} {capacity:>5} frames {width}x{height}: write {write_rate:9.1f} fps | "
+                      f"read {read_rate:9.1f} fps | peek {peek_rate:9.1f} fps")
+                del buffer
+    return results
+
+def benchmark_capture(camera_counts: list, width: int, height: int, duration: float, backends: list) -> list[dict]:
+    """Run N capture threads on unthrottled synthetic sources with ticks sent as fast as possible, and measure the frame rate each sustains.
+        The "thread" backend captures every camera in the GUI process, the "process" backend in a capture process per camera.
+    """
+    results = []
+    for backend, cameras in itertools.product(backends, camera_counts):
+        if backend == "process":
+            source_options = {"width": width, "height": height, "realtime": False}
+            threads = [ProcessCaptureThread(buffer_size=250, capture_index=index, source="synthetic", source_options=source_options)
+                       for index in range(cameras)]
+        else:
+            threads = [VideoCaptureThread(buffer_size=250, capture_index=index, buffer_storage="preallocated",
+                                          frame_source=SyntheticFrameSource(width, height, realtime=False, source_index=index))
+                       for index in range(cameras)]
+        for thread in threads:
+            thread.start()
+
+        start = time.perf_counter()
+        while time.perf_counter() - start < duration:
+            for thread in threads:
+                thread.synchronize_threads()
+            time.sleep(0.0005)
+        elapsed = time.perf_counter() - start
+
+        # Counted before stopping, a process backend ring is unmapped by stop()
+        frame_rates = [thread.buffer.next_sequence / elapsed for thread in threads]
+        for thread in threads:
+            thread.stop()
+
+        results.append({"backend": backend, "cameras": cameras, "width": width, "height": height, "duration_s": elapsed,
+                        "fps_per_camera": frame_rates, "total_fps": sum(frame_rates)})
+        print(f"capture {backend:>7} {cameras:>2} cameras {width}x{height}: {np.mean(frame_rates):7.1f} fps per camera | "
+              f"{sum(frame_rates):7.1f} fps total")
+    return results
+
+def benchmark_readers(reader_counts: list, width: int, height: int, duration: float) -> list[dict]:
+    """Run one capture thread with ticks sent as fast as possible while reader threads copy its newest frame in a loop, as analytics or
+        previews do, and measure the capture frame rate, the jitter of its capture intervals and the reads. The "preallocated" storage
+        readers take the capture mutex, the "seqlock" storage ones don't.
+    """
+    results = []
+    for storage, readers in itertools.product(["preallocated", "seqlock"], reader_counts):
+        thread = VideoCaptureThread(buffer_size=250, capture_index=0, buffer_storage=storage,
+                                    frame_source=SyntheticFrameSource(width, height, realtime=False))
+        thread.start()
+        is_running = True
+        read_counts = [0] * readers
+
+        def read_frames(reader_index: int):
+            out = np.empty(thread.buffer.frame_shape, dtype=np.uint8)
+            while is_running:
+                if thread.read_latest_frame(out) is not None:
+                    read_counts[reader_index] += 1
+        reader_threads = [threading.Thread(target=read_frames, args=(index,)) for index in range(readers)]
+        for reader_thread in reader_threads:
+            reader_thread.start()
+
+        start = time.perf_counter()
+        while time.perf_counter() - start < duration:
+            thread.synchronize_threads()
+            time.sleep(0.0005)
+        elapsed = time.perf_counter() - start
+        is_running = False
+        for reader_thread in reader_threads:
+            reader_thread.join()
+
+        frames = min(thread.buffer.next_sequence, thread.buffer.capacity)
+        capture_times = np.sort(thread.buffer.timestamps[:frames])
+        intervals_ms = np.diff(capture_times) * 1000 if frames > 1 else np.zeros(1)
+        frame_rate = thread.buffer.next_sequence / elapsed
+        thread.stop()
+
+        results.append({"storage": storage, "readers": readers, "width": width, "height": height, "capture_fps": frame_rate,
+                        "interval_p50_ms": float(np.percentile(intervals_ms, 50)), "interval_p99_ms": float(np.percentile(intervals_ms, 99)),
+                        "reads_per_s": sum(read_counts) / elapsed,
+                        "torn_reads": getattr(thread.buffer, "torn_reads", 0)})
+        print(f"readers {storage:>12} {readers:>2} readers {width}x{height}: capture {frame_rate:7.1f} fps | interval p50 "
+              f"{results[-1]['interval_p50_ms']:6.2f} ms p99 {results[-1]['interval_p99_ms']:6.2f} ms | "
+              f"{results[-1]['reads_per_s']:7.1f} reads/s")
+    return results
+
+def benchmark_render(resolutions: list, label_sizes: list, zoom_factors: list, repetitions: int) -> list[dict]:
+    """Measure the cropping and scaling done by the VideoRendererThread worker and the painting left to the GUI thread, for a frame."""
+    application = QApplication.instance() or QApplication([])
+    results = []
+    for width, height in resolutions:
+        frame = SyntheticFrameSource(width, height, realtime=False).read()[1]
+        for (label_width, label_height), zoom_factor in itertools.product(label_sizes, zoom_factors):
+            label = QLabel()
+            label.resize(label_width, label_height)
+            renderer = VideoRendererThread(label)
+            renderer.set_zoom(zoom_factor)
+            target_size = (label_width, label_height)
+            region = renderer.zoom_region()
+
+            renderer.render_frame(frame, target_size, region)
+            worker_time = gui_time = 0.0
+            for _ in range(repetitions):
+                start = time.perf_counter()
+                renderer.ready_frame = (renderer.render_frame(frame, target_size, region), float("nan"), None)
+                rendered = time.perf_counter()
+                renderer.paint_frame()
+                worker_time += rendered - start
+                gui_time += time.perf_counter() - rendered
+            worker_time = worker_time / repetitions * 1000
+            gui_time = gui_time / repetitions * 1000
+
+            results.append({"width": width, "height": height, "label_width": label_width, "label_height": label_height,
+                            "zoom_factor": zoom_factor, "worker_ms_per_frame": worker_time, "gui_ms_per_frame": gui_time})
+            print(f"render  {width}x{height} -> {label_width}x{label_height} zoom {zoom_factor:g}x: {worker_time:7.3f} ms worker | "
+                  f"{gui_time:7.3f} ms GUI thread")
+    application.processEvents()
+    return results
+
+def benchmark_mosaic(camera_counts: list, width: int, height: int, display_size: tuple[int, int], repetitions: int) -> list[dict]:
+    """Measure a display refresh of N cameras, rendered by a VideoRendererThread and a label per camera or composited by a
+        MosaicRendererThread on one label of the same total size, split between the worker threads and the GUI thread.
+    """
+    application = QApplication.instance() or QApplication([])
+    results = []
+    frame = SyntheticFrameSource(width, height, realtime=False).read()[1]
+    for cameras in camera_counts:
+        columns = max(1, int(np.ceil(np.sqrt(cameras))))
+        rows = int(np.ceil(cameras / columns))
+        label_size = (display_size[0] // columns, display_size[1] // rows)
+        renderers = []
+        for _ in range(cameras):
+            label = QLabel()
+            label.resize(*label_size)
+            renderers.append(VideoRendererThread(label))
+        mosaic_label = QLabel()
+        mosaic_label.resize(*display_size)
+        mosaic = MosaicRendererThread(mosaic_label, cameras)
+        mosaic.allocate_mosaics(display_size, mosaic.layout)
+        posted_frames = [(frame, float("nan"), None)] * cameras
+
+        timings = {"cameras": [0.0, 0.0], "mosaic": [0.0, 0.0]}
+        for _ in range(repetitions):
+            start = time.perf_counter()
+            for renderer in renderers:
+                renderer.ready_frame = (renderer.render_frame(frame, label_size), float("nan"), None)
+            rendered = time.perf_counter()
+            for renderer in renderers:
+                renderer.paint_frame()
+            painted = time.perf_counter()
+            timings["cameras"][0] += rendered - start
+            timings["cameras"][1] += painted - rendered
+
+            mosaic.compose(mosaic.mosaics[1 - mosaic.front_index], mosaic.mosaics[mosaic.front_index], posted_frames)
+            mosaic.front_index = 1 - mosaic.front_index
+            composed = time.perf_counter()
+            mosaic.paint_frame()
+            timings["mosaic"][0] += composed - painted
+            timings["mosaic"][1] += time.perf_counter() - composed
+
+        for mode, (worker_time, gui_time) in timings.items():
+            worker_time = worker_time / repetitions * 1000
+            gui_time = gui_time / repetitions * 1000
+            results.append({"mode": mode, "cameras": cameras, "width": width, "height": height, "display_width": display_size[0],
+                            "display_height": display_size[1], "worker_ms_per_refresh": worker_time, "gui_ms_per_refresh": gui_time})
+            print(f"mosaic  {mode:>7} {cameras:>2} cameras {width}x{height} -> {display_size[0]}x{display_size[1]}: "
+                  f"{worker_time:7.3f} ms worker | {gui_time:7.3f} ms GUI thread")
+    application.processEvents()
+    return results
+
+def benchmark_export(fourccs: list, width: int, height: int, frames: int) -> list[dict]:
+    """Measure VideoWriterThread encoding throughput for every fourcc, running the writer synchronously."""
+    source = SyntheticFrameSource(width, height, realtime=False)
+    clip = [source.read()[1] for _ in range(frames)]
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for fourcc in fourccs:
+            filename = os.path.join(directory, f"benchmark_{fourcc}.avi")
+            writer = VideoWriterThread(clip, width, height, 25, filename, cv2.VideoWriter_fourcc(*fourcc))
+            start = time.perf_counter()
+            writer.run()
+            elapsed = time.perf_counter() - start
+
+            file_size = os.path.getsize(filename) if os.path.exists(filename) else 0
+            results.append({"fourcc": fourcc, "width": width, "height": height, "frames": frames,
+                            "fps": frames / elapsed, "file_bytes": file_size, "encoded": file_size > 0})
+            print(f"export  {fourcc:>5} {width}x{height}: {frames / elapsed:7.1f} fps | {file_size / 2**20:7.2f} MB")
+    return results
+
+def parse_resolution(text: str) -> tuple[int, int]:
+    """Parse a WIDTHxHEIGHT resolution."""
+    width, height = text.lower().split("x")
+    return int(width), int(height)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless benchmarks of the VAR capture pipeline")
+    parser.add_argument("--output", default="bench_output.json", help="JSON file the results are written to")
+    parser.add_argument("--sections", nargs="+", choices=SECTIONS, default=SECTIONS, help="Benchmarks to run")
+    parser.add_argument("--quick", action="store_true", help="Small sizes and short runs, to check the suite itself")
+    parser.add_argument("--resolutions", nargs="+", type=parse_resolution, help="Frame resolutions as WIDTHxHEIGHT")
+    parser.add_argument("--cameras", nargs="+", type=int, help="Numbers of simulated cameras of the capture benchmark")
+    parser.add_argument("--fourccs", nargs="+", help="Codecs of the export benchmark")
+    parser.add_argument("--backends", nargs="+", choices=["thread", "process"], default=["thread", "process"],
+                        help="Capture backends of the capture benchmark")
+    arguments = parser.parse_args()
+
+    resolutions = arguments.resolutions or ([(640, 360)] if arguments.quick else [(1280, 720), (1920, 1080)])
+    camera_counts = arguments.cameras or ([1, 2] if arguments.quick else [1, 2, 4, 8])
+    fourccs = arguments.fourccs or ["DIVX", "XVID", "MJPG", "mp4v"]
+    capacities = [25] if arguments.quick else [50, 250]
+    operations = 50 if arguments.quick else 500
+    duration = 0.5 if arguments.quick else 5.0
+    width, height = resolutions[-1]
+
+    report = {"started_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "quick": arguments.quick,
+              "environment": {"platform": platform.platform(), "python": platform.python_version(), "cpu_count": os.cpu_count(),
+                              "numpy": np.__version__, "opencv": cv2.__version__, "pyside6": pyside_version},
+              "results": {}}
+
+    if "buffer" in arguments.sections:
+        report["results"]["buffer"] = benchmark_buffer(capacities, resolutions, operations)
+    if "capture" in arguments.sections:
+        report["results"]["capture"] = benchmark_capture(camera_counts, width, height, duration, arguments.backends)
+    if "readers" in arguments.sections:
+        report["results"]["readers"] = benchmark_readers([0, 1, 4] if not arguments.quick else [0, 2], width, height, duration)
+    if "render" in arguments.sections:
+        report["results"]["render"] = benchmark_render(resolutions, [(480, 270), (960, 540)], [1, 4], operations)
+    if "mosaic" in arguments.sections:
+        mosaic_counts = arguments.cameras or ([4] if arguments.quick else [4, 9, 16])
+        report["results"]["mosaic"] = benchmark_mosaic(mosaic_counts, width, height, (1600, 900), operations // 5)
+    if "export" in arguments.sections:
+        report["results"]["export"] = benchmark_export(fourccs, width, height, operations)
+    if "pixel_format" in arguments.sections:
+        report["results"]["pixel_format"] = benchmark_pixel_format(resolutions, operations)
+
+    with open(arguments.output, "w") as output_file:
+        json.dump(report, output_file, indent=2)
+    print(f"Results written to {arguments.output}")
@@ -0,0 +1,46 @@
+""" Compile the Qt Designer forms of VAR_System_ui into the Python modules the application imports, so the windows are built by plain
+    Python code at startup instead of parsing the .ui XML with QUiLoader. Run it after editing a form:
+
+        python build_ui.py            regenerate ui_mainwindow.py and ui_DialogSettings.py
+        python build_ui.py --check    fail if a generated module is out of date with its form
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+# Form -> generated module
+FORMS = {os.path.join("VAR_System_ui", "mainwindow.ui"): "ui_mainwindow.py",
+         os.path.join("VAR_System_ui", "DialogSettings.ui"): "ui_DialogSettings.py"}
+
+def compile_form(form_path: str, module_path: str):
+    '''Run the PySide6 user interface compiler on a form.'''
+    subprocess.run(["pyside6-uic", "--no-autoconnection", form_path, "-o", module_path], check=True)
+
+def read_code(module_path: str) -> list[str]:
+    '''Return the lines of a generated module without its header, which holds the compiler version.'''
+    with open(module_path, encoding="utf-8") as module_file:
+        return [line for line in module_file if not line.startswith("##")]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compile the VAR_System_ui forms")
+    parser.add_argument("--check", action="store_true", help="Only check that the generated modules are up to date")
+    arguments = parser.parse_args()
+
+    root = os.path.dirname(os.path.abspath(__file__))
+    stale = []
+    for form, module in FORMS.items():
+        form_path, module_path = os.path.join(root, form), os.path.join(root, module)
+        if not arguments.check:
+            compile_form(form_path, module_path)
+            print(f"{form} -> {module}")
+            continue
+        with tempfile.TemporaryDirectory() as directory:
+            compiled_path = os.path.join(directory, module)
+            compile_form(form_path, compiled_path)
+            if not os.path.exists(module_path) or read_code(compiled_path) != read_code(module_path):
+                stale.append(module)
+    if stale:
+        print(f"Out of date, run python build_ui.py: {', '.join(stale)}")
+        sys.exit(1)
@@ -1,7 +1,11 @@
+import time
+# Start of the startup report, taken before the Qt and OpenCV imports
+launch_time = time.monotonic()
+
 from PySide6.QtWidgets import QApplication
 from VideoPlayer import VideoPlayer
 
 if __name__ == "__main__":
     app = QApplication([])
-    window = VideoPlayer()
+    window = VideoPlayer(launch_time)
     app.exec_()
@@ -0,0 +1,64 @@
+""" Headless VAR capture service: the capture, buffer, playback, bookmark and export engine without any widget, controlled through the
+    local API of ControlServer, e.g.:
+
+        python service.py --source synthetic --cameras 2 --port 8765 --start
+        curl localhost:8765/status
+"""
+import time
+# Start of the startup report, taken before the Qt and OpenCV imports
+launch_time = time.monotonic()
+
+from PySide6.QtCore import QCoreApplication, QTimer
+import argparse
+import signal
+
+from CaptureService import CaptureService
+from ControlServer import ControlServer
+from PreviewServer import PreviewServer
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless VAR capture service")
+    parser.add_argument("--cameras", type=int, default=2, help="Number of cameras")
+    parser.add_argument("--source", default="camera", help='"camera", "synthetic" or a video file path with {index}')
+    parser.add_argument("--buffer-size", type=int, default=250, help="Buffer size in frames")
+    parser.add_argument("--buffer-storage", default="preallocated", choices=["deque", "preallocated", "seqlock", "memmap", "encoded"])
+    parser.add_argument("--pixel-format", default="bgr", choices=["bgr", "i420"])
+    parser.add_argument("--backend", default="thread", choices=["thread", "process"], help="Capture backend")
+    parser.add_argument("--encoding", default="DIVX", help="FourCC of the exported clips")
+    parser.add_argument("--output", default="output", help="Folder of the clips and metrics file")
+    parser.add_argument("--bookmarks", default="bookmarks", help="Folder of the bookmark index")
+    parser.add_argument("--recording", action="store_true", help="Record every camera to segment files")
+    parser.add_argument("--host", default="127.0.0.1", help="Address of the control API, keep it local")
+    parser.add_argument("--port", type=int, default=8765, help="Port of the control API")
+    parser.add_argument("--socket", help="Unix socket of the control API, instead of the port")
+    parser.add_argument("--preview-port", type=int, help="Port of the MJPEG preview server on the LAN, disabled if not given")
+    parser.add_argument("--start", action="store_true", help="Start capturing right away instead of waiting for POST /start")
+    arguments = parser.parse_args()
+
+    app = QCoreApplication([])
+    service = CaptureService(number_of_cameras=arguments.cameras, buffer_size=arguments.buffer_size,
+                             buffer_storage=arguments.buffer_storage, pixel_format=arguments.pixel_format,
+                             capture_backend=arguments.backend, frame_source=arguments.source, encoding=arguments.encoding,
+                             output_path=arguments.output, recording=arguments.recording, bookmark_path=arguments.bookmarks,
+                             launch_time=launch_time)
+    server = ControlServer(service, host=arguments.host, port=arguments.port, socket_path=arguments.socket, on_shutdown=app.quit)
+    server.start()
+    preview_server = None
+    if arguments.preview_port is not None:
+        preview_server = PreviewServer(lambda: service.capture_threads, port=arguments.preview_port)
+        preview_server.start()
+    if arguments.start:
+        service.start()
+
+    # Ctrl+C and SIGTERM quit the event loop, which only lets Python handle signals between events: a timer keeps it waking up
+    signal.signal(signal.SIGINT, lambda *_: app.quit())
+    signal.signal(signal.SIGTERM, lambda *_: app.quit())
+    signal_timer = QTimer()
+    signal_timer.timeout.connect(lambda: None)
+    signal_timer.start(200)
+
+    app.exec()
+    server.stop()
+    if preview_server is not None:
+        preview_server.stop()
+    service.close()
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+from PreallocatedCircularBuffer import PreallocatedCircularBuffer
+
+def frame(value: int) -> np.ndarray:
+    return np.full((2, 3), value, dtype=np.uint8)
+
+@pytest.fixture
+def buffer():
+    buffer = PreallocatedCircularBuffer(4, (2, 3))
+    for value in range(6):
+        buffer.write_frame(frame(value), timestamp=float(value))
+    return buffer
+
+def test_frames_are_in_chronological_order_without_copies(buffer):
+    with buffer.snapshot(2, 5) as snapshot:
+        assert len(snapshot) == 4
+        assert (snapshot.first_sequence, snapshot.last_sequence) == (2, 5)
+        assert [int(snapshot[index][0, 0]) for index in range(4)] == [2, 3, 4, 5]
+        assert list(snapshot.capture_times) == [2.0, 3.0, 4.0, 5.0]
+        assert all(np.shares_memory(snapshot[index], buffer.buffer) for index in range(4))
+
+def test_range_is_clipped_to_the_buffer(buffer):
+    with buffer.snapshot(0, 100) as snapshot:
+        assert (snapshot.first_sequence, snapshot.last_sequence) == (2, 5)
+    assert buffer.snapshot(10, 20) is None
+
+def test_pinned_frames_are_copied_out_before_they_are_overwritten(buffer):
+    snapshot = buffer.snapshot(2, 5)
+    for value in range(6, 9):
+        buffer.write_frame(frame(value))
+
+    assert [int(snapshot[index][0, 0]) for index in range(4)] == [2, 3, 4, 5]
+    assert not np.shares_memory(snapshot[0], buffer.buffer)
+    assert np.shares_memory(snapshot[3], buffer.buffer)
+    snapshot.release()
+
+def test_released_snapshot_is_not_pinned_anymore(buffer):
+    snapshot = buffer.snapshot(2, 5)
+    snapshot.release()
+    buffer.write_frame(frame(6))
+
+    assert buffer.snapshots == []
+    assert not snapshot.contains(2)
+
+def test_oldest_frame_is_left_out_while_it_is_written(buffer):
+    buffer.write_slot()
+    with buffer.snapshot(2, 5) as snapshot:
+        assert snapshot.first_sequence == 3
+    buffer.commit_frame()
+
+def test_copy_frames(buffer):
+    with buffer.snapshot(2, 5) as snapshot:
+        out = np.empty((2, 2, 3), dtype=np.uint8)
+        snapshot.copy_frames(1, 3, out)
+    assert [int(image[0, 0]) for image in out] == [3, 4]
+
+def test_snapshot_is_not_iterable(buffer):
+    with buffer.snapshot(2, 5) as snapshot:
+        with pytest.raises(TypeError):
+            iter(snapshot)
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+from CircularBuffer import CircularBuffer
+
+def frame(value: int) -> np.ndarray:
+    return np.full((2, 2), value, dtype=np.uint8)
+
+@pytest.fixture
+def wrapped_buffer():
+    """A full buffer of capacity 4 holding the frames captured at 10.0 to 13.0 s, sequence numbers 6 to 9, oldest in slot 2."""
+    buffer = CircularBuffer(4)
+    for value in range(10):
+        buffer.write_frame(frame(value), timestamp=4.0 + value)
+    return buffer
+
+def test_timestamps_follow_the_frames(wrapped_buffer):
+    assert wrapped_buffer.oldest_position() == 2
+    assert wrapped_buffer.position_timestamp(2) == 10.0
+    assert wrapped_buffer.position_sequence(2) == 6
+    assert wrapped_buffer.newest_position() == 1
+
+def test_find_time_position_after_wraparound(wrapped_buffer):
+    assert wrapped_buffer.find_time_position(11.5) == 3
+    assert wrapped_buffer.find_time_position(12.0) == 0
+    assert wrapped_buffer.find_time_position(99.0) == 1
+    # Times before the oldest frame resolve to the oldest one
+    assert wrapped_buffer.find_time_position(0.0) == 2
+
+def test_find_sequence_position(wrapped_buffer):
+    assert wrapped_buffer.find_sequence_position(8) == 0
+    assert wrapped_buffer.find_sequence_position(5) is None
+    assert wrapped_buffer.find_sequence_position(10) is None
+
+def test_resolve_range_units(wrapped_buffer):
+    assert wrapped_buffer.resolve_range() == (6, 9)
+    assert wrapped_buffer.resolve_range(10.5, 12.2, unit="time") == (6, 8)
+    assert wrapped_buffer.resolve_range(3, 0, unit="slot") == (7, 8)
+    assert wrapped_buffer.resolve_range(0, 100) == (6, 9)
+    assert wrapped_buffer.resolve_range(20, 30) is None
+    with pytest.raises(ValueError):
+        wrapped_buffer.resolve_range(unit="frames")
+
+def test_empty_buffer():
+    buffer = CircularBuffer(4)
+    assert buffer.find_time_position(1.0) is None
+    assert buffer.resolve_range() is None
+    assert buffer.snapshot(0, 1) is None
@@ -0,0 +1,56 @@
+from concurrent.futures import Future
+import numpy as np
+import pytest
+from EncodedCircularBuffer import EncodedCircularBuffer
+
+def frame(value: int) -> np.ndarray:
+    return np.full((16, 16, 3), value, dtype=np.uint8)
+
+@pytest.fixture
+def buffer():
+    buffer = EncodedCircularBuffer(6, cache_size=2, prefetch_radius=1)
+    yield buffer
+    buffer.close()
+
+def test_frames_are_decoded_back(buffer):
+    for value in range(8):
+        buffer.write_frame(frame(value * 30))
+    oldest = buffer.oldest_position()
+
+    decoded = [buffer.peek_frame((oldest + offset) % buffer.capacity) for offset in range(buffer.size)]
+    assert [int(image[0, 0, 0]) for image in decoded] == pytest.approx([60, 90, 120, 150, 180, 210], abs=2)
+    assert all(image.shape == (16, 16, 3) for image in decoded)
+
+def test_cache_is_bounded(buffer):
+    for value in range(6):
+        buffer.write_frame(frame(value))
+    for position in range(6):
+        buffer.peek_frame(position)
+
+    assert len(buffer.cache) <= buffer.cache_size
+
+def test_failed_prefetch_is_not_left_pending(buffer):
+    buffer.write_frame(frame(1))
+    key = (0, buffer.generations[0])
+    failed = Future()
+    failed.set_exception(RuntimeError("decode failed"))
+    buffer.pending_decodes.add(key)
+
+    with pytest.raises(RuntimeError):
+        buffer._prefetch_decode(key, failed)
+    assert key not in buffer.pending_decodes
+
+def test_snapshot_keeps_frames_after_they_are_overwritten(buffer):
+    for value in range(6):
+        buffer.write_frame(frame(value * 40))
+    snapshot = buffer.snapshot(0, 1)
+    for value in range(6):
+        buffer.write_frame(frame(255))
+
+    assert int(snapshot[1][0, 0, 0]) == pytest.approx(40, abs=2)
+    snapshot.release()
+
+def test_close_shuts_down_the_pool(buffer):
+    buffer.close()
+    with pytest.raises(RuntimeError):
+        buffer.write_frame(frame(1))
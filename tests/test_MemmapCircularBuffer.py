@@ -0,0 +1,122 @@
+import numpy as np
+import pytest
+from MemmapCircularBuffer import MemmapCircularBuffer
+
+FRAME_SHAPE = (4, 6)
+
+def frame(value: int) -> np.ndarray:
+    return np.full(FRAME_SHAPE, value, dtype=np.uint8)
+
+def stored_values(buffer: MemmapCircularBuffer) -> list:
+    """Return the first pixel of every buffered frame in chronological order."""
+    oldest = buffer.oldest_position()
+    return [int(buffer.peek_frame((oldest + offset) % buffer.capacity)[0, 0]) for offset in range(buffer.size)]
+
+@pytest.fixture
+def ring_path(tmp_path):
+    return str(tmp_path / "capture.ring")
+
+def open_ring(ring_path: str, capacity: int = 5, hot_size: int = 2) -> MemmapCircularBuffer:
+    return MemmapCircularBuffer(capacity, FRAME_SHAPE, ring_path, hot_size=hot_size)
+
+def test_reopen_after_close(ring_path):
+    buffer = open_ring(ring_path)
+    for value in range(7):
+        buffer.write_frame(frame(value))
+    buffer.close()
+
+    reopened = open_ring(ring_path)
+    assert reopened.is_reopened
+    assert reopened.is_full()
+    assert stored_values(reopened) == [2, 3, 4, 5, 6]
+    reopened.close()
+
+def test_reopen_without_flush_keeps_the_order(ring_path):
+    # Nothing is flushed or closed, as when the process crashes
+    buffer = open_ring(ring_path)
+    for value in range(8):
+        buffer.write_frame(frame(value))
+
+    reopened = open_ring(ring_path)
+    assert reopened.head == 3
+    assert stored_values(reopened) == [3, 4, 5, 6, 7]
+    assert [reopened.position_sequence((reopened.oldest_position() + offset) % 5) for offset in range(5)] == [0, 1, 2, 3, 4]
+    buffer.close()
+    reopened.close()
+
+def test_reopen_partially_filled_ring(ring_path):
+    buffer = open_ring(ring_path)
+    for value in range(3):
+        buffer.write_frame(frame(value))
+
+    reopened = open_ring(ring_path)
+    assert reopened.size == 3
+    assert reopened.head == 3
+    assert stored_values(reopened) == [0, 1, 2]
+    buffer.close()
+    reopened.close()
+
+def test_half_written_slot_is_blanked(ring_path):
+    buffer = open_ring(ring_path)
+    for value in range(7):
+        buffer.write_frame(frame(value))
+    # A crash while the oldest slot is overwritten, after it was marked and before it was committed
+    buffer.meta["sequence"][buffer.head] = -1
+    buffer.buffer[buffer.head] = 99
+
+    reopened = open_ring(ring_path)
+    assert reopened.is_full()
+    assert stored_values(reopened) == [0, 3, 4, 5, 6]
+    buffer.close()
+    reopened.close()
+
+def test_different_layout_creates_a_new_ring(ring_path):
+    buffer = open_ring(ring_path)
+    buffer.write_frame(frame(1))
+    buffer.close()
+
+    reopened = open_ring(ring_path, capacity=6)
+    assert not reopened.is_reopened
+    assert reopened.is_empty()
+    reopened.close()
+
+def test_hot_slot_being_written_is_read_from_the_ring(ring_path):
+    buffer = open_ring(ring_path, capacity=10, hot_size=3)
+    for value in range(6):
+        buffer.write_frame(frame(value))
+    slot = buffer.write_slot()
+    slot[:] = 99
+
+    assert stored_values(buffer) == [0, 1, 2, 3, 4, 5]
+    buffer.commit_frame(slot)
+    assert stored_values(buffer) == [0, 1, 2, 3, 4, 5, 99]
+    buffer.close()
+
+def test_resize_is_rejected(ring_path):
+    buffer = open_ring(ring_path)
+    with pytest.raises(RuntimeError):
+        buffer.resize(10)
+    buffer.close()
+
+def test_close_stops_the_flusher(ring_path):
+    buffer = MemmapCircularBuffer(5, FRAME_SHAPE, ring_path, flush_interval=2)
+    for value in range(4):
+        buffer.write_frame(frame(value))
+    buffer.close()
+    buffer.close()
+
+    assert not buffer.flusher.is_alive()
+
+def test_reopen_restores_capture_times(ring_path):
+    buffer = open_ring(ring_path)
+    for value in range(7):
+        buffer.write_frame(frame(value), timestamp=100.0 + value)
+    buffer.close()
+
+    reopened = open_ring(ring_path)
+    oldest = reopened.oldest_position()
+    capture_times = [reopened.position_timestamp((oldest + offset) % 5) for offset in range(5)]
+    # Rebased onto the monotonic clock of the new run, the offset between the two clocks drifts a little meanwhile
+    assert capture_times == pytest.approx([102.0, 103.0, 104.0, 105.0, 106.0], abs=0.01)
+    assert reopened.find_time_position(104.5) == (oldest + 2) % 5
+    reopened.close()
@@ -0,0 +1,16 @@
+from MosaicRendererThread import mosaic_tiles
+
+def test_grid_layout_fits_every_camera():
+    tiles = mosaic_tiles("grid", 3, 200, 100, spacing=0)
+    assert tiles == [(0, 0, 100, 50), (100, 0, 100, 50), (0, 50, 100, 50)]
+
+def test_fixed_grid_leaves_out_cameras_that_dont_fit():
+    assert len(mosaic_tiles("2x2", 6, 200, 100)) == 4
+
+def test_spacing_is_left_between_tiles():
+    assert mosaic_tiles("1x2", 2, 200, 100, spacing=4) == [(2, 2, 96, 96), (102, 2, 96, 96)]
+
+def test_one_plus_n_layout():
+    tiles = mosaic_tiles("1+N", 5, 300, 300, spacing=0)
+    assert tiles[0] == (0, 0, 200, 200)
+    assert tiles[1:] == [(200, 0, 100, 100), (200, 100, 100, 100), (0, 200, 100, 100), (100, 200, 100, 100)]
@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+import PixelFormat
+
+def gradient(width: int = 64, height: int = 32) -> np.ndarray:
+    """Return a smooth BGR test image, which survives the chroma subsampling of I420."""
+    x = np.linspace(0, 255, width, dtype=np.float32)
+    y = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+    return np.dstack([np.broadcast_to(x, (height, width)), np.broadcast_to(y, (height, width)),
+                      np.full((height, width), 128, np.float32)]).astype(np.uint8)
+
+def test_frame_shape():
+    assert PixelFormat.frame_shape(16, 8, PixelFormat.BGR) == (8, 16, 3)
+    assert PixelFormat.frame_shape(16, 8, PixelFormat.I420) == (12, 16)
+
+def test_i420_needs_an_even_size():
+    with pytest.raises(ValueError):
+        PixelFormat.frame_shape(15, 8, PixelFormat.I420)
+
+def test_unknown_pixel_format():
+    with pytest.raises(ValueError):
+        PixelFormat.frame_shape(16, 8, "nv12")
+
+def test_i420_round_trip():
+    image = gradient()
+    stored = PixelFormat.from_bgr(image, PixelFormat.I420)
+
+    assert stored.shape == PixelFormat.frame_shape(64, 32, PixelFormat.I420)
+    assert stored.nbytes == image.nbytes // 2
+    assert PixelFormat.frame_size(stored, PixelFormat.I420) == (64, 32)
+    assert np.abs(PixelFormat.to_bgr(stored, PixelFormat.I420).astype(int) - image).max() <= 8
+
+def test_from_bgr_writes_into_dst():
+    image = gradient()
+    dst = np.empty(PixelFormat.frame_shape(64, 32, PixelFormat.I420), dtype=np.uint8)
+
+    assert PixelFormat.from_bgr(image, PixelFormat.I420, dst=dst) is dst
+    bgr_dst = np.empty_like(image)
+    assert PixelFormat.from_bgr(image, PixelFormat.BGR, dst=bgr_dst) is bgr_dst
+    assert np.array_equal(bgr_dst, image)
+
+def test_bgr_crop_is_a_view():
+    image = gradient()
+    region = PixelFormat.crop(image, PixelFormat.BGR, 4, 2, 10, 6)
+
+    assert region.shape == (6, 10, 3)
+    assert np.shares_memory(region, image)
+    assert np.array_equal(region, image[2:8, 4:14])
+
+def test_i420_crop_is_aligned_to_even_coordinates():
+    image = gradient()
+    stored = PixelFormat.from_bgr(image, PixelFormat.I420)
+    region = PixelFormat.crop(stored, PixelFormat.I420, 5, 3, 21, 11)
+
+    # Cropped from (4, 2) with a size of 20x10, the chroma planes follow the luma plane
+    assert PixelFormat.frame_size(region, PixelFormat.I420) == (20, 10)
+    assert np.array_equal(region[:10], stored[2:12, 4:24])
+    expected = PixelFormat.to_bgr(stored, PixelFormat.I420)[2:12, 4:24]
+    assert np.abs(PixelFormat.to_bgr(region, PixelFormat.I420).astype(int) - expected).max() <= 2
+
+def test_resize_bgr_into_dst():
+    image = gradient()
+    dst = np.empty((16, 32, 3), dtype=np.uint8)
+
+    assert PixelFormat.resize(image, PixelFormat.BGR, (32, 16), dst=dst) is dst
+    assert np.abs(dst.astype(int) - image[::2, ::2]).max() <= 8
+
+def test_resize_i420_plane_by_plane():
+    image = gradient()
+    stored = PixelFormat.from_bgr(image, PixelFormat.I420)
+    resized = PixelFormat.resize(stored, PixelFormat.I420, (32, 16))
+
+    assert resized.shape == PixelFormat.frame_shape(32, 16, PixelFormat.I420)
+    expected = PixelFormat.resize(image, PixelFormat.BGR, (32, 16))
+    assert np.abs(PixelFormat.to_bgr(resized, PixelFormat.I420).astype(int) - expected).max() <= 12
+
+def test_resize_plane_with_uneven_factor():
+    plane = np.full((30, 50), 77, dtype=np.uint8)
+    assert np.array_equal(PixelFormat.resize_plane(plane, (11, 7)), np.full((7, 11), 77, dtype=np.uint8))
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+from PreallocatedCircularBuffer import PreallocatedCircularBuffer
+
+def frame(value: int, shape: tuple = (4, 6, 3)) -> np.ndarray:
+    return np.full(shape, value, dtype=np.uint8)
+
+def stored_values(buffer: PreallocatedCircularBuffer) -> list:
+    """Return the first pixel of every buffered frame in chronological order."""
+    oldest = buffer.oldest_position()
+    return [int(buffer.peek_frame((oldest + offset) % buffer.capacity)[0, 0, 0]) for offset in range(buffer.size)]
+
+def test_frames_are_copied_into_the_block():
+    buffer = PreallocatedCircularBuffer(3, (4, 6, 3))
+    source = frame(7)
+    buffer.write_frame(source)
+    source[:] = 0
+
+    assert buffer.peek_frame(0)[0, 0, 0] == 7
+    assert np.shares_memory(buffer.peek_frame(0), buffer.buffer)
+
+def test_wraparound_keeps_the_newest_frames():
+    buffer = PreallocatedCircularBuffer(3, (4, 6, 3))
+    for value in range(5):
+        buffer.write_frame(frame(value))
+
+    assert buffer.is_full()
+    assert buffer.head_position() == 2
+    assert stored_values(buffer) == [2, 3, 4]
+
+def test_write_slot_and_commit_frame_write_in_place():
+    buffer = PreallocatedCircularBuffer(3, (4, 6, 3))
+    slot = buffer.write_slot()
+    slot[:] = 9
+    buffer.commit_frame()
+
+    assert stored_values(buffer) == [9]
+    assert not buffer.write_in_progress
+
+def test_commit_frame_copies_a_frame_decoded_elsewhere():
+    buffer = PreallocatedCircularBuffer(3, (4, 6, 3))
+    buffer.write_slot()
+    buffer.commit_frame(frame(5))
+
+    assert stored_values(buffer) == [5]
+
+def test_resize_keeps_the_last_slots():
+    buffer = PreallocatedCircularBuffer(4, (4, 6, 3))
+    for value in range(3):
+        buffer.write_frame(frame(value))
+    buffer.resize(2)
+
+    assert buffer.capacity == 2
+    assert buffer.buffer.shape == (2, 4, 6, 3)
+    assert stored_values(buffer) == [1, 2]
+
+def test_resize_after_wraparound_keeps_chronological_order():
+    buffer = PreallocatedCircularBuffer(4, (4, 6, 3))
+    for value in range(6):
+        buffer.write_frame(frame(value))
+    buffer.resize(3)
+    buffer.write_frame(frame(6))
+
+    assert stored_values(buffer) == [4, 5, 6]
+    assert [int(buffer.sequence_numbers[(buffer.oldest_position() + offset) % 3]) for offset in range(3)] == [4, 5, 6]
+
+def test_capacity_must_be_positive():
+    with pytest.raises(ValueError):
+        PreallocatedCircularBuffer(0, (4, 6, 3))
@@ -0,0 +1,83 @@
+import threading
+import numpy as np
+from SeqlockCircularBuffer import SeqlockCircularBuffer
+
+FRAME_SHAPE = (32, 32)
+
+def frame(value: int) -> np.ndarray:
+    return np.full(FRAME_SHAPE, value % 256, dtype=np.uint8)
+
+def test_read_sequence():
+    buffer = SeqlockCircularBuffer(3, FRAME_SHAPE)
+    for value in range(5):
+        buffer.write_frame(frame(value), timestamp=float(value))
+
+    assert buffer.sequence_range() == (2, 4)
+    copy, capture_time = buffer.read_sequence(3)
+    assert int(copy[0, 0]) == 3 and capture_time == 3.0
+    # Overwritten and not written yet
+    assert buffer.read_sequence(1) is None
+    assert buffer.read_sequence(5) is None
+
+def test_read_latest_and_read_at_time():
+    buffer = SeqlockCircularBuffer(3, FRAME_SHAPE)
+    assert buffer.read_latest() is None
+    for value in range(5):
+        buffer.write_frame(frame(value), timestamp=float(value))
+
+    assert buffer.read_latest()[1:] == (4.0, 4)
+    assert buffer.read_at_time(3.5)[1:] == (3.0, 3)
+    assert buffer.read_at_time(0.0)[1:] == (2.0, 2)
+
+def test_frame_being_written_is_reported_missing():
+    buffer = SeqlockCircularBuffer(3, FRAME_SHAPE)
+    for value in range(3):
+        buffer.write_frame(frame(value))
+    buffer.write_slot()
+
+    assert buffer.slot_versions[buffer.head] % 2 == 1
+    assert buffer.read_sequence(0) is None
+    assert buffer.read_sequence(1) is not None
+    buffer.commit_frame()
+    assert buffer.slot_versions[0] % 2 == 0
+
+def test_copy_range_skips_overwritten_frames():
+    buffer = SeqlockCircularBuffer(3, FRAME_SHAPE)
+    for value in range(5):
+        buffer.write_frame(frame(value), timestamp=float(value))
+    out = np.empty((4, *FRAME_SHAPE), dtype=np.uint8)
+    sequence_numbers, capture_times = buffer.copy_range(0, out)
+
+    assert list(sequence_numbers) == [2, 3, 4]
+    assert list(capture_times) == [2.0, 3.0, 4.0]
+    assert [int(image[0, 0]) for image in out[:3]] == [2, 3, 4]
+
+def test_concurrent_reads_are_never_torn():
+    buffer = SeqlockCircularBuffer(4, FRAME_SHAPE)
+    buffer.write_frame(frame(0))
+    is_writing = True
+    torn = []
+
+    def write_frames():
+        for value in range(1, 3000):
+            buffer.write_frame(frame(value))
+
+    def read_frames():
+        out = np.empty(FRAME_SHAPE, dtype=np.uint8)
+        while is_writing:
+            result = buffer.read_latest(out)
+            if result is not None:
+                copy, _, sequence_number = result
+                # Every pixel of a frame holds its sequence number, a torn copy mixes two frames
+                if not np.all(copy == sequence_number % 256):
+                    torn.append(sequence_number)
+
+    readers = [threading.Thread(target=read_frames) for _ in range(2)]
+    for reader in readers:
+        reader.start()
+    write_frames()
+    is_writing = False
+    for reader in readers:
+        reader.join()
+
+    assert torn == []
@@ -0,0 +1,66 @@
+from multiprocessing import shared_memory
+import numpy as np
+import pytest
+from SharedMemoryCircularBuffer import SharedMemoryCircularBuffer
+
+FRAME_SHAPE = (2, 3)
+
+def frame(value: int) -> np.ndarray:
+    return np.full(FRAME_SHAPE, value, dtype=np.uint8)
+
+@pytest.fixture
+def rings():
+    """The ring created by the reading process and the same ring attached by name as the writer would."""
+    reader = SharedMemoryCircularBuffer(3, FRAME_SHAPE)
+    writer = SharedMemoryCircularBuffer(3, FRAME_SHAPE, name=reader.name)
+    yield reader, writer
+    writer.close()
+    reader.close()
+
+def test_reader_sees_the_writer_state(rings):
+    reader, writer = rings
+    for value in range(4):
+        writer.write_frame(frame(value), timestamp=float(value))
+
+    assert (reader.head, reader.size, reader.next_sequence) == (1, 3, 4)
+    oldest = reader.oldest_position()
+    assert [int(reader.peek_frame((oldest + offset) % 3)[0, 0]) for offset in range(3)] == [1, 2, 3]
+    assert reader.position_timestamp(0) == 3.0
+    assert reader.position_sequence(0) == 3
+
+def test_reader_maps_the_frames_read_only(rings):
+    reader, writer = rings
+    writer.write_frame(frame(1))
+
+    with pytest.raises(ValueError):
+        reader.peek_frame(0)[:] = 0
+    with pytest.raises(PermissionError):
+        reader.clear()
+
+def test_remote_write_detaches_pinned_frames(rings):
+    reader, writer = rings
+    for value in range(3):
+        writer.write_frame(frame(value))
+    snapshot = reader.snapshot(0, 2)
+
+    reader.prepare_remote_write()
+    writer.write_frame(frame(9))
+    reader.finish_remote_write()
+
+    assert [int(snapshot[index][0, 0]) for index in range(3)] == [0, 1, 2]
+    snapshot.release()
+
+def test_resize_is_rejected(rings):
+    reader, _ = rings
+    with pytest.raises(RuntimeError):
+        reader.resize(6)
+
+def test_close_removes_the_segment():
+    reader = SharedMemoryCircularBuffer(3, FRAME_SHAPE)
+    name = reader.name
+    reader.close()
+    reader.close()
+
+    assert reader.nbytes() == 0
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=name)
@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+
+################################################################################
+## Form generated from reading UI file 'DialogSettings.ui'
+##
+## Created by: Qt User Interface Compiler version 6.7.3
+##
+## WARNING! All changes made in this file will be lost when recompiling UI file!
+################################################################################
+
+from PySide6.QtCore import (QCoreApplication, QDate, QDateTime, QLocale,
+    QMetaObject, QObject, QPoint, QRect,
+    QSize, QTime, QUrl, Qt)
+from PySide6.QtGui import (QBrush, QColor, QConicalGradient, QCursor,
+    QFont, QFontDatabase, QGradient, QIcon,
+    QImage, QKeySequence, QLinearGradient, QPainter,
+    QPalette, QPixmap, QRadialGradient, QTransform)
+from PySide6.QtWidgets import (QApplication, QComboBox, QDialog, QHBoxLayout,
+    QLabel, QLineEdit, QPushButton, QSizePolicy,
+    QSpacerItem, QSpinBox, QVBoxLayout, QWidget)
+
+class Ui_DialogSettings(object):
+    def setupUi(self, DialogSettings):
+        if not DialogSettings.objectName():
+            DialogSettings.setObjectName(u"DialogSettings")
+        DialogSettings.setWindowModality(Qt.ApplicationModal)
+        DialogSettings.resize(400, 200)
+        DialogSettings.setStyleSheet(u"background-color: #202324;\n"
+"")
+        self.verticalLayout = QVBoxLayout(DialogSettings)
+        self.verticalLayout.setObjectName(u"verticalLayout")
+        self.verticalSpacer = QSpacerItem(20, 20, QSizePolicy.Policy.Minimum, QSizePolicy.Policy.Fixed)
+
+        self.verticalLayout.addItem(self.verticalSpacer)
+
+        self.horizontalLayout = QHBoxLayout()
+        self.horizontalLayout.setObjectName(u"horizontalLayout")
+        self.horizontalSpacer_3 = QSpacerItem(10, 20, QSizePolicy.Policy.Fixed, QSizePolicy.Policy.Minimum)
+
+        self.horizontalLayout.addItem(self.horizontalSpacer_3)
+
+        self.label = QLabel(DialogSettings)
+        self.label.setObjectName(u"label")
+        self.label.setMinimumSize(QSize(120, 0))
+        self.label.setStyleSheet(u"color:white;\n"
+"font-weight: bold;\n"
+"")
+        self.label.setAlignment(Qt.AlignCenter)
+
+        self.horizontalLayout.addWidget(self.label)
+
+        self.horizontalSpacer = QSpacerItem(10, 20, QSizePolicy.Policy.Fixed, QSizePolicy.Policy.Minimum)
+
+        self.horizontalLayout.addItem(self.horizontalSpacer)
+
+        self.buffer_size_spinbox = QSpinBox(DialogSettings)
+        self.buffer_size_spinbox.setObjectName(u"buffer_size_spinbox")
+        sizePolicy = QSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Fixed)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.buffer_size_spinbox.sizePolicy().hasHeightForWidth())
+        self.buffer_size_spinbox.setSizePolicy(sizePolicy)
+        self.buffer_size_spinbox.setStyleSheet(u"background-color: white;\n"
+"color:whte;\n"
+"\n"
+"")
+        self.buffer_size_spinbox.setMinimum(25)
+        self.buffer_size_spinbox.setMaximum(2000)
+        self.buffer_size_spinbox.setSingleStep(25)
+        self.buffer_size_spinbox.setValue(250)
+
+        self.horizontalLayout.addWidget(self.buffer_size_spinbox)
+
+        self.horizontalSpacer_2 = QSpacerItem(5, 20, QSizePolicy.Policy.Fixed, QSizePolicy.Policy.Minimum)
+
+        self.horizontalLayout.addItem(self.horizontalSpacer_2)
+
+        self.label_2 = QLabel(DialogSettings)
+        self.label_2.setObjectName(u"label_2")
+        self.label_2.setStyleSheet(u"color:white;\n"
+"font-weight: bold;\n"
+"")
+
+        self.horizontalLayout.addWidget(self.label_2)
+
+        self.horizontalSpacer_4 = QSpacerItem(150, 20, QSizePolicy.Policy.Preferred, QSizePolicy.Policy.Minimum)
+
+        self.horizontalLayout.addItem(self.horizontalSpacer_4)
+
+
+        self.verticalLayout.addLayout(self.horizontalLayout)
+
+        self.horizontalLayout_2 = QHBoxLayout()
+        self.horizontalLayout_2.setObjectName(u"horizontalLayout_2")
+        self.horizontalSpacer_5 = QSpacerItem(10, 20, QSizePolicy.Policy.Fixed, QSizePolicy.Policy.Minimum)
+
+        self.horizontalLayout_2.addItem(self.horizontalSpacer_5)
+
+        self.label_3 = QLabel(DialogSettings)
+        self.label_3.setObjectName(u"label_3")
+        self.label_3.setMinimumSize(QSize(120, 0))
+        self.label_3.setMaximumSize(QSize(75, 16777215))
+        self.label_3.setStyleSheet(u"color:white;\n"
+"font-weight: bold;\n"
+"")
+        self.label_3.setAlignment(Qt.AlignCenter)
+
+        self.horizontalLayout_2.addWidget(self.label_3)
+
+        self.horizontalSpacer_6 = QSpacerItem(10, 20, QSizePolicy.Policy.Fixed, QSizePolicy.Policy.Minimum)
+
+        self.horizontalLayout_2.addItem(self.horizontalSpacer_6)
+
+        self.number_of_cameras_spinbox = QSpinBox(DialogSettings)
+        self.number_of_cameras_spinbox.setObjectName(u"number_of_cameras_spinbox")
+        sizePolicy.setHeightForWidth(self.number_of_cameras_spinbox.sizePolicy().hasHeightForWidth())
+        self.number_of_cameras_spinbox.setSizePolicy(sizePolicy)
+        self.number_of_cameras_spinbox.setStyleSheet(u"background-color: white;\n"
+"color:whte;\n"
+"\n"
+"")
+        self.number_of_cameras_spinbox.setMinimum(1)
+        self.number_of_cameras_spinbox.setMaximum(4)
+        self.number_of_cameras_spinbox.setSingleStep(1)
+        self.number_of_cameras_spinbox.setValue(2)
+
+        self.horizontalLayout_2.addWidget(self.number_of_cameras_spinbox)
+
+        self.label_4 = QLabel(DialogSettings)
+        self.label_4.setObjectName(u"label_4")
+        self.label_4.setStyleSheet(u"color:white;\n"
+"font-weight: bold;\n"
+"")
+
+        self.horizontalLayout_2.addWidget(self.label_4)
+
+        self.horizontalSpacer_8 = QSpacerItem(200, 20, QSizePolicy.Policy.Preferred, QSizePolicy.Policy.Minimum)
+
+        self.horizontalLayout_2.addItem(self.horizontalSpacer_8)
+
+
+        self.verticalLayout.addLayout(self.horizontalLayout_2)
+
+        self.horizontalLayout_3 = QHBoxLayout()
+        self.horizontalLayout_3.setObjectName(u"horizontalLayout_3")
+        self.horizontalSpacer_7 = QSpacerItem(10, 20, QSizePolicy.Policy.Fixed, QSizePolicy.Policy.Minimum)
+
+        self.horizontalLayout_3.addItem(self.horizontalSpacer_7)
+
+        self.label_5 = QLabel(DialogSettings)
+        self.label_5.setObjectName(u"label_5")
+        self.label_5.setMinimumSize(QSize(120, 0))
+        self.label_5.setMaximumSize(QSize(75, 16777215))
+        self.label_5.setStyleSheet(u"color:white;\n"
+"font-weight: bold;\n"
+"")
+        self.label_5.setAlignment(Qt.AlignCenter)
+
+        self.horizontalLayout_3.addWidget(self.label_5)
+
+        self.horizontalSpacer_9 = QSpacerItem(10, 20, QSizePolicy.Policy.Fixed, QSizePolicy.Policy.Minimum)
+
+        self.horizontalLayout_3.addItem(self.horizontalSpacer_9)
+
+        self.encoding_combobox = QComboBox(DialogSettings)
+        self.encoding_combobox.addItem("")
+        self.encoding_combobox.addItem("")
+        self.encoding_combobox.setObjectName(u"encoding_combobox")
+        self.encoding_combobox.setStyleSheet(u"background-color:white;")
+
+        self.horizontalLayout_3.addWidget(self.encoding_combobox)
+
+        self.label_6 = QLabel(DialogSettings)
+        self.label_6.setObjectName(u"label_6")
+        self.label_6.setStyleSheet(u"color:white;\n"
+"font-weight: bold;\n"
+"")
+
+        self.horizontalLayout_3.addWidget(self.label_6)
+
+        self.horizontalSpacer_10 = QSpacerItem(200, 20, QSizePolicy.Policy.Preferred, QSizePolicy.Policy.Minimum)
+
+        self.horizontalLayout_3.addItem(self.horizontalSpacer_10)
+
+
+        self.verticalLayout.addLayout(self.horizontalLayout_3)
+
+        self.horizontalLayout_4 = QHBoxLayout()
+        self.horizontalLayout_4.setObjectName(u"horizontalLayout_4")
+        self.horizontalSpacer_11 = QSpacerItem(10, 20, QSizePolicy.Policy.Fixed, QSizePolicy.Policy.Minimum)
+
+        self.horizontalLayout_4.addItem(self.horizontalSpacer_11)
+
+        self.label_7 = QLabel(DialogSettings)
+        self.label_7.setObjectName(u"label_7")
+        self.label_7.setMinimumSize(QSize(120, 0))
+        self.label_7.setStyleSheet(u"color:white;\n"
+"font-weight: bold;\n"
+"")
+        self.label_7.setAlignment(Qt.AlignCenter)
+
+        self.horizontalLayout_4.addWidget(self.label_7)
+
+        self.horizontalSpacer_13 = QSpacerItem(10, 20, QSizePolicy.Policy.Fixed, QSizePolicy.Policy.Minimum)
+
+        self.horizontalLayout_4.addItem(self.horizontalSpacer_13)
+
+        self.output_path_edit = QLineEdit(DialogSettings)
+        self.output_path_edit.setObjectName(u"output_path_edit")
+        sizePolicy.setHeightForWidth(self.output_path_edit.sizePolicy().hasHeightForWidth())
+        self.output_path_edit.setSizePolicy(sizePolicy)
+        self.output_path_edit.setMinimumSize(QSize(100, 0))
+        self.output_path_edit.setMaximumSize(QSize(100, 16777215))
+        self.output_path_edit.setStyleSheet(u"background-color:white;")
+        self.output_path_edit.setReadOnly(True)
+
+        self.horizontalLayout_4.addWidget(self.output_path_edit)
+
+        self.output_path_button = QPushButton(DialogSettings)
+        self.output_path_button.setObjectName(u"output_path_button")
+        self.output_path_button.setMinimumSize(QSize(25, 25))
+        self.output_path_button.setMaximumSize(QSize(25, 25))
+        self.output_path_button.setStyleSheet(u"background-color:white\n"
+"")
+
+        self.horizontalLayout_4.addWidget(self.output_path_button)
+
+        self.horizontalSpacer_12 = QSpacerItem(200, 20, QSizePolicy.Policy.Preferred, QSizePolicy.Policy.Minimum)
+
+        self.horizontalLayout_4.addItem(self.horizontalSpacer_12)
+
+
+        self.verticalLayout.addLayout(self.horizontalLayout_4)
+
+        self.verticalSpacer_2 = QSpacerItem(20, 20, QSizePolicy.Policy.Minimum, QSizePolicy.Policy.Fixed)
+
+        self.verticalLayout.addItem(self.verticalSpacer_2)
+
+
+        self.retranslateUi(DialogSettings)
+    # setupUi
+
+    def retranslateUi(self, DialogSettings):
+        DialogSettings.setWindowTitle(QCoreApplication.translate("DialogSettings", u"Settings", None))
+        self.label.setText(QCoreApplication.translate("DialogSettings", u"Buffer Size", None))
+        self.label_2.setText(QCoreApplication.translate("DialogSettings", u"Frames", None))
+        self.label_3.setText(QCoreApplication.translate("DialogSettings", u"Number of Cameras", None))
+        self.label_4.setText("")
+        self.label_5.setText(QCoreApplication.translate("DialogSettings", u"Clip Encoding", None))
+        self.encoding_combobox.setItemText(0, QCoreApplication.translate("DialogSettings", u"DIVX", None))
+        self.encoding_combobox.setItemText(1, QCoreApplication.translate("DialogSettings", u"MJPEG", None))
+
+        self.label_6.setText("")
+        self.label_7.setText(QCoreApplication.translate("DialogSettings", u"Clip Path", None))
+        self.output_path_edit.setText(QCoreApplication.translate("DialogSettings", u"output/", None))
+        self.output_path_button.setText(QCoreApplication.translate("DialogSettings", u"...", None))
+    # retranslateUi
+
@@ -0,0 +1,410 @@
+# -*- coding: utf-8 -*-
+
+################################################################################
+## Form generated from reading UI file 'mainwindow.ui'
+##
+## Created by: Qt User Interface Compiler version 6.7.3
+##
+## WARNING! All changes made in this file will be lost when recompiling UI file!
+################################################################################
+
+from PySide6.QtCore import (QCoreApplication, QDate, QDateTime, QLocale,
+    QMetaObject, QObject, QPoint, QRect,
+    QSize, QTime, QUrl, Qt)
+from PySide6.QtGui import (QAction, QBrush, QColor, QConicalGradient,
+    QCursor, QFont, QFontDatabase, QGradient,
+    QIcon, QImage, QKeySequence, QLinearGradient,
+    QPainter, QPalette, QPixmap, QRadialGradient,
+    QTransform)
+from PySide6.QtWidgets import (QApplication, QHBoxLayout, QLabel, QMainWindow,
+    QMenu, QMenuBar, QPushButton, QSizePolicy,
+    QSlider, QSpacerItem, QVBoxLayout, QWidget)
+
+class Ui_VideoPlayer(object):
+    def setupUi(self, VideoPlayer):
+        if not VideoPlayer.objectName():
+            VideoPlayer.setObjectName(u"VideoPlayer")
+        VideoPlayer.resize(1280, 725)
+        VideoPlayer.setMinimumSize(QSize(1280, 720))
+        VideoPlayer.setMaximumSize(QSize(1920, 1080))
+        VideoPlayer.setStyleSheet(u"background-color:#202324")
+        self.actionSettings = QAction(VideoPlayer)
+        self.actionSettings.setObjectName(u"actionSettings")
+        self.centralwidget = QWidget(VideoPlayer)
+        self.centralwidget.setObjectName(u"centralwidget")
+        self.centralwidget.setMaximumSize(QSize(1920, 1080))
+        self.verticalLayout = QVBoxLayout(self.centralwidget)
+        self.verticalLayout.setObjectName(u"verticalLayout")
+        self.verticalSpacer_5 = QSpacerItem(20, 40, QSizePolicy.Policy.Minimum, QSizePolicy.Policy.Preferred)
+
+        self.verticalLayout.addItem(self.verticalSpacer_5)
+
+        self.video_layout = QVBoxLayout()
+        self.video_layout.setObjectName(u"video_layout")
+        self.top_video_layout = QHBoxLayout()
+        self.top_video_layout.setObjectName(u"top_video_layout")
+        self.horizontalSpacer_6 = QSpacerItem(150, 0, QSizePolicy.Policy.Fixed, QSizePolicy.Policy.Minimum)
+
+        self.top_video_layout.addItem(self.horizontalSpacer_6)
+
+        self.video_label_1 = QLabel(self.centralwidget)
+        self.video_label_1.setObjectName(u"video_label_1")
+        sizePolicy = QSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.video_label_1.sizePolicy().hasHeightForWidth())
+        self.video_label_1.setSizePolicy(sizePolicy)
+        self.video_label_1.setMinimumSize(QSize(400, 225))
+        self.video_label_1.setMaximumSize(QSize(800, 450))
+        self.video_label_1.setStyleSheet(u"background-color:#121414")
+        self.video_label_1.setAlignment(Qt.AlignCenter)
+
+        self.top_video_layout.addWidget(self.video_label_1)
+
+        self.horizontalSpacer_3 = QSpacerItem(40, 20, QSizePolicy.Policy.Minimum, QSizePolicy.Policy.Minimum)
+
+        self.top_video_layout.addItem(self.horizontalSpacer_3)
+
+        self.video_label_2 = QLabel(self.centralwidget)
+        self.video_label_2.setObjectName(u"video_label_2")
+        sizePolicy.setHeightForWidth(self.video_label_2.sizePolicy().hasHeightForWidth())
+        self.video_label_2.setSizePolicy(sizePolicy)
+        self.video_label_2.setMinimumSize(QSize(400, 225))
+        self.video_label_2.setMaximumSize(QSize(800, 450))
+        self.video_label_2.setStyleSheet(u"background-color:#121414")
+        self.video_label_2.setAlignment(Qt.AlignCenter)
+
+        self.top_video_layout.addWidget(self.video_label_2)
+
+        self.horizontalSpacer_7 = QSpacerItem(150, 20, QSizePolicy.Policy.Fixed, QSizePolicy.Policy.Minimum)
+
+        self.top_video_layout.addItem(self.horizontalSpacer_7)
+
+
+        self.video_layout.addLayout(self.top_video_layout)
+
+        self.verticalSpacer = QSpacerItem(10, 10, QSizePolicy.Policy.Minimum, QSizePolicy.Policy.Preferred)
+
+        self.video_layout.addItem(self.verticalSpacer)
+
+        self.bottom_video_layout = QHBoxLayout()
+        self.bottom_video_layout.setObjectName(u"bottom_video_layout")
+        self.horizontalSpacer_8 = QSpacerItem(150, 20, QSizePolicy.Policy.Fixed, QSizePolicy.Policy.Minimum)
+
+        self.bottom_video_layout.addItem(self.horizontalSpacer_8)
+
+        self.video_label_3 = QLabel(self.centralwidget)
+        self.video_label_3.setObjectName(u"video_label_3")
+        sizePolicy.setHeightForWidth(self.video_label_3.sizePolicy().hasHeightForWidth())
+        self.video_label_3.setSizePolicy(sizePolicy)
+        self.video_label_3.setMinimumSize(QSize(400, 225))
+        self.video_label_3.setMaximumSize(QSize(800, 450))
+        self.video_label_3.setStyleSheet(u"background-color:#121414")
+        self.video_label_3.setAlignment(Qt.AlignCenter)
+
+        self.bottom_video_layout.addWidget(self.video_label_3)
+
+        self.horizontalSpacer_2 = QSpacerItem(40, 20, QSizePolicy.Policy.Minimum, QSizePolicy.Policy.Minimum)
+
+        self.bottom_video_layout.addItem(self.horizontalSpacer_2)
+
+        self.video_label_4 = QLabel(self.centralwidget)
+        self.video_label_4.setObjectName(u"video_label_4")
+        sizePolicy.setHeightForWidth(self.video_label_4.sizePolicy().hasHeightForWidth())
+        self.video_label_4.setSizePolicy(sizePolicy)
+        self.video_label_4.setMinimumSize(QSize(400, 225))
+        self.video_label_4.setMaximumSize(QSize(800, 450))
+        self.video_label_4.setStyleSheet(u"background-color:#121414")
+        self.video_label_4.setAlignment(Qt.AlignCenter)
+
+        self.bottom_video_layout.addWidget(self.video_label_4)
+
+        self.horizontalSpacer_9 = QSpacerItem(150, 20, QSizePolicy.Policy.Fixed, QSizePolicy.Policy.Minimum)
+
+        self.bottom_video_layout.addItem(self.horizontalSpacer_9)
+
+
+        self.video_layout.addLayout(self.bottom_video_layout)
+
+
+        self.verticalLayout.addLayout(self.video_layout)
+
+        self.verticalSpacer_6 = QSpacerItem(20, 20, QSizePolicy.Policy.Minimum, QSizePolicy.Policy.Preferred)
+
+        self.verticalLayout.addItem(self.verticalSpacer_6)
+
+        self.timeline_layout = QHBoxLayout()
+        self.timeline_layout.setObjectName(u"timeline_layout")
+        self.horizontalSpacer_12 = QSpacerItem(250, 20, QSizePolicy.Policy.Minimum, QSizePolicy.Policy.Minimum)
+
+        self.timeline_layout.addItem(self.horizontalSpacer_12)
+
+        self.write_label = QLabel(self.centralwidget)
+        self.write_label.setObjectName(u"write_label")
+        self.write_label.setMinimumSize(QSize(50, 0))
+        self.write_label.setMaximumSize(QSize(50, 16777215))
+        self.write_label.setStyleSheet(u"color:white;\n"
+"font-size: 15px;\n"
+"font-weight: bold;")
+
+        self.timeline_layout.addWidget(self.write_label)
+
+        self.horizontalSpacer_15 = QSpacerItem(5, 20, QSizePolicy.Policy.Minimum, QSizePolicy.Policy.Minimum)
+
+        self.timeline_layout.addItem(self.horizontalSpacer_15)
+
+        self.write_slider = QSlider(self.centralwidget)
+        self.write_slider.setObjectName(u"write_slider")
+        self.write_slider.setEnabled(False)
+        self.write_slider.setStyleSheet(u"QSlider::groove:horizontal#write_slider { \n"
+"	background-color: #ededed;\n"
+"	border: 0px solid #cccccc; \n"
+"	height: 5px; \n"
+"	border-radius: 2px;\n"
+"}\n"
+"\n"
+"QSlider::handle:horizontal#write_slider { \n"
+"	background-color: #e33b3b; \n"
+"	border: 2px solid #e33b3b; \n"
+"	width: 10px; \n"
+"	height: 10px; \n"
+"	line-height: 20px; \n"
+"	margin-top: -5px; \n"
+"	margin-bottom: -5px; \n"
+"	border-radius: 5px; \n"
+"}")
+        self.write_slider.setOrientation(Qt.Horizontal)
+
+        self.timeline_layout.addWidget(self.write_slider)
+
+        self.horizontalSpacer_13 = QSpacerItem(250, 20, QSizePolicy.Policy.Minimum, QSizePolicy.Policy.Minimum)
+
+        self.timeline_layout.addItem(self.horizontalSpacer_13)
+
+
+        self.verticalLayout.addLayout(self.timeline_layout)
+
+        self.verticalSpacer_2 = QSpacerItem(20, 10, QSizePolicy.Policy.Minimum, QSizePolicy.Policy.Fixed)
+
+        self.verticalLayout.addItem(self.verticalSpacer_2)
+
+        self.slider_layout = QHBoxLayout()
+        self.slider_layout.setObjectName(u"slider_layout")
+        self.horizontalSpacer_10 = QSpacerItem(250, 20, QSizePolicy.Policy.Minimum, QSizePolicy.Policy.Minimum)
+
+        self.slider_layout.addItem(self.horizontalSpacer_10)
+
+        self.playback_label = QLabel(self.centralwidget)
+        self.playback_label.setObjectName(u"playback_label")
+        self.playback_label.setMinimumSize(QSize(50, 0))
+        self.playback_label.setMaximumSize(QSize(50, 16777215))
+        self.playback_label.setStyleSheet(u"color:white;\n"
+"font-size: 15px;\n"
+"font-weight: bold;")
+
+        self.slider_layout.addWidget(self.playback_label)
+
+        self.horizontalSpacer_16 = QSpacerItem(5, 20, QSizePolicy.Policy.Minimum, QSizePolicy.Policy.Minimum)
+
+        self.slider_layout.addItem(self.horizontalSpacer_16)
+
+        self.playback_slider = QSlider(self.centralwidget)
+        self.playback_slider.setObjectName(u"playback_slider")
+        self.playback_slider.setEnabled(False)
+        sizePolicy1 = QSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Fixed)
+        sizePolicy1.setHorizontalStretch(0)
+        sizePolicy1.setVerticalStretch(0)
+        sizePolicy1.setHeightForWidth(self.playback_slider.sizePolicy().hasHeightForWidth())
+        self.playback_slider.setSizePolicy(sizePolicy1)
+        self.playback_slider.setMinimumSize(QSize(0, 0))
+        self.playback_slider.setMaximumSize(QSize(16777215, 16777215))
+        self.playback_slider.setAutoFillBackground(False)
+        self.playback_slider.setStyleSheet(u"QSlider::groove:horizontal#playback_slider { \n"
+"	background-color: #ededed;\n"
+"	border: 0px solid #cccccc; \n"
+"	height: 5px; \n"
+"	border-radius: 2px;\n"
+"}\n"
+"\n"
+"QSlider::handle:horizontal#playback_slider { \n"
+"	background-color: #5dc5f0; \n"
+"	border: 2px solid #5dc5f0; \n"
+"	width: 10px; \n"
+"	height: 10px; \n"
+"	line-height: 20px; \n"
+"	margin-top: -5px; \n"
+"	margin-bottom: -5px; \n"
+"	border-radius: 5px; \n"
+"}")
+        self.playback_slider.setOrientation(Qt.Horizontal)
+        self.playback_slider.setTickInterval(1)
+
+        self.slider_layout.addWidget(self.playback_slider)
+
+        self.horizontalSpacer_11 = QSpacerItem(250, 20, QSizePolicy.Policy.Minimum, QSizePolicy.Policy.Minimum)
+
+        self.slider_layout.addItem(self.horizontalSpacer_11)
+
+
+        self.verticalLayout.addLayout(self.slider_layout)
+
+        self.verticalSpacer_4 = QSpacerItem(20, 20, QSizePolicy.Policy.Minimum, QSizePolicy.Policy.Fixed)
+
+        self.verticalLayout.addItem(self.verticalSpacer_4)
+
+        self.button_layout = QHBoxLayout()
+        self.button_layout.setObjectName(u"button_layout")
+        self.horizontalSpacer = QSpacerItem(40, 20, QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Minimum)
+
+        self.button_layout.addItem(self.horizontalSpacer)
+
+        self.start_button = QPushButton(self.centralwidget)
+        self.start_button.setObjectName(u"start_button")
+        self.start_button.setMinimumSize(QSize(150, 50))
+        self.start_button.setStyleSheet(u"QPushButton:enabled#start_button{\n"
+"font-size: 20px;\n"
+"font-weight: bold;\n"
+"color:#e33b3b;\n"
+"background-color:#4b5054;\n"
+"}\n"
+"\n"
+"QPushButton:!enabled#start_button{\n"
+"font-size: 20px;\n"
+"font-weight: bold;\n"
+"color:#992828;\n"
+"background-color:#2e3233;\n"
+"}")
+
+        self.button_layout.addWidget(self.start_button)
+
+        self.horizontalSpacer_17 = QSpacerItem(40, 20, QSizePolicy.Policy.Maximum, QSizePolicy.Policy.Minimum)
+
+        self.button_layout.addItem(self.horizontalSpacer_17)
+
+        self.realtime_button = QPushButton(self.centralwidget)
+        self.realtime_button.setObjectName(u"realtime_button")
+        self.realtime_button.setEnabled(False)
+        sizePolicy2 = QSizePolicy(QSizePolicy.Policy.Minimum, QSizePolicy.Policy.Expanding)
+        sizePolicy2.setHorizontalStretch(0)
+        sizePolicy2.setVerticalStretch(0)
+        sizePolicy2.setHeightForWidth(self.realtime_button.sizePolicy().hasHeightForWidth())
+        self.realtime_button.setSizePolicy(sizePolicy2)
+        self.realtime_button.setMinimumSize(QSize(150, 50))
+        self.realtime_button.setMaximumSize(QSize(16777215, 50))
+        self.realtime_button.setStyleSheet(u"QPushButton:enabled#realtime_button{\n"
+"font-size: 20px;\n"
+"font-weight: bold;\n"
+"color:#5dc5f0;\n"
+"background-color:#4b5054;\n"
+"}\n"
+"\n"
+"QPushButton:!enabled#realtime_button{\n"
+"font-size: 20px;\n"
+"font-weight: bold;\n"
+"color:#4b9cbf;\n"
+"background-color:#2e3233;\n"
+"}\n"
+"\n"
+"")
+
+        self.button_layout.addWidget(self.realtime_button)
+
+        self.horizontalSpacer_4 = QSpacerItem(40, 20, QSizePolicy.Policy.Maximum, QSizePolicy.Policy.Minimum)
+
+        self.button_layout.addItem(self.horizontalSpacer_4)
+
+        self.playback_button = QPushButton(self.centralwidget)
+        self.playback_button.setObjectName(u"playback_button")
+        self.playback_button.setEnabled(False)
+        sizePolicy2.setHeightForWidth(self.playback_button.sizePolicy().hasHeightForWidth())
+        self.playback_button.setSizePolicy(sizePolicy2)
+        self.playback_button.setMinimumSize(QSize(150, 50))
+        self.playback_button.setMaximumSize(QSize(16777215, 50))
+        self.playback_button.setStyleSheet(u"QPushButton:enabled#playback_button{\n"
+"font-size: 20px;\n"
+"font-weight: bold;\n"
+"color:#5dc5f0;\n"
+"background-color:#4b5054;\n"
+"}\n"
+"\n"
+"QPushButton:!enabled#playback_button{\n"
+"font-size: 20px;\n"
+"font-weight: bold;\n"
+"color:#4b9cbf;\n"
+"background-color:#2e3233;\n"
+"}\n"
+"\n"
+"")
+
+        self.button_layout.addWidget(self.playback_button)
+
+        self.horizontalSpacer_14 = QSpacerItem(40, 20, QSizePolicy.Policy.Maximum, QSizePolicy.Policy.Minimum)
+
+        self.button_layout.addItem(self.horizontalSpacer_14)
+
+        self.save_buffer_button = QPushButton(self.centralwidget)
+        self.save_buffer_button.setObjectName(u"save_buffer_button")
+        self.save_buffer_button.setEnabled(False)
+        self.save_buffer_button.setMinimumSize(QSize(150, 50))
+        self.save_buffer_button.setStyleSheet(u"QPushButton:enabled#save_buffer_button{\n"
+"font-size: 20px;\n"
+"font-weight: bold;\n"
+"color:#5dc5f0;\n"
+"background-color:#4b5054;\n"
+"}\n"
+"\n"
+"QPushButton:!enabled#save_buffer_button{\n"
+"font-size: 20px;\n"
+"font-weight: bold;\n"
+"color:#4b9cbf;\n"
+"background-color:#2e3233;\n"
+"}\n"
+"\n"
+"")
+
+        self.button_layout.addWidget(self.save_buffer_button)
+
+        self.horizontalSpacer_5 = QSpacerItem(40, 20, QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Minimum)
+
+        self.button_layout.addItem(self.horizontalSpacer_5)
+
+
+        self.verticalLayout.addLayout(self.button_layout)
+
+        self.verticalSpacer_3 = QSpacerItem(20, 20, QSizePolicy.Policy.Minimum, QSizePolicy.Policy.Fixed)
+
+        self.verticalLayout.addItem(self.verticalSpacer_3)
+
+        VideoPlayer.setCentralWidget(self.centralwidget)
+        self.menuBar = QMenuBar(VideoPlayer)
+        self.menuBar.setObjectName(u"menuBar")
+        self.menuBar.setGeometry(QRect(0, 0, 1280, 21))
+        self.menuBar.setStyleSheet(u"background-color:#a2aab0;\n"
+"color:black;\n"
+"font-weight: bold")
+        self.menuOptions = QMenu(self.menuBar)
+        self.menuOptions.setObjectName(u"menuOptions")
+        VideoPlayer.setMenuBar(self.menuBar)
+
+        self.menuBar.addAction(self.menuOptions.menuAction())
+        self.menuOptions.addAction(self.actionSettings)
+
+        self.retranslateUi(VideoPlayer)
+    # setupUi
+
+    def retranslateUi(self, VideoPlayer):
+        VideoPlayer.setWindowTitle(QCoreApplication.translate("VideoPlayer", u"MainWindow", None))
+        self.actionSettings.setText(QCoreApplication.translate("VideoPlayer", u"Settings", None))
+        self.video_label_1.setText("")
+        self.video_label_2.setText("")
+        self.video_label_3.setText("")
+        self.video_label_4.setText("")
+        self.write_label.setText(QCoreApplication.translate("VideoPlayer", u"Write", None))
+        self.playback_label.setText(QCoreApplication.translate("VideoPlayer", u"Read", None))
+        self.start_button.setText(QCoreApplication.translate("VideoPlayer", u"START", None))
+        self.realtime_button.setText(QCoreApplication.translate("VideoPlayer", u"Real-Time", None))
+        self.playback_button.setText(QCoreApplication.translate("VideoPlayer", u"Playback", None))
+        self.save_buffer_button.setText(QCoreApplication.translate("VideoPlayer", u"Save Buffer", None))
+        self.menuOptions.setTitle(QCoreApplication.translate("VideoPlayer", u"Options", None))
+    # retranslateUi
+
@@ -1,49 +1,72 @@
-from PySide6.QtCore import Qt, Slot, QMutex, QMutexLocker, QFile, QCoreApplication, QThreadPool, QTimer
-from PySide6.QtUiTools import QUiLoader
-from PySide6.QtGui import QImage, QPixmap
-from PySide6.QtWidgets import QMainWindow, QLabel
+from PySide6.QtCore import Qt, Slot, QMutex, QMutexLocker, QCoreApplication, QThreadPool, QTimer
+from PySide6.QtGui import QImage, QPixmap, QKeySequence, QShortcut
+from PySide6.QtWidgets import QMainWindow, QLabel, QHBoxLayout, QVBoxLayout, QSizePolicy
+from functools import partial
+from typing import Optional
 import numpy as np
 import cv2
 import os
 
-from VideoCaptureThread import VideoCaptureThread
-from VideoWriterThread import VideoWriterThread
+from CaptureService import CaptureService
+from CameraOpenThread import CameraOpenThread
 from VideoRendererThread import VideoRendererThread
+from MosaicRendererThread import MosaicRendererThread, LAYOUTS
+from StatsOverlay import StatsOverlay
+from TimelineWidget import TimelineWidget
+from BookmarkStore import Bookmark
+from PreviewServer import PreviewServer
+from UIStatePublisher import UIStatePublisher
 
 from DialogSettings import DialogSettings
+from ui_mainwindow import Ui_VideoPlayer
 
 # Set required attributes before creating QGuiApplication
 QCoreApplication.setAttribute(Qt.AA_ShareOpenGLContexts)
 
 class VideoPlayer(QMainWindow):
-    def __init__(self):
+    def __init__(self, launch_time: float = None):
+        '''
+            Arguments:
+            -launch_time (float): Monotonic time the application was launched, the start of the startup report. By default now.
+        '''
         super().__init__()
 
-        #Loading the Main Window and its components from the .ui file
-        ui_file_path = QFile("VAR_System_ui\MainWindow.ui")
-        loader = QUiLoader()
-        self.main_window = loader.load(ui_file_path)
+        # Capture, buffer, playback, bookmark and export engine, its settings are the ones of the player. The startup report waits for
+        # the first frame painted
+        self.service = CaptureService(launch_time=launch_time, startup_stage="display", parent=self)
+        self.service.export_updated.connect(self.export_updated)
+        self.service.stats_updated.connect(self.update_stats)
+        self.service.playback_engine.state_changed.connect(self.playback_state_changed)
+        self.playback_engine = self.service.playback_engine
+        self.bookmarks = self.service.bookmarks
+
+        # Main Window and its components, compiled from VAR_System_ui/mainwindow.ui by build_ui.py
+        self.main_window = QMainWindow()
+        self.ui = Ui_VideoPlayer()
+        self.ui.setupUi(self.main_window)
+        self.service.startup_report.mark("ui_loaded")
 
         # Member variables
-        self.buffer_size = 250
-        self.encoding = "DIVX"
+        self.display_mode = "cameras"
+        self.mosaic_layout = "grid"
         self.camera_index = 1
-        self.clip_index = 0
-        self.number_of_threads = 2
-        self.capture_threads = []
         self.renderer_threads = []
-        self.writer_threads = []
+        # Activity score (fraction of the picture changing) of the frames an action jump stops at
+        self.action_threshold = 0.005
+        # Port of the MJPEG preview server for the other people in the room, None disables it
+        self.preview_port = None
+        self.preview_server = None
         self.dialog_settings = None
-        self.output_path = "output\\"
-        if not os.path.exists(self.output_path):
-            try:
-                os.makedirs(self.output_path)
-            except OSError as err:
-                print(f"Error creating folder {self.output_path} : {err}")
-        
-        # Timer used to sync capture threads
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.update_threads)
+        self.camera_open_thread = None
+
+        # Buffer positions of every camera, sampled once per display refresh for the sliders and the timeline cursors
+        self.ui_state = UIStatePublisher(parent=self)
+        self.ui_state.state_updated.connect(self.update_ui_state)
+
+        # Timer used to refresh the timeline filmstrip with the proxies of the first camera
+        self.filmstrip_interval = 500
+        self.filmstrip_timer = QTimer(self)
+        self.filmstrip_timer.timeout.connect(self.update_filmstrip)
 
         # Function used to connect signals and start threads
         self.prepare_application()
@@ -53,85 +76,287 @@ class VideoPlayer(QMainWindow):
         '''Setting UI parameters. Connecting signals and slots. Showing the MainWindow.
         '''
 
-        self.main_window.start_button.clicked.connect(self.start)
-        self.main_window.realtime_button.clicked.connect(self.resume_realtime)
-        self.main_window.playback_button.clicked.connect(self.restart_playback)
-        self.main_window.save_buffer_button.clicked.connect(self.save_video_buffer)
-        self.main_window.playback_slider.sliderPressed.connect(self.playback_cursor_pressed)
-        self.main_window.playback_slider.sliderMoved.connect(self.playback_cursor_dragged)
-        self.main_window.playback_slider.sliderReleased.connect(self.playback_cursor_released)
-        self.main_window.actionSettings.triggered.connect(self.open_dialog_settings)
+        self.ui.start_button.clicked.connect(self.start)
+        self.ui.realtime_button.clicked.connect(self.resume_realtime)
+        self.ui.playback_button.clicked.connect(self.restart_playback)
+        self.ui.save_buffer_button.clicked.connect(self.save_video_buffer)
+        self.ui.playback_slider.sliderMoved.connect(self.playback_cursor_dragged)
+        self.ui.playback_slider.sliderReleased.connect(self.playback_cursor_released)
+        self.ui.actionSettings.triggered.connect(self.open_dialog_settings)
+
+        # Filmstrip of the buffer above the playback and write sliders
+        self.timeline = TimelineWidget(self.service.buffer_size)
+        timeline_layout = self.main_window.findChild(QHBoxLayout, "timeline_layout")
+        parent_layout = timeline_layout.parent()
+        parent_layout.insertWidget(parent_layout.indexOf(timeline_layout), self.timeline)
+
+        # F3 toggles the pipeline stats overlay
+        self.stats_overlay = StatsOverlay(self.main_window)
+        self.stats_shortcut = QShortcut(QKeySequence(Qt.Key_F3), self)
+        self.stats_shortcut.activated.connect(self.toggle_stats_overlay)
+
+        # F4 cycles through the mosaic layouts
+        self.layout_shortcut = QShortcut(QKeySequence(Qt.Key_F4), self)
+        self.layout_shortcut.activated.connect(self.cycle_mosaic_layout)
+
+        # Playback controls: Space pauses, Left and Right step one frame, [ and ] change the playback rate
+        self.playback_shortcuts = []
+        for key, action in [(Qt.Key_Space, self.playback_engine.toggle_pause),
+                            (Qt.Key_Left, lambda: self.playback_engine.step(-1)),
+                            (Qt.Key_Right, lambda: self.playback_engine.step(1)),
+                            (Qt.Key_BracketLeft, lambda: self.playback_engine.change_rate(-1)),
+                            (Qt.Key_BracketRight, lambda: self.playback_engine.change_rate(1))]:
+            shortcut = QShortcut(QKeySequence(key), self)
+            shortcut.activated.connect(action)
+            self.playback_shortcuts.append(shortcut)
+
+        # Bookmarks: B flags an incident, Page Up and Page Down jump to the previous and next bookmark
+        self.bookmark_shortcuts = []
+        for key, action in [(Qt.Key_B, self.add_bookmark),
+                            (Qt.Key_PageUp, lambda: self.jump_to_bookmark(-1)),
+                            (Qt.Key_PageDown, lambda: self.jump_to_bookmark(1))]:
+            shortcut = QShortcut(QKeySequence(key), self)
+            shortcut.activated.connect(action)
+            self.bookmark_shortcuts.append(shortcut)
+
+        # Ctrl+Left and Ctrl+Right jump to the previous and next action, skipping static footage
+        self.action_shortcuts = []
+        for key, direction in [("Ctrl+Left", -1), ("Ctrl+Right", 1)]:
+            shortcut = QShortcut(QKeySequence(key), self)
+            shortcut.activated.connect(lambda direction=direction: self.jump_to_action(direction))
+            self.action_shortcuts.append(shortcut)
         
         self.setWindowTitle("VAR System Test")
         self.setCentralWidget(self.main_window)
         self.show()
+        self.service.startup_report.mark("window_shown")
+
+    @property
+    def capture_threads(self) -> list:
+        return self.service.capture_threads
     
     @Slot()
     def restart_playback(self):
-        '''Set the tail position to the beginning of the buffer'''
-        for thread in self.capture_threads:
-            thread.set_buffer_playback(True)
+        '''Stop writing the buffers and play them from their oldest frame with the playback engine'''
+        self.service.playback()
 
     @Slot()
     def start(self):
-        for thread_index in range(self.number_of_threads):
-            # Capture Thread
-            c_thread = VideoCaptureThread(buffer_size=self.buffer_size, 
-                                                            capture_index=thread_index,
-                                                            parent=self)
-            
-            # Renderer thread
-            label_string = "video_label_" + str(thread_index + 1)
-            video_label = self.main_window.findChild(QLabel, label_string)
-            r_thread = VideoRendererThread(video_label)
-
-            # Connecting signals
-            c_thread.tail_position_updated.connect(self.update_playback_cursor_position)
-            c_thread.head_position_updated.connect(self.update_write_cursor_position)
-            c_thread.display_frame.connect(r_thread.video_label_update)
-
-            # Adding threads to their respective list
-            self.capture_threads.append(c_thread)
-            self.renderer_threads.append(r_thread)
+        '''Open every camera at once in a CameraOpenThread, the capture starts once they are all open. The window stays responsive and
+            shows the progress meanwhile.
+        '''
+        self.ui.start_button.setEnabled(False)
+        self.ui.menuOptions.setEnabled(False)
+        self.service.request_start()
+
+        self.opened_cameras = 0
+        self.statusBar().showMessage(f"Opening cameras 0/{self.service.number_of_cameras}")
+        self.camera_open_thread = CameraOpenThread(self.service.open_source, self.service.number_of_cameras, parent=self)
+        self.camera_open_thread.camera_opened.connect(self.camera_opened)
+        self.camera_open_thread.sources_opened.connect(self.start_capture)
+        self.camera_open_thread.open_failed.connect(self.camera_open_failed)
+        self.camera_open_thread.start()
+
+    @Slot(int, float)
+    def camera_opened(self, capture_index: int, seconds: float):
+        self.service.startup_report.camera_opened(capture_index, seconds)
+        self.opened_cameras += 1
+        self.statusBar().showMessage(f"Opening cameras {self.opened_cameras}/{self.service.number_of_cameras}: camera {capture_index} opened in "
+                                     f"{seconds:.2f} s")
+
+    @Slot(str)
+    def camera_open_failed(self, message: str):
+        print(f"Error opening the cameras: {message}")
+        self.statusBar().showMessage(f"Couldn't open the cameras: {message}", 10000)
+        self.ui.start_button.setEnabled(True)
+        self.ui.menuOptions.setEnabled(True)
+
+    @Slot(list)
+    def start_capture(self, frame_sources: list):
+        '''Create the capture and recorder threads of the opened cameras in the service, with a renderer thread showing them, and start them.
+
+            Arguments:
+            -frame_sources (list): Opened FrameSource (CaptureProcess with the "process" backend) of every camera.
+        '''
+        self.statusBar().clearMessage()
+        try:
+            self.service.create_threads(frame_sources)
+        except Exception as err:
+            self.camera_open_failed(f"{type(err).__name__}: {err}")
+            return
+
+        # Renderer threads, in mosaic mode a single compositor renders all the cameras
+        if self.display_mode == "mosaic":
+            self.renderer_threads.append(self.create_mosaic_renderer())
+        else:
+            for thread_index, c_thread in enumerate(self.capture_threads):
+                label_string = "video_label_" + str(thread_index + 1)
+                video_label = self.main_window.findChild(QLabel, label_string)
+                r_thread = VideoRendererThread(video_label, pixel_format=self.service.pixel_format, stats=c_thread.stats)
+                c_thread.display_frame.connect(r_thread.video_label_update, Qt.DirectConnection)
+                self.renderer_threads.append(r_thread)
     
-        self.main_window.playback_slider.setRange(0, self.buffer_size)
-        self.main_window.write_slider.setRange(0, self.buffer_size)
-        self.main_window.menuOptions.setEnabled(False)
-        self.main_window.realtime_button.setEnabled(True)
-        self.main_window.playback_button.setEnabled(True)
-        self.main_window.save_buffer_button.setEnabled(True)
-        self.main_window.start_button.setEnabled(False)
-        self.main_window.playback_slider.setEnabled(True)
-        self.main_window.write_slider.setEnabled(True)
-
-        self.timer.start(self.capture_threads[0].frame_interval)
-
-        for c_thread, r_thread in zip(self.capture_threads, self.renderer_threads):
-            c_thread.start()
+        self.ui.playback_slider.setRange(0, self.service.buffer_size)
+        self.ui.write_slider.setRange(0, self.service.buffer_size)
+        self.timeline.range_max = self.service.buffer_size
+        self.ui.realtime_button.setEnabled(True)
+        self.ui.playback_button.setEnabled(True)
+        self.ui.save_buffer_button.setEnabled(True)
+        self.ui.playback_slider.setEnabled(True)
+        self.ui.write_slider.setEnabled(True)
+
+        self.service.start_threads()
+        for r_thread in self.renderer_threads:
             r_thread.start()
+        self.filmstrip_timer.start(self.filmstrip_interval)
+        self.ui_state.start(self.capture_threads)
+
+        if self.preview_port is not None:
+            self.preview_server = PreviewServer(lambda: self.service.capture_threads, port=self.preview_port)
+            try:
+                self.preview_server.start()
+            except OSError as err:
+                print(err)
+                self.preview_server = None
+
+    def create_mosaic_renderer(self) -> MosaicRendererThread:
+        '''Replace the camera labels with a single label showing the mosaic of every camera, and create its compositor.'''
+        video_layout = self.main_window.findChild(QVBoxLayout, "video_layout")
+        for label in self.main_window.findChildren(QLabel):
+            if label.objectName().startswith("video_label_"):
+                label.hide()
+        mosaic_label = QLabel(self.main_window)
+        mosaic_label.setObjectName("mosaic_label")
+        mosaic_label.setMinimumSize(800, 450)
+        mosaic_label.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        mosaic_label.setAlignment(Qt.AlignCenter)
+        mosaic_label.setStyleSheet("background-color:#121414")
+        video_layout.insertWidget(0, mosaic_label)
+
+        m_thread = MosaicRendererThread(mosaic_label, len(self.capture_threads), pixel_format=self.service.pixel_format,
+                                        stats=[c_thread.stats for c_thread in self.capture_threads], layout=self.mosaic_layout)
+        for camera_index, c_thread in enumerate(self.capture_threads):
+            c_thread.display_frame.connect(partial(m_thread.post_frame, camera_index), Qt.DirectConnection)
+        return m_thread
+
+    @Slot(list)
+    def update_stats(self, stats: list):
+        '''Refresh the stats overlay when it's shown, after the service dumped the pipeline metrics of every camera'''
+        if self.stats_overlay.isVisible():
+            self.stats_overlay.update_stats(stats)
+
     @Slot()
-    def update_threads(self):
-        for thread in self.capture_threads:
-            thread.synchronize_threads()
+    def update_filmstrip(self):
+        '''Redraw the timeline filmstrip, heatmap, bookmarks and exported ranges, the cursors follow the UIStatePublisher updates'''
+        thumbnails = self.capture_threads[0].get_filmstrip(self.timeline.thumbnail_count())
+        self.timeline.set_bookmarks(self.bookmark_ranges())
+        self.timeline.set_exports(self.time_range_positions(self.service.exported_times))
+        self.timeline.set_activity(self.capture_threads[0].get_activity())
+        self.timeline.set_thumbnails(thumbnails)
 
-    @Slot(int)
-    def update_playback_cursor_position(self, position:int):
-        '''The playback cursor is connected to the tail pointer of the buffer. Its position is updated
-            through a signal emitted by the WorkerThread.'''
-        #print(f"Buffer TAIL position {position}")
-        self.main_window.playback_slider.setValue(position)
+    def bookmark_ranges(self) -> list[tuple[int, int]]:
+        '''Return the first and last buffer position of the first camera of every bookmark still in its buffer.'''
+        time_range = self.capture_threads[0].get_time_range()
+        if time_range is None:
+            return []
+        return self.time_range_positions([(bookmark.start_time, bookmark.end_time) for bookmark in self.bookmarks.overlapping(*time_range)])
 
-    @Slot(int)
-    def update_write_cursor_position(self, position:int):
-        #print(f"Buffer HEAD position {position}")
-        self.main_window.write_slider.setValue(position)
+    def time_range_positions(self, time_ranges: list[tuple[float, float]]) -> list[tuple[int, int]]:
+        '''Return the first and last buffer position of the first camera of every capture time range still in its buffer.'''
+        time_range = self.capture_threads[0].get_time_range()
+        if time_range is None or self.capture_threads[0].review_snapshot is not None:
+            return []
+        ranges = []
+        for start_time, end_time in time_ranges:
+            if end_time < time_range[0] or start_time > time_range[1]:
+                continue
+            ranges.append((self.capture_threads[0].get_time_position(max(start_time, time_range[0])),
+                           self.capture_threads[0].get_time_position(min(end_time, time_range[1]))))
+        return ranges
+
+    @Slot()
+    def add_bookmark(self, label: str = "") -> Optional[Bookmark]:
+        '''Flag an incident around the time shown, see CaptureService.create_bookmark.'''
+        bookmark = self.service.create_bookmark(label)
+        if bookmark is not None:
+            self.statusBar().showMessage(f"Bookmark {bookmark.bookmark_id} added", 3000)
+        return bookmark
+
+    def jump_to_bookmark(self, direction: int):
+        '''Play the next (direction 1) or previous (direction -1) bookmark from its start.'''
+        current_time = self.service.current_time()
+        if current_time is None:
+            return
+        # A bookmark being reviewed starts at the current time, step past it
+        bookmark = self.bookmarks.next_bookmark(current_time + 1e-3) if direction > 0 else self.bookmarks.previous_bookmark(current_time - 1e-3)
+        if bookmark is None:
+            self.statusBar().showMessage("No more bookmarks", 3000)
+            return
+        self.show_bookmark(bookmark)
 
+    def jump_to_action(self, direction: int):
+        '''Play from the start of the next (direction 1) or previous (direction -1) action of any camera.'''
+        current_time = self.service.current_time()
+        if current_time is None:
+            return
+        action_times = [thread.find_action(current_time, direction, self.action_threshold) for thread in self.capture_threads]
+        action_times = [action_time for action_time in action_times if action_time is not None]
+        if not action_times:
+            self.statusBar().showMessage("No more actions in the buffer", 3000)
+            return
+        self.service.seek(min(action_times) if direction > 0 else max(action_times))
 
-    @Slot(bool)
-    def playback_cursor_pressed(self):
-        '''When the playback cursor is pressed the thread stops updating the cursor position'''
+    def show_bookmark(self, bookmark: Bookmark):
+        '''Play a bookmark from its start: from the buffers if it's still in them, from its pinned frames otherwise.'''
         for thread in self.capture_threads:
-            thread.tail_position_updated.disconnect(self.update_playback_cursor_position)
+            thread.set_review_snapshot(None)
+        time_range = self.capture_threads[0].get_time_range()
+        in_buffer = time_range is not None and time_range[0] <= bookmark.start_time
+        if not in_buffer and not bookmark.snapshots:
+            clips = ", ".join(bookmark.clips) if bookmark.clips else "not exported"
+            self.statusBar().showMessage(f"Bookmark {bookmark.bookmark_id} is only on disk: {clips}", 10000)
+            return
+
+        for index, thread in enumerate(self.capture_threads):
+            thread.set_review_snapshot(None if in_buffer else bookmark.snapshots.get(index))
+            if not self.playback_engine.is_active:
+                thread.set_buffer_playback(True)
+        if not self.playback_engine.is_active:
+            self.playback_engine.start()
+        self.playback_engine.seek(bookmark.start_time)
+        self.statusBar().showMessage(f"Bookmark {bookmark.bookmark_id}" + (f": {bookmark.label}" if bookmark.label else ""), 5000)
+
+    @Slot()
+    def cycle_mosaic_layout(self):
+        '''Switch the mosaic to the next layout of LAYOUTS.'''
+        if self.display_mode != "mosaic" or not self.renderer_threads:
+            return
+        self.mosaic_layout = LAYOUTS[(LAYOUTS.index(self.mosaic_layout) + 1) % len(LAYOUTS)] if self.mosaic_layout in LAYOUTS else LAYOUTS[0]
+        self.renderer_threads[0].set_layout(self.mosaic_layout)
+        self.statusBar().showMessage(f"Mosaic layout {self.mosaic_layout}", 2000)
+
+    @Slot()
+    def toggle_stats_overlay(self):
+        self.stats_overlay.setVisible(not self.stats_overlay.isVisible())
+        if self.stats_overlay.isVisible() and self.capture_threads:
+            self.stats_overlay.update_stats([thread.stats for thread in self.capture_threads])
+
+    @Slot(list)
+    def update_ui_state(self, positions: list):
+        '''The write and playback cursors follow the head and tail of the first camera buffer and the timeline shows the cursors of every
+            camera, updated at most once per display refresh by the UIStatePublisher. The playback cursor stays under the mouse while it's
+            dragged.
+
+            Arguments:
+            -positions (list): (head, tail) buffer positions of every camera.
+        '''
+        head_position, tail_position = positions[0]
+        self.ui.write_slider.setValue(head_position)
+        if self.ui.playback_slider.isSliderDown():
+            positions = [(head_position, self.ui.playback_slider.value())] + positions[1:]
+        else:
+            self.ui.playback_slider.setValue(tail_position)
+        self.timeline.set_camera_positions(positions)
 
     @Slot(int)
     def playback_cursor_dragged(self, slider_value: int):
@@ -140,22 +365,45 @@ class VideoPlayer(QMainWindow):
             Arguments:
             -slider_value (int): The slider value is passed through a signal and determines the index to peek at
         '''
-        for thread in self.capture_threads:
-            thread.set_buffer_peeking(is_peeking=True, new_peek_position=slider_value)
+        for thread, position in zip(self.capture_threads, self.aligned_positions(slider_value)):
+            thread.set_buffer_peeking(is_peeking=True, new_peek_position=position)
 
     @Slot(int)
     def playback_cursor_released(self):
         '''When the playback cursor is released the thread stops peeking at the buffer and resumes playback from the selected position'''
-        new_peek_position = self.main_window.playback_slider.value()
+        new_peek_position = self.ui.playback_slider.value()
+        for thread, position in zip(self.capture_threads, self.aligned_positions(new_peek_position)):
+            thread.set_buffer_peeking(is_peeking=False, new_peek_position=position)
+        if self.playback_engine.is_active:
+            release_time = self.capture_threads[0].get_position_timestamp(new_peek_position)
+            if release_time is not None:
+                self.playback_engine.seek(release_time)
+
+    def aligned_positions(self, slider_value: int) -> list[int]:
+        '''Return for every camera the buffer position of the frame captured at the same time as the first camera frame at the slider value.
+            Cameras that have no capture time for it fall back to the slider value.
+
+            Arguments:
+            -slider_value (int): Buffer index on the first camera
+        '''
+        reference_time = self.capture_threads[0].get_position_timestamp(slider_value)
+        positions = []
         for thread in self.capture_threads:
-            thread.set_buffer_peeking(is_peeking=False, new_peek_position=new_peek_position)
-            thread.tail_position_updated.connect(self.update_playback_cursor_position)
+            position = thread.get_time_position(reference_time) if reference_time is not None else None
+            positions.append(slider_value if position is None else position)
+        return positions
 
     @Slot()
     def resume_realtime(self):
         '''Set the tail position to the head position to resume the real-time playback'''
-        for thread in self.capture_threads:
-            thread.set_buffer_playback(False)
+        self.service.realtime()
+
+    @Slot(float, bool)
+    def playback_state_changed(self, rate: float, is_playing: bool):
+        if self.playback_engine.is_active:
+            self.statusBar().showMessage(f"Playback {rate:g}x" + ("" if is_playing else " (paused)"))
+        else:
+            self.statusBar().clearMessage()
 
     @Slot()
     def open_dialog_settings(self):
@@ -168,31 +416,39 @@ class VideoPlayer(QMainWindow):
 
     @Slot()
     def save_video_buffer(self):
-        self.main_window.save_buffer_button.setEnabled(False)
+        self.ui.save_buffer_button.setEnabled(False)
+        self.save_video_range()
+        self.ui.save_buffer_button.setEnabled(True)
+
+    def save_video_range(self, start: float = None, end: float = None, unit: str = "sequence", priority: int = None) -> list[str]:
+        '''Queue the export of a range of every camera buffer to a clip, see CaptureService.export_clip. Returns the export ids.'''
+        return self.service.export_clip(start, end, unit, priority=priority)["exports"]
+
+    @Slot(str, dict)
+    def export_updated(self, export_id: str, export: dict):
+        if export["state"] == "finished":
+            self.statusBar().showMessage(f"Export {export_id} saved to {export['filename']}", 5000)
+        elif export["state"] == "failed":
+            self.statusBar().showMessage(f"Export {export_id} failed: {export['error']}", 10000)
+        elif export["progress"] > 0:
+            self.statusBar().showMessage(f"Export {export_id}: {export['progress']:.0%}")
+
+    def closeEvent(self, event):
+        '''Stop the renderers, then let the service stop the cameras and the recording, finish the queued exports and unpin the bookmarks'''
+        self.filmstrip_timer.stop()
+        self.ui_state.stop()
+        if self.camera_open_thread is not None:
+            self.camera_open_thread.wait()
+        if self.preview_server is not None:
+            self.preview_server.stop()
+        for r_thread in self.renderer_threads:
+            r_thread.stop()
+        self.service.close()
+        event.accept()
 
-        for index, thread in enumerate(self.capture_threads):
-            capture_data = thread.get_capture_data()
-            filename = self.output_path + "capture_" + str(index) + "_clip_" + str(self.clip_index) + ".avi"
-            self.clip_index += 1
-
-            w_thread = VideoWriterThread(buffer = capture_data[0],
-                                        width = int(capture_data[1]),
-                                        height = int(capture_data[2]),
-                                        fps = capture_data[3],
-                                        filename = filename,
-                                        fourcc = cv2.VideoWriter_fourcc(*self.encoding),
-                                        parent = self)
-            
-            self.writer_threads.append(w_thread)
-
-        for thread in self.writer_threads:
-            thread.start()
-            
-        self.main_window.save_buffer_button.setEnabled(True)
-        
     @Slot(int, int, str, str)
     def update_settings(self, number_of_cameras, buffer_size, encoding, output_path):
-        self.buffer_size = buffer_size
-        self.number_of_threads = number_of_cameras
-        self.encoding = encoding
-        self.output_path = output_path
\ No newline at end of file
+        self.service.buffer_size = buffer_size
+        self.service.number_of_cameras = number_of_cameras
+        self.service.encoding = encoding
+        self.service.output_path = output_path
\ No newline at end of file